@@ -21,10 +21,10 @@ import hashlib
 import tempfile
 from pathlib import Path
 from io import BytesIO
-from functools import wraps
+from functools import wraps, lru_cache
 from contextlib import contextmanager
 from zoneinfo import ZoneInfo
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, load_only, raiseload
 from flask import (
     Flask,
     render_template,
@@ -39,8 +39,10 @@ from flask import (
     send_from_directory,
     send_file,
     Response,
+    has_request_context,
 )
-from sqlalchemy import func, text, or_, and_, bindparam
+from sqlalchemy import func, text, or_, and_, bindparam, event, cast, Float, insert
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.exceptions import RequestEntityTooLarge
@@ -53,6 +55,8 @@ from email.message import EmailMessage
 from email.utils import formataddr
 from difflib import SequenceMatcher
 from collections import defaultdict, deque
+from itertools import groupby
+from operator import attrgetter, itemgetter
 from types import SimpleNamespace
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 
@@ -109,8 +113,16 @@ except Exception:
     PdfWriter = None
     PYPDF_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 from config import settings
 from models import (
+    engine as _db_engine,
     init_db,
     ensure_artist_feature_schema,
     ensure_discografica_schema,
@@ -135,6 +147,8 @@ from models import (
     ensure_distributors_schema,
     ensure_artist_calendar_schema,
     ensure_performance_indexes,
+    ensure_search_trgm_indexes,
+    ddl_failure_count,
     SessionLocal,
     User,
     ChartmetricArtist,
@@ -354,6 +368,19 @@ app.config["WTF_CSRF_TIME_LIMIT"] = None
 app.config["WTF_CSRF_SSL_STRICT"] = False
 csrf = CSRFProtect(app)
 
+# Caché de bytecode de Jinja en disco: cada worker de gunicorn (y cada reinicio) reutiliza las
+# plantillas ya compiladas en vez de recompilarlas en su primer render (las grandes, como el
+# reporte de ventas, tardan). Jinja compara la suma de control del fuente, así que nunca sirve
+# una versión vieja. JINJA_CACHE_DIR vacío = desactivada.
+_jinja_cache_dir = os.getenv("JINJA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "app33_jinja_cache"))
+if _jinja_cache_dir:
+    try:
+        from jinja2 import FileSystemBytecodeCache
+        os.makedirs(_jinja_cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(_jinja_cache_dir)
+    except Exception:
+        pass
+
 # ---------------------------------------------------------------------------------------------
 # Modo «solo CalDAV» (segundo despliegue FUERA de Cloudflare)
 # ---------------------------------------------------------------------------------------------
@@ -541,12 +568,14 @@ def inject_country_helpers():
 # Asegurar esquema mínimo en producción (Render/gunicorn no ejecuta __main__)
 # IMPORTANTE: esto debe ser "best-effort" para no romper el arranque si la BBDD
 # está ocupada (locks) o tiene `statement_timeout` bajo.
-def _safe_ensure(fn, name: str):
+def _safe_ensure(fn, name: str) -> bool:
     try:
         fn()
+        return True
     except Exception as e:
         # No interrumpir el arranque por DDL idempotente.
         print(f"[schema] Aviso: no se pudo ejecutar {name}: {e}")
+        return False
 
 # NOTA: el arranque del esquema (crear tablas base + migraciones ligeras idempotentes + índices) se
 # ejecuta CONSOLIDADO y EN SEGUNDO PLANO más abajo (función `_bootstrap_schema_bg`), una vez que ya
@@ -593,7 +622,13 @@ SALES_TYPE_ICON = {
 # Tipos de concierto disponibles en la app.
 # NOTA: "GRATUITO" NO debe aparecer en actualización/reporte de ventas.
 CONCERT_SALE_TYPES_ALL = ["EMPRESA", "GRATUITO", "GIRAS_COMPRADAS", "PARTICIPADOS", "CADIZ", "VENDIDO"]
-CONCERT_SALE_TYPES_ALL_SET = set(CONCERT_SALE_TYPES_ALL)
+CONCERT_SALE_TYPES_ALL_SET = frozenset(CONCERT_SALE_TYPES_ALL)
+
+# Estados de concierto y filtros «pasados/próximos» admitidos en los listados. Se definen una vez
+# aquí (inmutables) en lugar de reconstruir el set en cada petición.
+CONCERT_STATUSES_ALL = ("BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO")
+CONCERT_STATUSES_SET = frozenset(CONCERT_STATUSES_ALL)
+CONCERT_WHEN_SET = frozenset({"PAST", "FUTURE"})
 
 # Secciones SOLO para la pantalla de Conciertos (incluye gratuitos).
 CONCERTS_SECTION_ORDER = list(CONCERT_SALE_TYPES_ALL)
@@ -651,6 +686,37 @@ def get_db():
             pass
 
 
+# Contador de consultas SQL por petición (diagnóstico de N+1). Solo si se pide con la env
+# DB_QUERY_LOG=1 o en modo debug: añade la cabecera `X-DB-Queries` y lo deja en el log, para ver qué
+# pantallas lanzan una consulta por fila. Apagado no registra ningún listener (coste cero).
+DB_QUERY_LOG_ENABLED = app.debug or (os.getenv("DB_QUERY_LOG") or "").strip().lower() in ("1", "true", "yes", "on")
+
+if DB_QUERY_LOG_ENABLED:
+    @event.listens_for(_db_engine, "before_cursor_execute")
+    def _db_query_log_count(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g._db_query_count = getattr(g, "_db_query_count", 0) + 1
+
+    @app.after_request
+    def _db_query_log_report(response):
+        n = getattr(g, "_db_query_count", 0)
+        response.headers["X-DB-Queries"] = str(n)
+        if n:
+            app.logger.info("[db] %s %s -> %d consultas", request.method, request.path, n)
+        return response
+
+
+# Red de seguridad contra N+1 (solo diagnóstico, con DB_RAISELOAD=1): en las consultas marcadas con
+# `_n1_guard()`, cualquier relación NO precargada lanza excepción en vez de hacer una consulta por
+# fila a escondidas. Apagado (producción) no añade nada y todo sigue cargando en diferido.
+DB_RAISELOAD_ENABLED = (os.getenv("DB_RAISELOAD") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _n1_guard() -> tuple:
+    """Opciones extra de carga para una consulta ya precargada: `raiseload("*")` si DB_RAISELOAD."""
+    return (raiseload("*"),) if DB_RAISELOAD_ENABLED else ()
+
+
 def monday_of(d: date) -> date:
     return d - timedelta(days=d.weekday())
 
@@ -681,6 +747,10 @@ def parse_concert_sale_start_date(value: str | None, sale_type: str) -> date | N
     raise ValueError("La fecha de salida a la venta es obligatoria salvo en conciertos gratuitos.")
 
 
+# «ss», «mm:ss» o «hh:mm:ss» (cada pieza puede ir vacía = 0 y con espacios alrededor de los «:»).
+_TIMECODE_RE = re.compile(r"^(\d*)\s*(?::\s*(\d*)\s*)?(?::\s*(\d*))?$")
+
+
 def parse_timecode_to_seconds(value: str | None) -> int | None:
     """Convierte un timecode tipo "mm:ss" o "ss" a segundos.
 
@@ -689,27 +759,15 @@ def parse_timecode_to_seconds(value: str | None) -> int | None:
     raw = (value or "").strip()
     if not raw:
         return None
-    try:
-        if ":" not in raw:
-            n = int(raw)
-            return n if n >= 0 else None
-        parts = [p.strip() for p in raw.split(":")]
-        if len(parts) == 2:
-            mm = int(parts[0] or 0)
-            ss = int(parts[1] or 0)
-            if mm < 0 or ss < 0:
-                return None
-            return mm * 60 + ss
-        if len(parts) == 3:
-            hh = int(parts[0] or 0)
-            mm = int(parts[1] or 0)
-            ss = int(parts[2] or 0)
-            if hh < 0 or mm < 0 or ss < 0:
-                return None
-            return hh * 3600 + mm * 60 + ss
-    except Exception:
+    m = _TIMECODE_RE.match(raw)
+    if not m:
         return None
-    return None
+    a, b, c = m.groups()
+    if c is not None:
+        return int(a or 0) * 3600 + int(b or 0) * 60 + int(c or 0)
+    if b is not None:
+        return int(a or 0) * 60 + int(b or 0)
+    return int(a) if a else None
 
 def to_uuid(val):
     if val is None or val == "":
@@ -1012,6 +1070,12 @@ ROLE_WELCOME = {
 USERS_TXT_PATH = Path(__file__).resolve().parent / "users.txt"
 
 
+# users.txt parseado, por (mtime_ns, tamaño) del fichero: el login lo pide en cada intento y el
+# fichero casi nunca cambia. Si se edita, el stat cambia y se vuelve a leer en la siguiente llamada.
+_USERS_TXT_CACHE = {"key": None, "data": {}}
+_USERS_TXT_LOCK = threading.Lock()
+
+
 def load_users_from_txt():
     """Carga usuarios desde users.txt.
 
@@ -1021,36 +1085,57 @@ def load_users_from_txt():
     - Soporta espacios tras comas.
     - Soporta UTF-8 con BOM.
     - Ignora lineas vacias y comentarios (#).
+
+    El resultado se cachea mientras el fichero no cambie: es de SOLO LECTURA para quien lo llama.
     """
-    users = {}
     try:
-        if not USERS_TXT_PATH.exists():
-            return users
-        with USERS_TXT_PATH.open('r', encoding='utf-8-sig', newline='') as f:
-            reader = csv.reader(f, skipinitialspace=True)
-            for row in reader:
-                if not row:
-                    continue
-                first = (row[0] or '').strip()
-                if not first or first.startswith('#'):
-                    continue
-                if len(row) < 2:
-                    continue
-                email = first.lower()
-                pwd = (row[1] or '').strip()
-                role = 10
-                if len(row) >= 3:
-                    raw_role = (row[2] or '').strip()
-                    if raw_role:
-                        try:
-                            role = int(raw_role)
-                        except Exception:
-                            role = 10
-                users[email] = {'password': pwd, 'role': role}
+        st = USERS_TXT_PATH.stat()
     except Exception:
-        # Si hay cualquier problema leyendo el fichero, fallamos "cerrado" (sin permitir login por TXT).
+        # Sin fichero (o sin acceso): no hay usuarios por TXT.
         return {}
-    return users
+    key = (st.st_mtime_ns, st.st_size)
+    with _USERS_TXT_LOCK:
+        if _USERS_TXT_CACHE["key"] == key:
+            return _USERS_TXT_CACHE["data"]
+        users = {}
+        try:
+            with USERS_TXT_PATH.open('r', encoding='utf-8-sig', newline='') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    # Sin comillas basta un split por TODAS las comas (solo cuentan los campos 0-2:
+                    # una coma o nota final no acaba dentro del rol). Solo una línea con comillas
+                    # (contraseña con comas) pasa por el lector CSV, que las entiende.
+                    if '"' in line:
+                        row = next(csv.reader([line], skipinitialspace=True), [])
+                    else:
+                        row = line.split(',')
+                    if not row:
+                        continue
+                    first = (row[0] or '').strip()
+                    if not first or first.startswith('#'):
+                        continue
+                    if len(row) < 2:
+                        continue
+                    email = first.lower()
+                    pwd = (row[1] or '').strip()
+                    role = 10
+                    if len(row) >= 3:
+                        raw_role = (row[2] or '').strip()
+                        if raw_role:
+                            try:
+                                role = int(raw_role)
+                            except Exception:
+                                role = 10
+                    users[email] = {'password': pwd, 'role': role}
+        except Exception:
+            # Si hay cualquier problema leyendo el fichero, fallamos "cerrado" (sin permitir login por
+            # TXT) y no se cachea: se reintenta en la siguiente llamada.
+            return {}
+        _USERS_TXT_CACHE["key"] = key
+        _USERS_TXT_CACHE["data"] = users
+        return users
 
 def current_role() -> int:
     try:
@@ -1179,6 +1264,11 @@ def format_spanish_date(d: date) -> str:
 
 # --- Zona horaria Madrid ---
 
+# Número en formato español en UNA pasada: intercambia la coma de miles y el punto decimal que
+# escribe `format(v, ",.2f")` (antes eran tres `.replace()` encadenados por cada celda).
+_ES_NUMBER_TRANS = str.maketrans(",.", ".,")
+
+
 @app.template_filter("k")
 def format_thousands(n):
     """
@@ -1208,7 +1298,7 @@ def format_eur(n):
     """Formatea importes en EUR con separador español."""
     try:
         v = float(n or 0)
-        return f"{v:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
+        return f"{v:,.2f} €".translate(_ES_NUMBER_TRANS)
     except Exception:
         return "0,00 €"
     
@@ -1220,16 +1310,11 @@ def format_isrc_filter(value):
 def _parse_share_pairs(ids_list, pct_list):
     """Normaliza y DEDUPLICA: el último gana; % en [0..100]."""
     dedup = {}
-    for sid, pct in zip(ids_list or [], pct_list or []):
+    for sid, pct in zip(ids_list or (), pct_list or ()):
         sid = (sid or "").strip()
         if not sid:
             continue
-        try:
-            v = int(pct)
-        except Exception:
-            v = 0
-        v = max(0, min(100, v))
-        dedup[sid] = v
+        dedup[sid] = _parse_optional_int(str(pct) if pct is not None else None, min_v=0, max_v=100) or 0
     return list(dedup.items())
 
 def _replace_concert_shares(session, concert_id, promoter_pairs, company_pairs):
@@ -1237,10 +1322,14 @@ def _replace_concert_shares(session, concert_id, promoter_pairs, company_pairs):
     session.query(ConcertPromoterShare).filter_by(concert_id=concert_id).delete(synchronize_session=False)
     session.query(ConcertCompanyShare).filter_by(concert_id=concert_id).delete(synchronize_session=False)
     session.flush()
-    for pid, pct in promoter_pairs:
-        session.add(ConcertPromoterShare(concert_id=concert_id, promoter_id=to_uuid(pid), pct=pct))
-    for gid, pct in company_pairs:
-        session.add(ConcertCompanyShare(concert_id=concert_id, company_id=to_uuid(gid), pct=pct))
+    if promoter_pairs:
+        session.execute(insert(ConcertPromoterShare), [
+            {"concert_id": concert_id, "promoter_id": to_uuid(pid), "pct": pct} for pid, pct in promoter_pairs
+        ])
+    if company_pairs:
+        session.execute(insert(ConcertCompanyShare), [
+            {"concert_id": concert_id, "company_id": to_uuid(gid), "pct": pct} for gid, pct in company_pairs
+        ])
 
 def _parse_optional_positive_int(value):
     """
@@ -1253,11 +1342,42 @@ def _parse_optional_positive_int(value):
         return None
     
 # ---------- context ----------
-_ASSET_VERSION = str(int(time.time()))   # cambia en cada arranque → rompe la caché de css/js
+def _compute_asset_version() -> str:
+    """Versión de los estáticos, idéntica en todos los workers de gunicorn (no hay preload_app).
+
+    Usa APP_VERSION o FLY_IMAGE_REF si el despliegue las define; si no, un hash del
+    contenido de los css/js de static/, que solo cambia cuando cambian esos ficheros.
+    """
+    env_version = (os.getenv("APP_VERSION") or os.getenv("FLY_IMAGE_REF") or "").strip()
+    if env_version:
+        return hashlib.sha1(env_version.encode("utf-8")).hexdigest()[:12]
+    h = hashlib.sha1()
+    static_dir = Path(app.static_folder or "static")
+    for f in sorted(static_dir.rglob("*")):
+        if f.is_file() and f.suffix in (".css", ".js"):
+            h.update(f.relative_to(static_dir).as_posix().encode("utf-8"))
+            h.update(f.read_bytes())
+    return h.hexdigest()[:12]
+
+
+_ASSET_VERSION = _compute_asset_version()   # estable entre workers → el ETag de _conditional_html coincide
 
 
 @app.context_processor
 def inject_globals():
+    # Se ejecuta en CADA render (también en los parciales y macros importadas): el diccionario se
+    # construye una vez por petición y se guarda en `g`. Va atado al usuario de la sesión por si una
+    # misma petición cambia de sesión (login/logout) antes de pintar.
+    uid = session.get("user_id")
+    cached = g.get("_tpl_globals")
+    if cached is not None and cached[0] == uid:
+        return cached[1]
+    ctx = _build_template_globals()
+    g._tpl_globals = (uid, ctx)
+    return ctx
+
+
+def _build_template_globals():
     def has_endpoint(name: str) -> bool:
         # permite: {% if has_endpoint('mi_vista') %} ...
         return name in app.view_functions
@@ -1285,6 +1405,11 @@ def inject_globals():
             link, _artist_photo_src(photo_url), name,
         )
 
+    # Rol y permisos repetidos: se calculan una vez por render (los `can_*` ya tiran del memo por
+    # petición de `has_access_key`).
+    role = current_role()
+    edit_catalogs = can_edit_catalogs()
+    edit_discografica = can_edit_discografica()
     return dict(
         BRAND_PRIMARY=settings.BRAND_PRIMARY,
         BRAND_ACCENT=settings.BRAND_ACCENT,
@@ -1306,18 +1431,18 @@ def inject_globals():
         SIM_EXPENSE_CATEGORY_LABELS=SIM_EXPENSE_CATEGORY_LABELS,
         SIM_EXPENSE_CATEGORY_ICONS=SIM_EXPENSE_CATEGORY_ICONS,
         SIM_EXPENSE_QTY_CATEGORIES=SIM_EXPENSE_QTY_CATEGORIES,
-        ROLE=current_role(),
-        ROLE_LABEL=ROLE_LABELS.get(current_role(), str(current_role())),
+        ROLE=role,
+        ROLE_LABEL=ROLE_LABELS.get(role, str(role)),
         CAN_VIEW_ECON=can_view_economics(),
         CAN_EDIT_RADIO=can_edit_radio(),
         CAN_EDIT_SALES=can_edit_sales(),
         CAN_EDIT_CONCERTS=can_edit_concerts(),
         CAN_VIEW_CONCERT_CONTRACTS=can_view_concert_contracts(),
-        CAN_EDIT_CATALOGS=can_edit_catalogs(),
-        CAN_EDIT_SONGS_PROMOTERS=(can_edit_catalogs() or can_edit_discografica()),
-        CAN_EDIT_DISCOGRAFICA=can_edit_discografica(),
+        CAN_EDIT_CATALOGS=edit_catalogs,
+        CAN_EDIT_SONGS_PROMOTERS=(edit_catalogs or edit_discografica),
+        CAN_EDIT_DISCOGRAFICA=edit_discografica,
         CAN_EDIT_ARTISTS_STATIONS=can_edit_artists_stations(),
-        IS_MASTER=is_master()
+        IS_MASTER=(role == 10)
     )
 
 # ---------- health check ----------
@@ -1360,7 +1485,7 @@ def admin_login():
 
     # sanitizar
     f_sale_types = [x for x in f_sale_types if x in CONCERT_SALE_TYPES_ALL_SET]
-    f_statuses = [x for x in f_statuses if x in ("BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO")]
+    f_statuses = [x for x in f_statuses if x in CONCERT_STATUSES_SET]
 
     if request.method == "POST":
         email = (request.form.get("email") or "").strip().lower()
@@ -1458,6 +1583,27 @@ def direccion_toggle_maintenance():
 
 # ------ Home Page --------
 
+def _conditional_html(html: str):
+    """Respuesta HTML con ETag del cuerpo y revalidación obligatoria (`private, no-cache`).
+
+    Si el navegador ya tiene esa misma página (`If-None-Match`), se contesta 304 sin cuerpo: se
+    ahorra la transferencia y que el navegador vuelva a procesar la página. La página se sigue
+    generando siempre, porque depende del usuario, sus permisos y los avisos pendientes.
+
+    ⚠️ El token CSRF del layout se firma con la hora (cambia cada segundo): se quita del cuerpo antes
+    de calcular el ETag y en su lugar entra el token CRUDO de la sesión, que es lo que lo valida
+    (WTF_CSRF_TIME_LIMIT=None). Así la copia del navegador solo se reutiliza si su token sigue valiendo.
+    """
+    resp = Response(html, mimetype="text/html")
+    resp.headers["Cache-Control"] = "private, no-cache"
+    h = hashlib.sha1()
+    token = g.get("csrf_token") if has_request_context() else None
+    h.update((html.replace(token, "") if token else html).encode("utf-8"))
+    h.update(str(session.get("csrf_token") or "").encode("utf-8"))
+    resp.set_etag(h.hexdigest())
+    return resp.make_conditional(request)
+
+
 @app.get("/home", endpoint="home")
 def home():
     # Refresco diario automático de Chartmetric (sin configurar nada; no bloquea ni rompe la home).
@@ -1478,7 +1624,8 @@ def home():
         wizard_available = bool(wizard_ctx)
         wizard_ctx.pop("artists", None)   # la home ya pasa `artists` (misma lista); evita colisión de kwarg
         # Se renderiza DENTRO de la sesión abierta para que los objetos ORM del wizard sigan válidos.
-        return render_template("home.html", artists=artists, wizard_available=wizard_available, **wizard_ctx)
+        return _conditional_html(render_template("home.html", artists=artists,
+                                                 wizard_available=wizard_available, **wizard_ctx))
     finally:
         s.close()
 
@@ -1560,66 +1707,53 @@ def _active_artist_ids(session_db) -> set:
 @app.route("/artistas", methods=["GET", "POST"])
 @admin_required
 def artists_view():
-    session_db = db()
-
-    # filtros (solo para vista)
-    f_artist_ids = request.args.getlist("artist") or []
-    f_sale_types = request.args.getlist("type") or []
-    f_statuses = request.args.getlist("status") or []
-
-    f_artist_ids = [to_uuid(x) for x in f_artist_ids if (x or "").strip()]
-    f_sale_types = [(x or "").strip().upper() for x in f_sale_types if (x or "").strip()]
-    f_statuses = [(x or "").strip().upper() for x in f_statuses if (x or "").strip()]
-
-    # sanitizar
-    f_sale_types = [x for x in f_sale_types if x in CONCERT_SALE_TYPES_ALL_SET]
-    f_statuses = [x for x in f_statuses if x in ("BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO")]
-
     if request.method == "POST":
         name = request.form.get("name", "").strip()
         photo = request.files.get("photo")
-        try:
-            photo_url = upload_png(photo, "artists") if photo else None
-            artist = Artist(
-                name=name, photo_url=photo_url,  # id lo genera la BD
-                is_group=_truthy(request.form.get("is_group")),
-                birth_date=parse_optional_date(request.form.get("birth_date")),
-            )
-            session_db.add(artist)
-            session_db.commit()
-            flash("Artista creado.", "success")
-        except Exception as e:
-            session_db.rollback()
-            flash(f"Error creando artista: {e}", "danger")
-        finally:
-            session_db.close()
+        with get_db() as session_db:
+            try:
+                photo_url = upload_png(photo, "artists") if photo else None
+                artist = Artist(
+                    name=name, photo_url=photo_url,  # id lo genera la BD
+                    is_group=_truthy(request.form.get("is_group")),
+                    birth_date=parse_optional_date(request.form.get("birth_date")),
+                )
+                session_db.add(artist)
+                session_db.commit()
+                flash("Artista creado.", "success")
+            except Exception as e:
+                session_db.rollback()
+                flash(f"Error creando artista: {e}", "danger")
         return redirect(url_for("artists_view"))
     show_inactive = _truthy(request.args.get("show_inactive"))
-    # Los artistas ESPEJO de un evento no son artistas: no salen en esta base de datos.
-    all_artists = (session_db.query(Artist).filter(Artist.event_id.is_(None))
-                   .order_by(Artist.name.asc()).all())
-    active_ids = _active_artist_ids(session_db)
+    with get_db() as session_db:
+        # Los artistas ESPEJO de un evento no son artistas: no salen en esta base de datos.
+        # Solo las columnas que pinta la tarjeta: filas ligeras, sin hidratar entidades ORM.
+        all_artists = (session_db.query(Artist.id, Artist.name, Artist.photo_url, Artist.is_international)
+                       .filter(Artist.event_id.is_(None))
+                       .order_by(Artist.name.asc()).all())
+        active_ids = _active_artist_ids(session_db)
     active_count = sum(1 for a in all_artists if str(a.id) in active_ids)
     inactive_count = len(all_artists) - active_count
     artists = all_artists if show_inactive else [a for a in all_artists if str(a.id) in active_ids]
-    session_db.close()
-    return render_template(
+    return _conditional_html(render_template(
         "artists.html",
         artists=artists,
         show_inactive=show_inactive,
         active_ids=active_ids,
         active_count=active_count,
         inactive_count=inactive_count,
-    )
+    ))
 
 
-@app.get("/artistas/<artist_id>", endpoint="artist_detail_view")
+@app.get("/artistas/<uuid:artist_id>", endpoint="artist_detail_view")
 @admin_required
 def artist_detail_view(artist_id):
     """Ficha de artista (tabs: datos/contratos/conciertos/discográfica...)."""
     session_db = db()
     try:
-        artist = session_db.get(Artist, to_uuid(artist_id))
+        # `artist_id` llega ya como UUID (conversor `uuid:` de la ruta): un id mal formado es un 404.
+        artist = session_db.get(Artist, artist_id)
         if not artist:
             flash("Artista no encontrado.", "warning")
             return redirect(url_for("artists_view"))
@@ -1654,103 +1788,113 @@ def artist_detail_view(artist_id):
         if disc_tab not in {"canciones", "albumes"}:
             disc_tab = "canciones"
 
+        # Cada pestaña solo consulta lo que pinta: el resto se pasa vacío a la plantilla.
         # Datos: personas asociadas
-        people = (
-            session_db.query(ArtistPerson)
-            .filter(ArtistPerson.artist_id == artist.id)
-            .order_by(ArtistPerson.created_at.asc())
-            .all()
-        )
-        artist_email_addresses = (
-            session_db.query(ArtistEmail)
-            .filter(ArtistEmail.artist_id == artist.id)
-            .order_by(ArtistEmail.created_at.asc(), ArtistEmail.concept.asc())
-            .all()
-        )
+        people = []
+        artist_email_addresses = []
+        if tab == "datos":
+            people = (
+                session_db.query(ArtistPerson)
+                .filter(ArtistPerson.artist_id == artist.id)
+                .order_by(ArtistPerson.created_at.asc())
+                .all()
+            )
+            artist_email_addresses = (
+                session_db.query(ArtistEmail)
+                .filter(ArtistEmail.artist_id == artist.id)
+                .order_by(ArtistEmail.created_at.asc(), ArtistEmail.concept.asc())
+                .all()
+            )
 
         # Contratos (nivel artista)
-        contracts = (
-            session_db.query(ArtistContract)
-            .options(selectinload(ArtistContract.commitments))
-            .filter(ArtistContract.artist_id == artist.id)
-            .order_by(ArtistContract.created_at.desc())
-            .all()
-        )
+        contracts = []
+        contract_commitments_payload = []
+        if tab == "contratos":
+            # Compromisos en la MISMA consulta (JOIN): son pocas filas por contrato y así la pestaña
+            # sale en un solo viaje a la BD. Siguen siendo entidades: la pestaña los edita en línea.
+            contracts = (
+                session_db.query(ArtistContract)
+                .options(joinedload(ArtistContract.commitments))
+                .filter(ArtistContract.artist_id == artist.id)
+                .order_by(ArtistContract.created_at.desc())
+                .all()
+            )
+            for contract in contracts:
+                for commitment in getattr(contract, "commitments", []) or []:
+                    contract_commitments_payload.append({
+                        "id": str(commitment.id),
+                        "concept": getattr(commitment, "concept", "") or "",
+                        "pct_artist": str(getattr(commitment, "pct_artist", 0) or 0),
+                        "pct_office": str(getattr(commitment, "pct_office", 0) or 0),
+                        "base": getattr(commitment, "base", None) or "GROSS",
+                        "profit_scope": getattr(commitment, "profit_scope", None) or "CONCEPT_ONLY",
+                        "material_scope": getattr(commitment, "material_scope", None) or "ALL_MATERIALS",
+                    })
 
         # Discográfica: repertorio (canciones y álbumes asociados)
-        songs = (
-            session_db.query(Song)
-            .join(SongArtist, SongArtist.song_id == Song.id)
-            .options(selectinload(Song.artists))
-            .filter(SongArtist.artist_id == artist.id)
-            .order_by(Song.release_date.desc(), Song.title.asc())
-            .all()
-        )
-        _annotate_song_display_fields(session_db, songs, persist=True)
-        albums = (
-            session_db.query(Album)
-            .filter(Album.artist_id == artist.id)
-            .order_by(Album.release_date.desc(), Album.title.asc())
-            .all()
-        )
-
-        contract_commitments_payload = []
-        for contract in contracts:
-            for commitment in getattr(contract, "commitments", []) or []:
-                contract_commitments_payload.append({
-                    "id": str(commitment.id),
-                    "concept": getattr(commitment, "concept", "") or "",
-                    "pct_artist": str(getattr(commitment, "pct_artist", 0) or 0),
-                    "pct_office": str(getattr(commitment, "pct_office", 0) or 0),
-                    "base": getattr(commitment, "base", None) or "GROSS",
-                    "profit_scope": getattr(commitment, "profit_scope", None) or "CONCEPT_ONLY",
-                    "material_scope": getattr(commitment, "material_scope", None) or "ALL_MATERIALS",
-                })
+        songs = []
+        albums = []
+        if tab == "discografica":
+            songs = (
+                session_db.query(Song)
+                .join(SongArtist, SongArtist.song_id == Song.id)
+                .options(selectinload(Song.artists))
+                .filter(SongArtist.artist_id == artist.id)
+                .order_by(Song.release_date.desc(), Song.title.asc())
+                .all()
+            )
+            _annotate_song_display_fields(session_db, songs, persist=True)
+            albums = (
+                session_db.query(Album)
+                .filter(Album.artist_id == artist.id)
+                .order_by(Album.release_date.desc(), Album.title.asc())
+                .all()
+            )
 
         # Conciertos del artista (solo lectura) + filtros
-        f_statuses_raw = request.args.getlist("status") or []
         f_when_raw = request.args.getlist("when") or []
 
-        f_statuses = [(x or "").strip().upper() for x in f_statuses_raw if (x or "").strip()]
-        allowed_statuses = {"BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO"}
-        f_statuses = [x for x in f_statuses if x in allowed_statuses]
+        # Una pasada: normalizar e intersecar con los valores válidos (lo que no esté, fuera).
+        f_statuses = {(x or "").strip().upper() for x in request.args.getlist("status")} & CONCERT_STATUSES_SET
 
         f_when = {(x or "").strip().upper() for x in f_when_raw if (x or "").strip()}
-        allowed_when = {"PAST", "FUTURE"}
-        f_when = {x for x in f_when if x in allowed_when}
+        f_when = {x for x in f_when if x in CONCERT_WHEN_SET}
         # Por defecto, mostrar FUTUROS (igual que la pantalla de conciertos)
         if not f_when:
             f_when = {"FUTURE"}
 
-        q = (
-            session_db.query(Concert)
-            .options(joinedload(Concert.venue))
-            .filter(Concert.artist_id == artist.id)
-        )
-
-        if f_statuses:
-            q = q.filter(Concert.status.in_(f_statuses))
-
-        today = today_local()
-        want_past = "PAST" in f_when
-        want_future = "FUTURE" in f_when
-        if want_past and not want_future:
-            q = q.filter(Concert.date < today)
-        elif want_future and not want_past:
-            q = q.filter(Concert.date >= today)
-
-        concerts = q.order_by(Concert.date.asc()).all()
-        # Fuera de Contratación/dirección, las actividades en borrador/habladas NO aparecen en las
-        # listas ricas de la ficha (sí en su pestaña Agenda, como «Reserva — consultar con
-        # Contratación»); vuelven a verse al pasar a RESERVADO/CONFIRMADO.
-        if not _user_sees_unconfirmed_activities():
-            concerts = [c for c in concerts if (c.status or "").upper() not in _CONCERT_PRIVATE_STATUSES]
-
+        concerts = []
         concerts_sections = {k: [] for k in CONCERTS_SECTION_ORDER}
-        for c in concerts:
-            concerts_sections.setdefault(c.sale_type or "EMPRESA", []).append(c)
-        for k in concerts_sections:
-            concerts_sections[k].sort(key=lambda x: (x.date or date.max))
+        if tab == "conciertos":
+            q = (
+                session_db.query(Concert)
+                .options(joinedload(Concert.venue))
+                .filter(Concert.artist_id == artist.id)
+            )
+
+            if f_statuses:
+                q = q.filter(Concert.status.in_(f_statuses))
+
+            today = today_local()
+            want_past = "PAST" in f_when
+            want_future = "FUTURE" in f_when
+            if want_past and not want_future:
+                q = q.filter(Concert.date < today)
+            elif want_future and not want_past:
+                q = q.filter(Concert.date >= today)
+
+            # Ordenados por sección y fecha: así el reparto por sección es un único groupby lineal.
+            section_key = func.coalesce(Concert.sale_type, "EMPRESA")
+            concerts = q.order_by(section_key.asc(), Concert.date.asc()).all()
+            # Fuera de Contratación/dirección, las actividades en borrador/habladas NO aparecen en las
+            # listas ricas de la ficha (sí en su pestaña Agenda, como «Reserva — consultar con
+            # Contratación»); vuelven a verse al pasar a RESERVADO/CONFIRMADO.
+            if not _user_sees_unconfirmed_activities():
+                concerts = [c for c in concerts if (c.status or "").upper() not in _CONCERT_PRIVATE_STATUSES]
+
+            # Cada sección llega contigua y ya ordenada por fecha (NULL al final en PostgreSQL).
+            for sale_type, grp in groupby(concerts, key=lambda c: c.sale_type or "EMPRESA"):
+                concerts_sections.setdefault(sale_type, []).extend(grp)
 
         promotion_requests_display = []
         promotion_entries_display = []
@@ -1885,37 +2029,34 @@ def artist_detail_view(artist_id):
     finally:
         session_db.close()
 
-@app.post("/artistas/<artist_id>/update")
+@app.post("/artistas/<uuid:artist_id>/update")
 @admin_required
 def artist_update(artist_id):
-    session_db = db()
-    a = session_db.get(Artist, to_uuid(artist_id))
-    if not a:
-        flash("Artista no encontrado.", "warning")
-        session_db.close()
-        return redirect(safe_next_or(url_for("artists_view")))
-    a.name = request.form.get("name", a.name).strip()
-    email = (request.form.get("email") or "").strip() or None
-    a.email = email
-    if "is_international" in request.form:
-        a.is_international = _truthy(request.form.get("is_international"))
-    if "is_group" in request.form:
-        a.is_group = _truthy(request.form.get("is_group"))
-    if "birth_date" in request.form:
-        a.birth_date = parse_optional_date(request.form.get("birth_date"))
-    photo = request.files.get("photo")
-    try:
-        if photo and photo.filename:
-            a.photo_url = upload_png(photo, "artists")
-        # Propaga el nuevo email a sus invitaciones aún no enviadas (envío al último dato).
-        _invitation_sync_contact_for_entity(session_db, artist_id=a.id, email=a.email)
-        session_db.commit()
-        flash("Artista actualizado.", "success")
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error actualizando: {e}", "danger")
-    finally:
-        session_db.close()
+    with get_db() as session_db:
+        a = session_db.get(Artist, artist_id)
+        if not a:
+            flash("Artista no encontrado.", "warning")
+            return redirect(safe_next_or(url_for("artists_view")))
+        try:
+            a.name = request.form.get("name", a.name).strip()
+            email = (request.form.get("email") or "").strip() or None
+            a.email = email
+            if "is_international" in request.form:
+                a.is_international = _truthy(request.form.get("is_international"))
+            if "is_group" in request.form:
+                a.is_group = _truthy(request.form.get("is_group"))
+            if "birth_date" in request.form:
+                a.birth_date = parse_optional_date(request.form.get("birth_date"))
+            photo = request.files.get("photo")
+            if photo and photo.filename:
+                a.photo_url = upload_png(photo, "artists")
+            # Propaga el nuevo email a sus invitaciones aún no enviadas (envío al último dato).
+            _invitation_sync_contact_for_entity(session_db, artist_id=a.id, email=a.email)
+            session_db.commit()
+            flash("Artista actualizado.", "success")
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error actualizando: {e}", "danger")
     return redirect(safe_next_or(url_for("artists_view")))
 
 @app.post("/artistas/<artist_id>/emails/create", endpoint="artist_email_create")
@@ -2076,21 +2217,19 @@ def artist_notification_contact_delete(artist_id, contact_id):
                                  or url_for("artist_detail_view", artist_id=artist_id, tab="datos")))
 
 
-@app.post("/artistas/<artist_id>/delete")
+@app.post("/artistas/<uuid:artist_id>/delete")
 @admin_required
 def artist_delete(artist_id):
-    session_db = db()
-    try:
-        a = session_db.get(Artist, to_uuid(artist_id))
-        if a:
-            session_db.delete(a)
-            session_db.commit()
-            flash("Artista eliminado.", "success")
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error eliminando: {e}", "danger")
-    finally:
-        session_db.close()
+    with get_db() as session_db:
+        try:
+            a = session_db.get(Artist, artist_id)
+            if a:
+                session_db.delete(a)
+                session_db.commit()
+                flash("Artista eliminado.", "success")
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error eliminando: {e}", "danger")
     return redirect(safe_next_or(url_for("artists_view")))
 
 
@@ -2099,105 +2238,99 @@ def artist_delete(artist_id):
 @app.post("/artistas/<artist_id>/person/add", endpoint="artist_person_add")
 @admin_required
 def artist_person_add(artist_id):
-    session_db = db()
-    try:
-        a = session_db.get(Artist, to_uuid(artist_id))
-        if not a:
-            flash("Artista no encontrado.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
-
-        volver = safe_next_or(url_for("artist_detail_view", artist_id=a.id, tab="datos"))
-        # Se añade buscando en TERCEROS: si se eligió uno, el nombre sale de su ficha (quien busca no
-        # tiene por qué volver a teclearlo). Si no había coincidencias, se crea con lo escrito.
-        vinculado = session_db.get(Promoter, to_uuid(request.form.get("link_promoter_id") or "") or uuid.uuid4())
-        first_name = (request.form.get("first_name") or "").strip()
-        last_name = (request.form.get("last_name") or "").strip()
-        if vinculado is not None and not first_name:
-            first_name = (vinculado.first_name or "").strip()
-            last_name = (vinculado.last_name or "").strip()
+    with get_db() as session_db:
+        try:
+            a = session_db.get(Artist, to_uuid(artist_id))
+            if not a:
+                flash("Artista no encontrado.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
+
+            volver = safe_next_or(url_for("artist_detail_view", artist_id=a.id, tab="datos"))
+            # Se añade buscando en TERCEROS: si se eligió uno, el nombre sale de su ficha (quien busca no
+            # tiene por qué volver a teclearlo). Si no había coincidencias, se crea con lo escrito.
+            vinculado = session_db.get(Promoter, to_uuid(request.form.get("link_promoter_id") or "") or uuid.uuid4())
+            first_name = (request.form.get("first_name") or "").strip()
+            last_name = (request.form.get("last_name") or "").strip()
+            if vinculado is not None and not first_name:
+                first_name = (vinculado.first_name or "").strip()
+                last_name = (vinculado.last_name or "").strip()
+                if not first_name:
+                    partes = (vinculado.nick or "").strip().split()
+                    first_name = partes[0] if partes else ""
+                    last_name = " ".join(partes[1:])
             if not first_name:
-                partes = (vinculado.nick or "").strip().split()
-                first_name = partes[0] if partes else ""
-                last_name = " ".join(partes[1:])
-        if not first_name:
-            flash("Escribe un nombre o elige un tercero de la lista.", "warning")
-            return redirect(volver)
-        if vinculado is not None and (session_db.query(ArtistPerson.id)
-                                      .filter(ArtistPerson.artist_id == a.id,
-                                              ArtistPerson.promoter_id == vinculado.id).first()):
-            flash(f"{vinculado.nick or first_name} ya está en las personas de {a.name}.", "info")
-            return redirect(volver)
+                flash("Escribe un nombre o elige un tercero de la lista.", "warning")
+                return redirect(volver)
+            if vinculado is not None and (session_db.query(ArtistPerson.id)
+                                          .filter(ArtistPerson.artist_id == a.id,
+                                                  ArtistPerson.promoter_id == vinculado.id).first()):
+                flash(f"{vinculado.nick or first_name} ya está en las personas de {a.name}.", "info")
+                return redirect(volver)
 
-        p = ArtistPerson(artist_id=a.id, first_name=first_name, last_name=last_name or "",
-                         birth_date=parse_optional_date(request.form.get("birth_date")))
-        session_db.add(p)
-        session_db.flush()
-        # La persona del artista ES un tercero: se vincula al que ya existe (si lo eligieron) o se le
-        # crea su ficha, para que pueda tener DNI, pasaporte, viaje, cuenta bancaria…
-        _ensure_promoter_for_artist_person(session_db, p, (str(vinculado.id) if vinculado is not None else None))
-        session_db.commit()
-        flash("Persona añadida.", "success")
-        return redirect(volver)
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error añadiendo persona: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            p = ArtistPerson(artist_id=a.id, first_name=first_name, last_name=last_name or "",
+                             birth_date=parse_optional_date(request.form.get("birth_date")))
+            session_db.add(p)
+            session_db.flush()
+            # La persona del artista ES un tercero: se vincula al que ya existe (si lo eligieron) o se le
+            # crea su ficha, para que pueda tener DNI, pasaporte, viaje, cuenta bancaria…
+            _ensure_promoter_for_artist_person(session_db, p, (str(vinculado.id) if vinculado is not None else None))
+            session_db.commit()
+            flash("Persona añadida.", "success")
+            return redirect(volver)
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error añadiendo persona: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 
 @app.post("/artistas/person/<person_id>/update", endpoint="artist_person_update")
 @admin_required
 def artist_person_update(person_id):
-    session_db = db()
-    try:
-        p = session_db.get(ArtistPerson, to_uuid(person_id))
-        if not p:
-            flash("Persona no encontrada.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
+    with get_db() as session_db:
+        try:
+            p = session_db.get(ArtistPerson, to_uuid(person_id))
+            if not p:
+                flash("Persona no encontrada.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
 
-        first_name = (request.form.get("first_name") or "").strip()
-        last_name = (request.form.get("last_name") or "").strip()
-        if not first_name:
-            flash("El nombre es obligatorio.", "warning")
-            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=p.artist_id, tab="datos")))
+            first_name = (request.form.get("first_name") or "").strip()
+            last_name = (request.form.get("last_name") or "").strip()
+            if not first_name:
+                flash("El nombre es obligatorio.", "warning")
+                return redirect(safe_next_or(url_for("artist_detail_view", artist_id=p.artist_id, tab="datos")))
 
-        p.first_name = first_name
-        p.last_name = last_name or ""
-        if "birth_date" in request.form:
-            p.birth_date = parse_optional_date(request.form.get("birth_date"))
-        session_db.commit()
-        flash("Persona actualizada.", "success")
-        return redirect(safe_next_or(url_for("artist_detail_view", artist_id=p.artist_id, tab="datos")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error actualizando persona: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            p.first_name = first_name
+            p.last_name = last_name or ""
+            if "birth_date" in request.form:
+                p.birth_date = parse_optional_date(request.form.get("birth_date"))
+            session_db.commit()
+            flash("Persona actualizada.", "success")
+            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=p.artist_id, tab="datos")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error actualizando persona: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 
 @app.post("/artistas/person/<person_id>/delete", endpoint="artist_person_delete")
 @admin_required
 def artist_person_delete(person_id):
-    session_db = db()
-    try:
-        p = session_db.get(ArtistPerson, to_uuid(person_id))
-        if not p:
-            flash("Persona no encontrada.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
+    with get_db() as session_db:
+        try:
+            p = session_db.get(ArtistPerson, to_uuid(person_id))
+            if not p:
+                flash("Persona no encontrada.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
 
-        artist_id = p.artist_id
-        session_db.delete(p)
-        session_db.commit()
-        flash("Persona eliminada.", "success")
-        return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="datos")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error eliminando persona: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            artist_id = p.artist_id
+            session_db.delete(p)
+            session_db.commit()
+            flash("Persona eliminada.", "success")
+            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="datos")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error eliminando persona: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 
 # ---------- ARTISTAS: LA PERSONA DEL ARTISTA ES UN TERCERO ----------
@@ -2433,18 +2566,29 @@ def _norm_profit_scope(v: str) -> str:
     return v if v in ("CONCEPT_ONLY", "CONCEPT_PLUS_GENERAL") else "CONCEPT_ONLY"
 
 
+_NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+@lru_cache(maxsize=4096)
 def _norm_text_key(v: str) -> str:
-    """Normaliza textos para comparaciones (minúsculas + sin acentos)."""
+    """Normaliza textos para comparaciones (minúsculas + sin acentos).
+
+    Se llama fila a fila sobre los mismos conceptos (compromisos, contratos…): se cachea. Un texto
+    solo ASCII no tiene acentos que quitar y se salta la descomposición NFD.
+    """
     v = (v or "").strip().lower()
     if not v:
         return ""
-    v = unicodedata.normalize("NFD", v)
-    v = "".join(ch for ch in v if unicodedata.category(ch) != "Mn")
-    v = re.sub(r"[^\w]+", " ", v, flags=re.UNICODE)
+    if not v.isascii():
+        v = unicodedata.normalize("NFD", v)
+        v = "".join(ch for ch in v if unicodedata.category(ch) != "Mn")
+    v = _NON_WORD_RE.sub(" ", v)
     v = " ".join(v.split())
     return v
 
 
+# ⚠️ ESPEJADO en `models._SEARCH_FOLD_SQL` (índices trigram de los buscadores): si se toca aquí,
+# se toca allí, o Postgres deja de usar esos índices.
 _AI_SEARCH_FROM = "áàäâãåéèëêíìïîóòöôõúùüûñç"
 _AI_SEARCH_TO = "aaaaaaeeeeiiiiooooouuuunc"
 
@@ -3868,11 +4012,29 @@ def _pick_artist_commitment_from_rows(rows, concept_variants: list[str], materia
         _m, _c, effective_date, contract_created, commitment_created = item
         return (effective_date or date.min, contract_created or datetime.min, commitment_created or datetime.min)
 
-    candidates.sort(key=key, reverse=True)
-    chosen, contract, *_ = candidates[0]
+    # `max` devuelve el primero de los empatados, igual que el antiguo sort(reverse=True)[0].
+    chosen, contract, *_ = max(candidates, key=key)
     return chosen, contract
 
 
+def _artist_commitment_rows_map(session_db, artist_ids) -> dict:
+    """{artist_id: [(compromiso, contrato), ...]} de varios artistas en una consulta.
+
+    Para bucles que resuelven compromisos canción a canción: cada elección se hace luego en memoria
+    con `_pick_artist_commitment_from_rows`, que aplica las mismas reglas de fecha y alcance.
+    """
+    out = defaultdict(list)
+    for batch in _id_batches(artist_ids):
+        for m, c in (
+            session_db.query(ArtistContractCommitment, ArtistContract)
+            .join(ArtistContract, ArtistContractCommitment.contract_id == ArtistContract.id)
+            .filter(ArtistContract.artist_id.in_(batch))
+            .all()
+        ):
+            out[c.artist_id].append((m, c))
+    return out
+
+
 def _pick_artist_commitment(session_db, artist_id: UUID, concept_variants: list[str], material_date: date | None = None, as_of_date: date | None = None):
     """Devuelve el compromiso de contrato más reciente para un concepto.
 
@@ -3881,6 +4043,8 @@ def _pick_artist_commitment(session_db, artist_id: UUID, concept_variants: list[
     materiales ya existentes o solo a materiales nuevos.
     """
 
+    # En SQL solo se acota por artista: el concepto se compara en Python con `_norm_text_key`, que es
+    # la ÚNICA comparación válida (un plegado en SQL no coincide al 100% y perdería compromisos).
     rows = (
         session_db.query(ArtistContractCommitment, ArtistContract)
         .join(ArtistContract, ArtistContractCommitment.contract_id == ArtistContract.id)
@@ -3894,35 +4058,42 @@ def _pick_artist_commitment(session_db, artist_id: UUID, concept_variants: list[
 # ---------- helpers: artistas con contrato Discográfico/Catálogo/Distribución ----------
 
 _DISCO_SONG_CONTRACT_KEYWORDS = ("discograf", "catalog", "distribu")
+# Las claves como UNA alternancia: un solo regex por concepto en vez de un `in` por clave.
+_DISCO_SONG_CONTRACT_RE = re.compile("|".join(re.escape(k) for k in _DISCO_SONG_CONTRACT_KEYWORDS))
 
 
-def _artist_ids_with_discography_contracts(session_db) -> set:
-    """Devuelve set(artist_id) para artistas con compromisos de contrato relevantes.
+def _artist_ids_with_discography_contracts(session_db) -> frozenset:
+    """Devuelve el conjunto de artist_id con compromisos de contrato relevantes.
 
     Se consideran relevantes compromisos cuyo concepto (normalizado, sin acentos)
     contenga alguna de estas claves: discograf, catalog, distribu.
 
     Esto permite filtrar artistas válidos para creación de canciones en Discográfica.
+    Se cachea en `g` durante la petición (inmutable, para que nadie lo altere entre llamadas).
     """
+    cached = getattr(g, "_disco_contract_artist_ids", None) if has_request_context() else None
+    if cached is not None:
+        return cached
 
+    # Pares (artista, concepto) DISTINTOS: los conceptos se repiten mucho entre contratos. El plegado
+    # se hace en Python con `_norm_text_key` (el mismo que al elegir compromiso), no en SQL.
     try:
         rows = (
             session_db.query(ArtistContract.artist_id, ArtistContractCommitment.concept)
             .join(ArtistContractCommitment, ArtistContractCommitment.contract_id == ArtistContract.id)
+            .filter(ArtistContract.artist_id.isnot(None))
+            .distinct()
             .all()
         )
     except Exception:
-        return set()
-
-    aid_set = set()
-    for aid, concept in rows:
-        if not aid:
-            continue
-        ckey = _norm_text_key(concept or "")
-        if any(k in ckey for k in _DISCO_SONG_CONTRACT_KEYWORDS):
-            aid_set.add(aid)
+        return frozenset()
 
-    return aid_set
+    result = frozenset(
+        aid for aid, concept in rows if _DISCO_SONG_CONTRACT_RE.search(_norm_text_key(concept or ""))
+    )
+    if has_request_context():
+        g._disco_contract_artist_ids = result
+    return result
 
 
 
@@ -3955,108 +4126,102 @@ app.jinja_env.globals["contract_concept_icon"] = _contract_concept_icon
 @app.post("/artistas/<artist_id>/contracts/create", endpoint="artist_contract_create")
 @admin_required
 def artist_contract_create(artist_id):
-    session_db = db()
-    try:
-        a = session_db.get(Artist, to_uuid(artist_id))
-        if not a:
-            flash("Artista no encontrado.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
+    with get_db() as session_db:
+        try:
+            a = session_db.get(Artist, to_uuid(artist_id))
+            if not a:
+                flash("Artista no encontrado.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
 
-        name = (request.form.get("name") or "").strip()
-        signed_raw = (request.form.get("signed_date") or "").strip()
-        signed_date = None
-        if signed_raw:
-            try:
-                signed_date = parse_date(signed_raw)
-            except Exception:
-                signed_date = None
+            name = (request.form.get("name") or "").strip()
+            signed_raw = (request.form.get("signed_date") or "").strip()
+            signed_date = None
+            if signed_raw:
+                try:
+                    signed_date = parse_date(signed_raw)
+                except Exception:
+                    signed_date = None
 
-        if not name:
-            flash("El nombre del contrato es obligatorio.", "warning")
-            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=a.id, tab="contratos")))
+            if not name:
+                flash("El nombre del contrato es obligatorio.", "warning")
+                return redirect(safe_next_or(url_for("artist_detail_view", artist_id=a.id, tab="contratos")))
 
-        c = ArtistContract(artist_id=a.id, name=name, signed_date=signed_date)
-        _f = request.files.get("contract")
-        if _f and getattr(_f, "filename", ""):
-            try:
-                c.contract_url = upload_pdf(_f, "artist_contracts")
-            except Exception as _e:
-                flash(f"El contrato no se pudo adjuntar (debe ser PDF): {_e}", "warning")
-        session_db.add(c)
-        session_db.commit()
-        flash("Contrato creado.", "success")
-        return redirect(safe_next_or(url_for("artist_detail_view", artist_id=a.id, tab="contratos")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error creando contrato: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            c = ArtistContract(artist_id=a.id, name=name, signed_date=signed_date)
+            _f = request.files.get("contract")
+            if _f and getattr(_f, "filename", ""):
+                try:
+                    c.contract_url = upload_pdf(_f, "artist_contracts")
+                except Exception as _e:
+                    flash(f"El contrato no se pudo adjuntar (debe ser PDF): {_e}", "warning")
+            session_db.add(c)
+            session_db.commit()
+            flash("Contrato creado.", "success")
+            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=a.id, tab="contratos")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error creando contrato: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 
 @app.post("/artistas/contracts/<contract_id>/update", endpoint="artist_contract_update")
 @admin_required
 def artist_contract_update(contract_id):
-    session_db = db()
-    try:
-        c = session_db.get(ArtistContract, to_uuid(contract_id))
-        if not c:
-            flash("Contrato no encontrado.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
+    with get_db() as session_db:
+        try:
+            c = session_db.get(ArtistContract, to_uuid(contract_id))
+            if not c:
+                flash("Contrato no encontrado.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
 
-        name = (request.form.get("name") or "").strip()
-        signed_raw = (request.form.get("signed_date") or "").strip()
-        signed_date = None
-        if signed_raw:
-            try:
-                signed_date = parse_date(signed_raw)
-            except Exception:
-                signed_date = None
+            name = (request.form.get("name") or "").strip()
+            signed_raw = (request.form.get("signed_date") or "").strip()
+            signed_date = None
+            if signed_raw:
+                try:
+                    signed_date = parse_date(signed_raw)
+                except Exception:
+                    signed_date = None
 
-        if not name:
-            flash("El nombre del contrato es obligatorio.", "warning")
-            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
+            if not name:
+                flash("El nombre del contrato es obligatorio.", "warning")
+                return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
 
-        c.name = name
-        c.signed_date = signed_date
-        _f = request.files.get("contract")
-        if _f and getattr(_f, "filename", ""):
-            try:
-                c.contract_url = upload_pdf(_f, "artist_contracts")
-            except Exception as _e:
-                flash(f"El contrato no se pudo adjuntar (debe ser PDF): {_e}", "warning")
-        session_db.commit()
-        flash("Contrato actualizado.", "success")
-        return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error actualizando contrato: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            c.name = name
+            c.signed_date = signed_date
+            _f = request.files.get("contract")
+            if _f and getattr(_f, "filename", ""):
+                try:
+                    c.contract_url = upload_pdf(_f, "artist_contracts")
+                except Exception as _e:
+                    flash(f"El contrato no se pudo adjuntar (debe ser PDF): {_e}", "warning")
+            session_db.commit()
+            flash("Contrato actualizado.", "success")
+            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error actualizando contrato: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 
 @app.post("/artistas/contracts/<contract_id>/delete", endpoint="artist_contract_delete")
 @admin_required
 def artist_contract_delete(contract_id):
-    session_db = db()
-    try:
-        c = session_db.get(ArtistContract, to_uuid(contract_id))
-        if not c:
-            flash("Contrato no encontrado.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
+    with get_db() as session_db:
+        try:
+            c = session_db.get(ArtistContract, to_uuid(contract_id))
+            if not c:
+                flash("Contrato no encontrado.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
 
-        aid = c.artist_id
-        session_db.delete(c)
-        session_db.commit()
-        flash("Contrato eliminado.", "success")
-        return redirect(safe_next_or(url_for("artist_detail_view", artist_id=aid, tab="contratos")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error eliminando contrato: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            aid = c.artist_id
+            session_db.delete(c)
+            session_db.commit()
+            flash("Contrato eliminado.", "success")
+            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=aid, tab="contratos")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error eliminando contrato: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 
 # ---------- ARTISTAS: COMPROMISOS (líneas de contrato) ----------
@@ -4064,190 +4229,283 @@ def artist_contract_delete(contract_id):
 @app.post("/artistas/contracts/<contract_id>/commitments/add", endpoint="artist_commitment_add")
 @admin_required
 def artist_commitment_add(contract_id):
-    session_db = db()
+    with get_db() as session_db:
+        try:
+            c = session_db.get(ArtistContract, to_uuid(contract_id))
+            if not c:
+                flash("Contrato no encontrado.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
+
+            concept = (request.form.get("concept") or "").strip()
+            if not concept:
+                flash("El concepto es obligatorio.", "warning")
+                return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
+
+            base = _norm_contract_base(request.form.get("base"))
+            profit_scope = _norm_profit_scope(request.form.get("profit_scope")) if base == "PROFIT" else None
+            material_scope = _norm_material_scope(request.form.get("material_scope"))
+
+            m = ArtistContractCommitment(
+                contract_id=c.id,
+                concept=concept,
+                pct_artist=_parse_pct(request.form.get("pct_artist")),
+                pct_office=_parse_pct(request.form.get("pct_office")),
+                base=base,
+                profit_scope=profit_scope,
+                material_scope=material_scope,
+            )
+            session_db.add(m)
+            session_db.commit()
+            flash("Compromiso añadido.", "success")
+            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error añadiendo compromiso: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
+
+
+# Filas por INSERT/commit en las altas masivas de compromisos (una ida y vuelta por lote, no por fila).
+COMMITMENT_BULK_BATCH = 2000
+
+
+def _commitment_bulk_rows_from_request() -> list[dict]:
+    """Filas de compromiso de una alta masiva: JSON (`{"rows": [...]}` o lista) o CSV subido en `file`.
+
+    Columnas: concept, pct_artist, pct_office, base, profit_scope, material_scope (las mismas que el
+    formulario de una sola línea). Se devuelven tal cual; la normalización la hace quien las inserta.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        rows = payload.get("rows") if isinstance(payload, dict) else payload
+        return [r for r in (rows or []) if isinstance(r, dict)]
+    f = request.files.get("file")
+    if not f:
+        return []
+    text_data = f.read().decode("utf-8-sig", errors="replace")
     try:
-        c = session_db.get(ArtistContract, to_uuid(contract_id))
+        dialect = csv.Sniffer().sniff(text_data[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    return [
+        {(k or "").strip().lower(): v for k, v in row.items()}
+        for row in csv.DictReader(io.StringIO(text_data), dialect=dialect)
+    ]
+
+
+@app.post("/artistas/contracts/<contract_id>/commitments/bulk_add", endpoint="artist_commitment_bulk_add")
+@admin_required
+def artist_commitment_bulk_add(contract_id):
+    """Alta masiva de compromisos en un contrato (JSON o CSV), en INSERT por lotes.
+
+    Cada lote de `COMMITMENT_BULK_BATCH` filas va en un único `INSERT` multi-fila y su propio commit.
+    Las filas sin concepto se descartan. Responde JSON si la petición es JSON; si no, flash + ficha.
+    """
+    wants_json = request.is_json
+    with get_db() as session_db:
+        try:
+            cid = to_uuid(contract_id)
+        except ValueError:
+            cid = None
+        c = session_db.get(ArtistContract, cid) if cid else None
         if not c:
+            if wants_json:
+                return jsonify({"ok": False, "error": "Contrato no encontrado."}), 404
             flash("Contrato no encontrado.", "warning")
             return redirect(safe_next_or(url_for("artists_view")))
+        back = safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos"))
 
-        concept = (request.form.get("concept") or "").strip()
-        if not concept:
-            flash("El concepto es obligatorio.", "warning")
-            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
+        values = []
+        skipped = 0
+        try:
+            raw_rows = _commitment_bulk_rows_from_request()
+        except Exception as e:
+            if wants_json:
+                return jsonify({"ok": False, "error": f"No se pudo leer el fichero: {e}"}), 400
+            flash(f"No se pudo leer el fichero: {e}", "danger")
+            return redirect(back)
+        for r in raw_rows:
+            # En JSON los porcentajes pueden llegar como número: todo se pasa a texto como en el form.
+            r = {k: ("" if v is None else str(v)) for k, v in r.items()}
+            concept = r.get("concept", "").strip()
+            if not concept:
+                skipped += 1
+                continue
+            base = _norm_contract_base(r.get("base"))
+            values.append({
+                "contract_id": c.id,
+                "concept": concept,
+                "pct_artist": _parse_pct(r.get("pct_artist")),
+                "pct_office": _parse_pct(r.get("pct_office")),
+                "base": base,
+                "profit_scope": _norm_profit_scope(r.get("profit_scope")) if base == "PROFIT" else None,
+                "material_scope": _norm_material_scope(r.get("material_scope")),
+            })
 
-        base = _norm_contract_base(request.form.get("base"))
-        profit_scope = _norm_profit_scope(request.form.get("profit_scope")) if base == "PROFIT" else None
-        material_scope = _norm_material_scope(request.form.get("material_scope"))
+        inserted = 0
+        try:
+            for start in range(0, len(values), COMMITMENT_BULK_BATCH):
+                batch = values[start:start + COMMITMENT_BULK_BATCH]
+                session_db.execute(insert(ArtistContractCommitment), batch)
+                session_db.commit()
+                inserted += len(batch)
+        except Exception as e:
+            session_db.rollback()
+            msg = f"Error añadiendo compromisos (añadidos {inserted} de {len(values)}): {e}"
+            if wants_json:
+                return jsonify({"ok": False, "error": msg, "inserted": inserted}), 400
+            flash(msg, "danger")
+            return redirect(back)
+
+    if wants_json:
+        return jsonify({"ok": True, "inserted": inserted, "skipped": skipped})
+    if inserted:
+        flash(f"Compromisos añadidos: {inserted}." + (f" Sin concepto (omitidas): {skipped}." if skipped else ""), "success")
+    else:
+        flash("No había compromisos que añadir.", "info")
+    return redirect(back)
 
-        m = ArtistContractCommitment(
-            contract_id=c.id,
-            concept=concept,
-            pct_artist=_parse_pct(request.form.get("pct_artist")),
-            pct_office=_parse_pct(request.form.get("pct_office")),
-            base=base,
-            profit_scope=profit_scope,
-            material_scope=material_scope,
-        )
-        session_db.add(m)
-        session_db.commit()
-        flash("Compromiso añadido.", "success")
-        return redirect(safe_next_or(url_for("artist_detail_view", artist_id=c.artist_id, tab="contratos")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error añadiendo compromiso: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+
+def _commitment_with_artist_id(session_db, commitment_id):
+    """(compromiso, artist_id de su contrato) en UNA consulta; (None, None) si no existe.
+
+    El artist_id solo hace falta para redirigir a la ficha: se trae en la misma fila con el JOIN en
+    vez de un segundo `get` del contrato.
+    """
+    row = (
+        session_db.query(ArtistContractCommitment, ArtistContract.artist_id)
+        .outerjoin(ArtistContract, ArtistContract.id == ArtistContractCommitment.contract_id)
+        .filter(ArtistContractCommitment.id == to_uuid(commitment_id))
+        .first()
+    )
+    return (row[0], row[1]) if row else (None, None)
 
 
 @app.post("/artistas/commitments/<commitment_id>/update", endpoint="artist_commitment_update")
 @admin_required
 def artist_commitment_update(commitment_id):
-    session_db = db()
-    try:
-        m = session_db.get(ArtistContractCommitment, to_uuid(commitment_id))
-        if not m:
-            flash("Compromiso no encontrado.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
+    with get_db() as session_db:
+        try:
+            m, artist_id = _commitment_with_artist_id(session_db, commitment_id)
+            if not m:
+                flash("Compromiso no encontrado.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
 
-        # necesitamos el contrato para redirigir
-        c = session_db.get(ArtistContract, m.contract_id)
-        artist_id = c.artist_id if c else None
+            concept = (request.form.get("concept") or "").strip()
+            if not concept:
+                flash("El concepto es obligatorio.", "warning")
+                return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="contratos")))
 
-        concept = (request.form.get("concept") or "").strip()
-        if not concept:
-            flash("El concepto es obligatorio.", "warning")
-            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="contratos")))
-
-        base = _norm_contract_base(request.form.get("base"))
-        profit_scope = _norm_profit_scope(request.form.get("profit_scope")) if base == "PROFIT" else None
-        material_scope = _norm_material_scope(request.form.get("material_scope") or getattr(m, "material_scope", None))
+            base = _norm_contract_base(request.form.get("base"))
+            profit_scope = _norm_profit_scope(request.form.get("profit_scope")) if base == "PROFIT" else None
+            material_scope = _norm_material_scope(request.form.get("material_scope") or getattr(m, "material_scope", None))
 
-        m.concept = concept
-        m.pct_artist = _parse_pct(request.form.get("pct_artist"))
-        m.pct_office = _parse_pct(request.form.get("pct_office"))
-        m.base = base
-        m.profit_scope = profit_scope
-        m.material_scope = material_scope
+            m.concept = concept
+            m.pct_artist = _parse_pct(request.form.get("pct_artist"))
+            m.pct_office = _parse_pct(request.form.get("pct_office"))
+            m.base = base
+            m.profit_scope = profit_scope
+            m.material_scope = material_scope
 
-        session_db.commit()
-        flash("Compromiso actualizado.", "success")
-        if artist_id:
-            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="contratos")))
-        return redirect(safe_next_or(url_for("artists_view")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error actualizando compromiso: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            session_db.commit()
+            flash("Compromiso actualizado.", "success")
+            if artist_id:
+                return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="contratos")))
+            return redirect(safe_next_or(url_for("artists_view")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error actualizando compromiso: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 
 @app.post("/artistas/commitments/<commitment_id>/delete", endpoint="artist_commitment_delete")
 @admin_required
 def artist_commitment_delete(commitment_id):
-    session_db = db()
-    try:
-        m = session_db.get(ArtistContractCommitment, to_uuid(commitment_id))
-        if not m:
-            flash("Compromiso no encontrado.", "warning")
-            return redirect(safe_next_or(url_for("artists_view")))
-
-        c = session_db.get(ArtistContract, m.contract_id)
-        artist_id = c.artist_id if c else None
+    with get_db() as session_db:
+        try:
+            m, artist_id = _commitment_with_artist_id(session_db, commitment_id)
+            if not m:
+                flash("Compromiso no encontrado.", "warning")
+                return redirect(safe_next_or(url_for("artists_view")))
 
-        session_db.delete(m)
-        session_db.commit()
-        flash("Compromiso eliminado.", "success")
-        if artist_id:
-            return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="contratos")))
-        return redirect(safe_next_or(url_for("artists_view")))
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error eliminando compromiso: {e}", "danger")
-        return redirect(safe_next_or(url_for("artists_view")))
-    finally:
-        session_db.close()
+            session_db.delete(m)
+            session_db.commit()
+            flash("Compromiso eliminado.", "success")
+            if artist_id:
+                return redirect(safe_next_or(url_for("artist_detail_view", artist_id=artist_id, tab="contratos")))
+            return redirect(safe_next_or(url_for("artists_view")))
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error eliminando compromiso: {e}", "danger")
+            return redirect(safe_next_or(url_for("artists_view")))
 
 # ---------- EMISORAS ----------
 @app.route("/emisoras", methods=["GET", "POST"])
 @admin_required
 def stations_view():
-    session_db = db()
-
-    # filtros (solo para vista)
-    f_artist_ids = request.args.getlist("artist") or []
-    f_sale_types = request.args.getlist("type") or []
-    f_statuses = request.args.getlist("status") or []
-
-    f_artist_ids = [to_uuid(x) for x in f_artist_ids if (x or "").strip()]
-    f_sale_types = [(x or "").strip().upper() for x in f_sale_types if (x or "").strip()]
-    f_statuses = [(x or "").strip().upper() for x in f_statuses if (x or "").strip()]
-
-    # sanitizar
-    f_sale_types = [x for x in f_sale_types if x in CONCERT_SALE_TYPES_ALL_SET]
-    f_statuses = [x for x in f_statuses if x in ("BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO")]
-
     if request.method == "POST":
         name = request.form.get("name", "").strip()
         logo = request.files.get("logo")
+        # La subida del logo (red, lenta) va ANTES de abrir la sesión: no retiene conexión del pool.
         try:
             logo_url = upload_png(logo, "stations") if logo else None
-            country_code, country_name = _country_payload_from_form(request.form)
-            st = RadioStation(name=name, logo_url=logo_url, country_code=country_code, country_name=country_name)
-            session_db.add(st)
-            session_db.commit()
-            flash("Emisora creada.", "success")
         except Exception as e:
-            session_db.rollback()
             flash(f"Error creando emisora: {e}", "danger")
-        finally:
-            session_db.close()
+            return redirect(url_for("stations_view"))
+        with get_db() as session_db:
+            try:
+                country_code, country_name = _country_payload_from_form(request.form)
+                st = RadioStation(name=name, logo_url=logo_url, country_code=country_code, country_name=country_name)
+                session_db.add(st)
+                session_db.commit()
+                flash("Emisora creada.", "success")
+            except Exception as e:
+                session_db.rollback()
+                flash(f"Error creando emisora: {e}", "danger")
         return redirect(url_for("stations_view"))
-    stations = session_db.query(RadioStation).order_by(RadioStation.name.asc()).all()
-    session_db.close()
+    with get_db() as session_db:
+        stations = session_db.query(RadioStation).order_by(RadioStation.name.asc()).all()
     return render_template("stations.html", stations=stations, country_options=country_options_es())
 
 @app.post("/emisoras/<station_id>/update")
 @admin_required
 def station_update(station_id):
-    session_db = db()
-    st = session_db.get(RadioStation, to_uuid(station_id))
-    if not st:
-        flash("Emisora no encontrada.", "warning")
-        session_db.close()
-        return redirect(url_for("stations_view"))
-    st.name = request.form.get("name", st.name).strip()
-    st.country_code, st.country_name = _country_payload_from_form(request.form)
+    # Igual que en el alta: primero la subida del logo, luego la transacción (corta).
     logo = request.files.get("logo")
     try:
-        if logo and logo.filename:
-            st.logo_url = upload_png(logo, "stations")
-        session_db.commit()
-        flash("Emisora actualizada.", "success")
+        logo_url = upload_png(logo, "stations") if logo and logo.filename else None
     except Exception as e:
-        session_db.rollback()
         flash(f"Error actualizando: {e}", "danger")
-    finally:
-        session_db.close()
+        return redirect(url_for("stations_view"))
+    with get_db() as session_db:
+        st = session_db.get(RadioStation, to_uuid(station_id))
+        if not st:
+            flash("Emisora no encontrada.", "warning")
+            return redirect(url_for("stations_view"))
+        st.name = request.form.get("name", st.name).strip()
+        st.country_code, st.country_name = _country_payload_from_form(request.form)
+        try:
+            if logo_url:
+                st.logo_url = logo_url
+            session_db.commit()
+            flash("Emisora actualizada.", "success")
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error actualizando: {e}", "danger")
     return redirect(url_for("stations_view"))
 
 @app.post("/emisoras/<station_id>/delete")
 @admin_required
 def station_delete(station_id):
-    session_db = db()
-    try:
-        st = session_db.get(RadioStation, to_uuid(station_id))
-        if st:
-            session_db.delete(st)
-            session_db.commit()
-            flash("Emisora eliminada.", "success")
-    except Exception as e:
-        session_db.rollback()
-        flash(f"Error eliminando: {e}", "danger")
-    finally:
-        session_db.close()
+    with get_db() as session_db:
+        try:
+            st = session_db.get(RadioStation, to_uuid(station_id))
+            if st:
+                session_db.delete(st)
+                session_db.commit()
+                flash("Emisora eliminada.", "success")
+        except Exception as e:
+            session_db.rollback()
+            flash(f"Error eliminando: {e}", "danger")
     return redirect(url_for("stations_view"))
 
 # ---------- DISCOGRÁFICA ----------
@@ -4276,8 +4534,15 @@ def _month_end(d: date) -> date:
     return nxt - timedelta(days=1)
 
 
+# Claves/etiquetas de mes precalculadas: se piden por cada fila en los bucles de informes. Fuera de
+# este rango de años se formatean al vuelo.
+_MONTH_KEYS = {(y, m): f"{y:04d}-{m:02d}" for y in range(2000, 2061) for m in range(1, 13)}
+_MONTH_LABELS = {(y, m): f"{SPANISH_MONTH_ABBR[m - 1]} {y}" for y in range(2000, 2061) for m in range(1, 13)}
+
+
 def _month_key(d: date) -> str:
-    return f"{d.year:04d}-{d.month:02d}"
+    key = _MONTH_KEYS.get((d.year, d.month))
+    return key if key is not None else f"{d.year:04d}-{d.month:02d}"
 
 
 def _parse_month_key(key: str) -> date | None:
@@ -4292,7 +4557,14 @@ def _parse_month_key(key: str) -> date | None:
 
 
 def _month_label(d: date) -> str:
-    return f"{SPANISH_MONTH_ABBR[d.month - 1]} {d.year}"
+    label = _MONTH_LABELS.get((d.year, d.month))
+    return label if label is not None else f"{SPANISH_MONTH_ABBR[d.month - 1]} {d.year}"
+
+
+@lru_cache(maxsize=4096)
+def _dmy(d: date | None) -> str:
+    """dd/mm/aaaa de una fecha ('' si no hay). Memoizada: en el catálogo se repiten pocas fechas."""
+    return d.strftime("%d/%m/%Y") if d else ""
 
 
 def _semester_key(year: int, half: int) -> str:
@@ -4389,13 +4661,18 @@ def _royalty_available_semesters(session_db, selected_sem_start: date | None = N
     return sorted(available, key=lambda value: (value[0], value[1]), reverse=True)
 
 
+# `\W` + `_` = justo lo que no cumple `str.isalnum()` (también con Unicode).
+_ISRC_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+
 def _isrc_key(val: str | None) -> str:
     if not val:
         return ""
-    s = str(val).strip().upper()
-    return "".join(ch for ch in s if ch.isalnum())
+    return _ISRC_NON_ALNUM_RE.sub("", str(val).upper())
 
 
+# Los mismos ISRC se repiten fila tras fila en importaciones y agregados.
+@lru_cache(maxsize=8192)
 def _norm_isrc(val: str | None) -> str:
     raw = _isrc_key(val)
     if not raw:
@@ -5979,7 +6256,7 @@ def _song_lyrics_meta(session_db, song: Song) -> dict:
     interpreters = [
         (getattr(row, "name", None) or "").strip()
         for row in (
-            session_db.query(SongInterpreter)
+            session_db.query(SongInterpreter.name)
             .filter(SongInterpreter.song_id == song.id)
             .order_by(SongInterpreter.is_main.desc(), SongInterpreter.created_at.asc())
             .all()
@@ -7466,6 +7743,63 @@ def _royalty_item_artist_ids(song: Song | None = None, album: Album | None = Non
     return out
 
 
+# Tamaño de lote para los `col IN (...)` con listas de ids potencialmente grandes (todas las canciones
+# con ingresos de un periodo, p. ej.): listas de miles de UUID hacen lenta la planificación.
+IN_BATCH_SIZE = 1000
+
+
+def _id_batches(ids, size: int = IN_BATCH_SIZE):
+    """Trocea una colección de ids en listas de `size` como mucho (para `col.in_(lote)`)."""
+    ids = list(ids or [])
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _primary_audio_isrc_map(session_db, song_ids, normalize: bool = True) -> dict:
+    """{song_id: ISRC de AUDIO principal} de varias canciones en una consulta.
+
+    Hay como mucho uno por canción (índice único parcial `uq_song_isrc_primary_per_kind`, que es
+    también el que resuelve esta consulta). `normalize=False` devuelve el código tal cual se guardó.
+    """
+    out = {}
+    for batch in _id_batches(song_ids):
+        rows = (
+            session_db.query(SongISRCCode.song_id, SongISRCCode.code)
+            .filter(SongISRCCode.song_id.in_(batch))
+            .filter(SongISRCCode.kind == "AUDIO")
+            .filter(SongISRCCode.is_primary == True)  # noqa: E712
+            .all()
+        )
+        out.update({sid: (_norm_isrc(code) if normalize else code) for sid, code in rows if sid and code})
+    return out
+
+
+def _song_interpreter_names_map(session_db, song_ids) -> dict:
+    """{song_id: [nombres de intérpretes]} (principal primero) en una consulta de columnas sueltas."""
+    out = {}
+    for batch in _id_batches(song_ids):
+        rows = (
+            session_db.query(SongInterpreter.song_id, SongInterpreter.name)
+            .filter(SongInterpreter.song_id.in_(batch))
+            .order_by(SongInterpreter.song_id.asc(), SongInterpreter.is_main.desc(), SongInterpreter.created_at.asc())
+            .all()
+        )
+        for sid, name in rows:
+            if sid and name:
+                out.setdefault(sid, []).append(name)
+    return out
+
+
+def _song_interpreters_display(song, interp_map: dict) -> str:
+    """Intérpretes de `interp_map` unidos por comas; si no hay, los artistas de la canción."""
+    names = interp_map.get(song.id)
+    if names:
+        joined = ", ".join(names).strip()
+        if joined:
+            return joined
+    return ", ".join(a.name for a in (getattr(song, "artists", None) or []))
+
+
 def _first_album_code_display_map(session_db, album_ids: list) -> dict[str, str]:
     out: dict[str, str] = {}
     if not album_ids:
@@ -7659,7 +7993,7 @@ def _song_interpreters_label(session_db, song: Song) -> str:
     if not song or not getattr(song, 'id', None):
         return '—'
     rows = (
-        session_db.query(SongInterpreter)
+        session_db.query(SongInterpreter.name)
         .filter(SongInterpreter.song_id == song.id)
         .order_by(SongInterpreter.is_main.desc(), SongInterpreter.created_at.asc())
         .all()
@@ -8460,7 +8794,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                     func.sum(SongRevenueEntry.net),
                 )
                 .filter(SongRevenueEntry.song_id.in_(song_ids))
-                .filter(func.upper(SongRevenueEntry.period_type) == "SEMESTER")
+                .filter(SongRevenueEntry.period_type == "SEMESTER")
                 .filter(SongRevenueEntry.period_start == sem_start)
                 .group_by(SongRevenueEntry.song_id)
                 .all()
@@ -8476,7 +8810,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                     func.sum(SongRevenueEntry.net),
                 )
                 .filter(SongRevenueEntry.song_id.in_(song_ids))
-                .filter(func.upper(SongRevenueEntry.period_type) == "MONTH")
+                .filter(SongRevenueEntry.period_type == "MONTH")
                 .filter(SongRevenueEntry.period_start.in_(month_starts))
                 .group_by(SongRevenueEntry.song_id)
                 .all()
@@ -8503,7 +8837,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                     func.sum(AlbumRevenueEntry.net),
                 )
                 .filter(AlbumRevenueEntry.album_id.in_(album_ids))
-                .filter(func.upper(AlbumRevenueEntry.period_type) == "SEMESTER")
+                .filter(AlbumRevenueEntry.period_type == "SEMESTER")
                 .filter(AlbumRevenueEntry.period_start == sem_start)
                 .group_by(AlbumRevenueEntry.album_id)
                 .all()
@@ -8519,7 +8853,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                     func.sum(AlbumRevenueEntry.net),
                 )
                 .filter(AlbumRevenueEntry.album_id.in_(album_ids))
-                .filter(func.upper(AlbumRevenueEntry.period_type) == "MONTH")
+                .filter(AlbumRevenueEntry.period_type == "MONTH")
                 .filter(AlbumRevenueEntry.period_start.in_(month_starts))
                 .group_by(AlbumRevenueEntry.album_id)
                 .all()
@@ -8564,8 +8898,8 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                 .filter(SongArtist.artist_id == bid)
                 .filter(
                     or_(
-                        and_(func.upper(SongRevenueEntry.period_type) == "SEMESTER", SongRevenueEntry.period_start == sem_start),
-                        and_(func.upper(SongRevenueEntry.period_type) == "MONTH", SongRevenueEntry.period_start.in_(month_starts)),
+                        and_(SongRevenueEntry.period_type == "SEMESTER", SongRevenueEntry.period_start == sem_start),
+                        and_(SongRevenueEntry.period_type == "MONTH", SongRevenueEntry.period_start.in_(month_starts)),
                     )
                 )
                 .distinct()
@@ -8581,8 +8915,8 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                 .filter(Album.artist_id == bid)
                 .filter(
                     or_(
-                        and_(func.upper(AlbumRevenueEntry.period_type) == "SEMESTER", AlbumRevenueEntry.period_start == sem_start),
-                        and_(func.upper(AlbumRevenueEntry.period_type) == "MONTH", AlbumRevenueEntry.period_start.in_(month_starts)),
+                        and_(AlbumRevenueEntry.period_type == "SEMESTER", AlbumRevenueEntry.period_start == sem_start),
+                        and_(AlbumRevenueEntry.period_type == "MONTH", AlbumRevenueEntry.period_start.in_(month_starts)),
                     )
                 )
                 .distinct()
@@ -8595,7 +8929,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
         if song_ids:
             songs = (
                 session_db.query(Song)
-                .options(selectinload(Song.artists))
+                .options(selectinload(Song.artists), *_n1_guard())
                 .filter(Song.id.in_(song_ids))
                 .order_by(Song.release_date.desc())
                 .all()
@@ -8623,31 +8957,9 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
             album_net_map,
         )
 
-        interp_map = {sid: [] for sid in song_ids}
-        if song_ids:
-            rows = (
-                session_db.query(SongInterpreter)
-                .filter(SongInterpreter.song_id.in_(song_ids))
-                .order_by(SongInterpreter.song_id.asc(), SongInterpreter.is_main.desc(), SongInterpreter.created_at.asc())
-                .all()
-            )
-            for row in rows:
-                if row.song_id in interp_map and row.name:
-                    interp_map[row.song_id].append(row.name)
-        interpreters_str = {sid: ", ".join(names) for sid, names in interp_map.items()}
+        interp_map = _song_interpreter_names_map(session_db, song_ids)
 
-        isrc_map = {}
-        if song_ids:
-            rows = (
-                session_db.query(SongISRCCode.song_id, SongISRCCode.code)
-                .filter(SongISRCCode.song_id.in_(song_ids))
-                .filter(func.upper(SongISRCCode.kind) == "AUDIO")
-                .filter(SongISRCCode.is_primary == True)
-                .all()
-            )
-            for sid, code in rows:
-                if sid and code and sid not in isrc_map:
-                    isrc_map[sid] = _norm_isrc(code)
+        isrc_map = _primary_audio_isrc_map(session_db, song_ids)
 
         album_code_map = _first_album_code_display_map(session_db, album_ids)
 
@@ -8688,10 +9000,10 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                 "cover_url": song.cover_url,
                 "item_id": str(song.id),
                 "title": song.title,
-                "subtitle": (interpreters_str.get(song.id) or "").strip() or ", ".join([a.name for a in getattr(song, "artists", [])]) or "",
+                "subtitle": _song_interpreters_display(song, interp_map),
                 "code": _norm_isrc(isrc_map.get(song.id) or song.isrc) or "—",
                 "code_label": "ISRC",
-                "release_date": song.release_date.strftime("%d/%m/%Y") if song.release_date else "",
+                "release_date": _dmy(song.release_date),
                 "income": float(income or 0),
                 "pct": pct,
                 "amount": amount,
@@ -8733,7 +9045,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                 "subtitle": " · ".join([bit for bit in subtitle_bits if bit]),
                 "code": code_display,
                 "code_label": "Código",
-                "release_date": album.release_date.strftime("%d/%m/%Y") if album.release_date else "",
+                "release_date": _dmy(album.release_date),
                 "income": float(income or 0),
                 "pct": pct,
                 "amount": amount,
@@ -8777,8 +9089,8 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                 .filter(SongRoyaltyBeneficiary.promoter_id == bid)
                 .filter(
                     or_(
-                        and_(func.upper(SongRevenueEntry.period_type) == "SEMESTER", SongRevenueEntry.period_start == sem_start),
-                        and_(func.upper(SongRevenueEntry.period_type) == "MONTH", SongRevenueEntry.period_start.in_(month_starts)),
+                        and_(SongRevenueEntry.period_type == "SEMESTER", SongRevenueEntry.period_start == sem_start),
+                        and_(SongRevenueEntry.period_type == "MONTH", SongRevenueEntry.period_start.in_(month_starts)),
                     )
                 )
                 .distinct()
@@ -8794,8 +9106,8 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                 .filter(AlbumRoyaltyBeneficiary.promoter_id == bid)
                 .filter(
                     or_(
-                        and_(func.upper(AlbumRevenueEntry.period_type) == "SEMESTER", AlbumRevenueEntry.period_start == sem_start),
-                        and_(func.upper(AlbumRevenueEntry.period_type) == "MONTH", AlbumRevenueEntry.period_start.in_(month_starts)),
+                        and_(AlbumRevenueEntry.period_type == "SEMESTER", AlbumRevenueEntry.period_start == sem_start),
+                        and_(AlbumRevenueEntry.period_type == "MONTH", AlbumRevenueEntry.period_start.in_(month_starts)),
                     )
                 )
                 .distinct()
@@ -8808,7 +9120,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
         if song_ids:
             songs = (
                 session_db.query(Song)
-                .options(selectinload(Song.artists))
+                .options(selectinload(Song.artists), *_n1_guard())
                 .filter(Song.id.in_(song_ids))
                 .order_by(Song.release_date.desc())
                 .all()
@@ -8828,31 +9140,9 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
         song_gross_map, song_net_map = _load_song_income_maps(song_ids)
         album_gross_map, album_net_map = _load_album_income_maps(album_ids)
 
-        interp_map = {sid: [] for sid in song_ids}
-        if song_ids:
-            rows = (
-                session_db.query(SongInterpreter)
-                .filter(SongInterpreter.song_id.in_(song_ids))
-                .order_by(SongInterpreter.song_id.asc(), SongInterpreter.is_main.desc(), SongInterpreter.created_at.asc())
-                .all()
-            )
-            for row in rows:
-                if row.song_id in interp_map and row.name:
-                    interp_map[row.song_id].append(row.name)
-        interpreters_str = {sid: ", ".join(names) for sid, names in interp_map.items()}
+        interp_map = _song_interpreter_names_map(session_db, song_ids)
 
-        isrc_map = {}
-        if song_ids:
-            rows = (
-                session_db.query(SongISRCCode.song_id, SongISRCCode.code)
-                .filter(SongISRCCode.song_id.in_(song_ids))
-                .filter(func.upper(SongISRCCode.kind) == "AUDIO")
-                .filter(SongISRCCode.is_primary == True)
-                .all()
-            )
-            for sid, code in rows:
-                if sid and code and sid not in isrc_map:
-                    isrc_map[sid] = _norm_isrc(code)
+        isrc_map = _primary_audio_isrc_map(session_db, song_ids)
 
         album_code_map = _first_album_code_display_map(session_db, album_ids)
 
@@ -8900,10 +9190,10 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                     "cover_url": song.cover_url,
                 "item_id": str(song.id),
                     "title": song.title,
-                    "subtitle": (interpreters_str.get(song.id) or "").strip() or ", ".join([a.name for a in getattr(song, "artists", [])]) or "",
+                    "subtitle": _song_interpreters_display(song, interp_map),
                     "code": _norm_isrc(isrc_map.get(song.id) or song.isrc) or "—",
                     "code_label": "ISRC",
-                    "release_date": song.release_date.strftime("%d/%m/%Y") if song.release_date else "",
+                    "release_date": _dmy(song.release_date),
                     "income": float(income or 0),
                     "pct": pct,
                     "amount": amount,
@@ -8948,7 +9238,7 @@ def _build_royalty_single_beneficiary(session_db, sem_start: date, sem_end: date
                     "subtitle": " · ".join([bit for bit in subtitle_bits if bit]),
                     "code": code_display,
                     "code_label": "Código",
-                    "release_date": album.release_date.strftime("%d/%m/%Y") if album.release_date else "",
+                    "release_date": _dmy(album.release_date),
                     "income": float(income or 0),
                     "pct": pct,
                     "amount": amount,
@@ -8981,77 +9271,8 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         month_starts.append(cursor)
         cursor = _add_months(cursor, 1)
 
-    sem_song_ids = [
-        sid
-        for (sid,) in (
-            session_db.query(SongRevenueEntry.song_id)
-            .filter(func.upper(SongRevenueEntry.period_type) == "SEMESTER")
-            .filter(SongRevenueEntry.period_start == sem_start)
-            .distinct()
-            .all()
-        )
-        if sid
-    ]
-    month_song_ids = [
-        sid
-        for (sid,) in (
-            session_db.query(SongRevenueEntry.song_id)
-            .filter(func.upper(SongRevenueEntry.period_type) == "MONTH")
-            .filter(SongRevenueEntry.period_start.in_(month_starts))
-            .distinct()
-            .all()
-        )
-        if sid
-    ]
-    song_ids = sorted(set(sem_song_ids + month_song_ids), key=lambda x: str(x))
-
-    sem_album_ids = [
-        aid
-        for (aid,) in (
-            session_db.query(AlbumRevenueEntry.album_id)
-            .filter(func.upper(AlbumRevenueEntry.period_type) == "SEMESTER")
-            .filter(AlbumRevenueEntry.period_start == sem_start)
-            .distinct()
-            .all()
-        )
-        if aid
-    ]
-    month_album_ids = [
-        aid
-        for (aid,) in (
-            session_db.query(AlbumRevenueEntry.album_id)
-            .filter(func.upper(AlbumRevenueEntry.period_type) == "MONTH")
-            .filter(AlbumRevenueEntry.period_start.in_(month_starts))
-            .distinct()
-            .all()
-        )
-        if aid
-    ]
-    album_ids = sorted(set(sem_album_ids + month_album_ids), key=lambda x: str(x))
-
-    songs: list[Song] = []
-    if song_ids:
-        songs = (
-            session_db.query(Song)
-            .options(selectinload(Song.artists))
-            .filter(Song.id.in_(song_ids))
-            # Las colaboraciones externas SÍ entran: al artista le corresponde su % (según tipo)
-            # sobre el ingreso que nos llega de la compañía (ver _royalty_external_collab_income),
-            # y los terceros con % sobre sus ingresos discográficos participan en esa proporción.
-            .order_by(Song.release_date.desc())
-            .all()
-        )
-
-    albums: list[Album] = []
-    if album_ids:
-        albums = (
-            session_db.query(Album)
-            .options(joinedload(Album.artist))
-            .filter(Album.id.in_(album_ids))
-            .order_by(Album.release_date.desc())
-            .all()
-        )
-
+    # Una consulta agregada por tipo de periodo: las sumas Y el conjunto de ids salen del mismo
+    # GROUP BY (antes había además un SELECT DISTINCT por cada uno sobre las mismas filas).
     sem_song_totals = {
         sid: (Decimal(g or 0), Decimal(n or 0))
         for sid, g, n in (
@@ -9060,7 +9281,7 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
                 func.sum(SongRevenueEntry.gross),
                 func.sum(SongRevenueEntry.net),
             )
-            .filter(func.upper(SongRevenueEntry.period_type) == "SEMESTER")
+            .filter(SongRevenueEntry.period_type == "SEMESTER")
             .filter(SongRevenueEntry.period_start == sem_start)
             .group_by(SongRevenueEntry.song_id)
             .all()
@@ -9075,22 +9296,18 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
                 func.sum(SongRevenueEntry.gross),
                 func.sum(SongRevenueEntry.net),
             )
-            .filter(func.upper(SongRevenueEntry.period_type) == "MONTH")
+            .filter(SongRevenueEntry.period_type == "MONTH")
             .filter(SongRevenueEntry.period_start.in_(month_starts))
             .group_by(SongRevenueEntry.song_id)
+            .having(or_(func.sum(SongRevenueEntry.gross) != 0, func.sum(SongRevenueEntry.net) != 0))
             .all()
         )
         if sid
     }
-    song_gross_map = {}
-    song_net_map = {}
-    for sid in song_ids:
-        if sid in sem_song_totals:
-            g, n = sem_song_totals[sid]
-        else:
-            g, n = month_song_totals.get(sid, (Decimal(0), Decimal(0)))
-        song_gross_map[sid] = float(g or 0)
-        song_net_map[sid] = float(n or 0)
+    # El semestral manda sobre la suma de meses (aunque sume 0). Lo que queda a cero no entra: ni se
+    # cargan sus canciones ni sus beneficiarios.
+    song_totals = {**month_song_totals, **sem_song_totals}
+    song_ids = sorted((sid for sid, (g, n) in song_totals.items() if g or n), key=lambda x: str(x))
 
     sem_album_totals = {
         aid: (Decimal(g or 0), Decimal(n or 0))
@@ -9100,7 +9317,7 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
                 func.sum(AlbumRevenueEntry.gross),
                 func.sum(AlbumRevenueEntry.net),
             )
-            .filter(func.upper(AlbumRevenueEntry.period_type) == "SEMESTER")
+            .filter(AlbumRevenueEntry.period_type == "SEMESTER")
             .filter(AlbumRevenueEntry.period_start == sem_start)
             .group_by(AlbumRevenueEntry.album_id)
             .all()
@@ -9115,48 +9332,60 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
                 func.sum(AlbumRevenueEntry.gross),
                 func.sum(AlbumRevenueEntry.net),
             )
-            .filter(func.upper(AlbumRevenueEntry.period_type) == "MONTH")
+            .filter(AlbumRevenueEntry.period_type == "MONTH")
             .filter(AlbumRevenueEntry.period_start.in_(month_starts))
             .group_by(AlbumRevenueEntry.album_id)
+            .having(or_(func.sum(AlbumRevenueEntry.gross) != 0, func.sum(AlbumRevenueEntry.net) != 0))
             .all()
         )
         if aid
     }
+    album_totals = {**month_album_totals, **sem_album_totals}
+    album_ids = sorted((aid for aid, (g, n) in album_totals.items() if g or n), key=lambda x: str(x))
+
+    # Por lotes (`_id_batches`): en un semestre entran miles de canciones. El orden se rehace al
+    # juntar los lotes igual que el `ORDER BY release_date DESC` de Postgres: sin fecha primero y
+    # luego de más reciente a más antigua.
+    songs: list[Song] = []
+    for batch in _id_batches(song_ids):
+        songs.extend(
+            session_db.query(Song)
+            .options(selectinload(Song.artists), *_n1_guard())
+            .filter(Song.id.in_(batch))
+            # Las colaboraciones externas SÍ entran: al artista le corresponde su % (según tipo)
+            # sobre el ingreso que nos llega de la compañía (ver _royalty_external_collab_income),
+            # y los terceros con % sobre sus ingresos discográficos participan en esa proporción.
+            .all()
+        )
+    songs.sort(key=lambda x: (x.release_date is None, x.release_date or date.min), reverse=True)
+
+    albums: list[Album] = []
+    for batch in _id_batches(album_ids):
+        albums.extend(
+            session_db.query(Album)
+            .options(joinedload(Album.artist))
+            .filter(Album.id.in_(batch))
+            .all()
+        )
+    albums.sort(key=lambda x: (x.release_date is None, x.release_date or date.min), reverse=True)
+
+    song_gross_map = {}
+    song_net_map = {}
+    for sid in song_ids:
+        g, n = song_totals[sid]
+        song_gross_map[sid] = float(g or 0)
+        song_net_map[sid] = float(n or 0)
+
     album_gross_map = {}
     album_net_map = {}
     for aid in album_ids:
-        if aid in sem_album_totals:
-            g, n = sem_album_totals[aid]
-        else:
-            g, n = month_album_totals.get(aid, (Decimal(0), Decimal(0)))
+        g, n = album_totals[aid]
         album_gross_map[aid] = float(g or 0)
         album_net_map[aid] = float(n or 0)
 
-    interp_map = {sid: [] for sid in song_ids}
-    if song_ids:
-        rows = (
-            session_db.query(SongInterpreter)
-            .filter(SongInterpreter.song_id.in_(song_ids))
-            .order_by(SongInterpreter.song_id.asc(), SongInterpreter.is_main.desc(), SongInterpreter.created_at.asc())
-            .all()
-        )
-        for row in rows:
-            if row.song_id in interp_map and row.name:
-                interp_map[row.song_id].append(row.name)
-    interpreters_str = {sid: ", ".join(names) for sid, names in interp_map.items()}
+    interp_map = _song_interpreter_names_map(session_db, song_ids)
 
-    isrc_map = {}
-    if song_ids:
-        rows = (
-            session_db.query(SongISRCCode.song_id, SongISRCCode.code)
-            .filter(SongISRCCode.song_id.in_(song_ids))
-            .filter(func.upper(SongISRCCode.kind) == "AUDIO")
-            .filter(SongISRCCode.is_primary == True)  # noqa: E712
-            .all()
-        )
-        for sid, code in rows:
-            if sid and code and sid not in isrc_map:
-                isrc_map[sid] = _norm_isrc(code)
+    isrc_map = _primary_audio_isrc_map(session_db, song_ids)
 
     album_code_map = _first_album_code_display_map(session_db, album_ids)
 
@@ -9164,20 +9393,20 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
     album_lookup = {album.id: album for album in albums}
 
     extra_song_rows = []
-    if song_ids:
-        extra_song_rows = (
+    for batch in _id_batches(song_ids):
+        extra_song_rows.extend(
             session_db.query(SongRoyaltyBeneficiary)
             .options(joinedload(SongRoyaltyBeneficiary.promoter))
-            .filter(SongRoyaltyBeneficiary.song_id.in_(song_ids))
+            .filter(SongRoyaltyBeneficiary.song_id.in_(batch))
             .all()
         )
 
     extra_album_rows = []
-    if album_ids:
-        extra_album_rows = (
+    for batch in _id_batches(album_ids):
+        extra_album_rows.extend(
             session_db.query(AlbumRoyaltyBeneficiary)
             .options(joinedload(AlbumRoyaltyBeneficiary.promoter))
-            .filter(AlbumRoyaltyBeneficiary.album_id.in_(album_ids))
+            .filter(AlbumRoyaltyBeneficiary.album_id.in_(batch))
             .all()
         )
 
@@ -9198,21 +9427,16 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
     )
     liq_map = {(row.beneficiary_kind, str(row.beneficiary_id)): row for row in liq_rows if row}
 
-    filter_artist_ids = set()
-    for song in songs:
-        for artist in getattr(song, "artists", []) or []:
-            if getattr(artist, "id", None):
-                filter_artist_ids.add(artist.id)
-
     ben_map: dict[tuple[str, str], dict] = {}
 
     def ensure_benef(kind: str, bid: str, name: str, photo_url: str | None, kind_label: str):
         key = (kind, bid)
         if only_beneficiary and key != only_beneficiary:
             return None
-        if key not in ben_map:
+        bucket = ben_map.get(key)
+        if bucket is None:
             delivery = _beneficiary_email_delivery_data(session_db, kind, bid)
-            ben_map[key] = {
+            bucket = ben_map[key] = {
                 "kind": kind,
                 "id": bid,
                 "name": name,
@@ -9230,7 +9454,7 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
                 "extra_email_rows": list(delivery.get("extra_rows") or []),
                 "can_send_email": bool((delivery.get("default_recipients") or []) or (delivery.get("suggested_recipients") or [])),
             }
-        return ben_map[key]
+        return bucket
 
     def append_item(bucket: dict | None, item: dict):
         if not bucket:
@@ -9239,12 +9463,20 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         bucket["total_income"] += float(item.get("income") or 0)
         bucket["total_amount"] += float(item.get("amount") or 0)
 
+    # Compromisos de TODOS los artistas implicados en una consulta; cada canción/disco elige el suyo
+    # en memoria con `_pick_artist_commitment_from_rows` (antes, una consulta por canción y por disco).
+    commitment_rows_by_artist = _artist_commitment_rows_map(
+        session_db,
+        {song.artists[0].id for song in songs if song.artists}
+        | {album.artist_id for album in albums if album.artist_id},
+    )
+
     for song in songs:
         artist_ids = _royalty_item_artist_ids(song=song)
         if selected_artist_id_str and selected_artist_id_str not in artist_ids:
             continue
 
-        primary_artist = song.artists[0] if getattr(song, "artists", None) else None
+        primary_artist = song.artists[0] if song.artists else None
         if not primary_artist:
             continue
 
@@ -9252,16 +9484,16 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         n = song_net_map.get(song.id, 0.0)
         if abs(float(g)) < 1e-9 and abs(float(n)) < 1e-9:
             continue
+        song_sid = str(song.id)
 
-        commitment, _contract = _pick_artist_commitment(
-            session_db,
-            primary_artist.id,
+        commitment, _contract = _pick_artist_commitment_from_rows(
+            commitment_rows_by_artist.get(primary_artist.id, ()),
             _royalty_concept_variants_for_material(song),
-            material_date=getattr(song, "release_date", None),
+            material_date=song.release_date,
             as_of_date=sem_end,
         )
-        pct = float(getattr(commitment, "pct_artist", 0) or 0) if commitment else 0.0
-        base = _norm_contract_base(getattr(commitment, "base", "GROSS") or "GROSS") if commitment else "GROSS"
+        pct = float(commitment.pct_artist or 0) if commitment else 0.0
+        base = _norm_contract_base(commitment.base or "GROSS") if commitment else "GROSS"
         income = n if base in ("NET", "PROFIT") else g
         _ext = _royalty_external_collab_income(song, g, n)
         if _ext is not None:
@@ -9273,31 +9505,31 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         if ownership_label:
             badges.append(ownership_label)
 
-        bucket = ensure_benef("ARTIST", str(primary_artist.id), primary_artist.name, getattr(primary_artist, "photo_url", None), "Artista")
+        bucket = ensure_benef("ARTIST", str(primary_artist.id), primary_artist.name, primary_artist.photo_url, "Artista")
         item_payload = {
             "item_kind": "SONG",
             "item_type_label": "Canción",
-            "detail_url": url_for("discografica_song_detail", song_id=str(song.id), tab="royalties"),
+            "detail_url": url_for("discografica_song_detail", song_id=song_sid, tab="royalties"),
             "cover_url": song.cover_url,
-            "item_id": str(song.id),
+            "item_id": song_sid,
             "title": song.title,
-            "subtitle": (interpreters_str.get(song.id) or "").strip() or ", ".join([a.name for a in getattr(song, "artists", [])]) or "",
+            "subtitle": _song_interpreters_display(song, interp_map),
             "code": _norm_isrc(isrc_map.get(song.id) or song.isrc) or "—",
             "code_label": "ISRC",
-            "release_date": song.release_date.strftime("%d/%m/%Y") if song.release_date else "",
+            "release_date": _dmy(song.release_date),
             "income": float(income or 0),
             "pct": pct,
             "amount": amount,
             "badges": badges,
             "sort_title": (song.title or "").lower(),
         }
-        if bool(getattr(song, 'is_distribution', False)):
-            item_payload = _apply_distribution_deductions(item_payload, song_deduction_map.get(str(song.id)) or [])
+        if bool(song.is_distribution):
+            item_payload = _apply_distribution_deductions(item_payload, song_deduction_map.get(song_sid) or [])
         append_item(bucket, item_payload)
 
     for row in extra_song_rows:
-        song = song_lookup.get(getattr(row, "song_id", None))
-        promoter = getattr(row, "promoter", None)
+        song = song_lookup.get(row.song_id)
+        promoter = row.promoter
         if not song or not promoter:
             continue
 
@@ -9309,11 +9541,12 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         n = song_net_map.get(song.id, 0.0)
         if abs(float(g)) < 1e-9 and abs(float(n)) < 1e-9:
             continue
+        song_sid = str(song.id)
 
-        base = (getattr(row, "base", "GROSS") or "GROSS").strip().upper()
+        base = (row.base or "GROSS").strip().upper()
         if base not in ("GROSS", "NET", "PROFIT"):
             base = "GROSS"
-        pct = float(getattr(row, "pct", 0) or 0)
+        pct = float(row.pct or 0)
         income = n if base in ("NET", "PROFIT") else g
         _ext = _royalty_external_collab_income(song, g, n)
         if _ext is not None:
@@ -9326,20 +9559,20 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
             badges.append(ownership_label)
 
         display_name = (promoter.nick or ((promoter.first_name or "") + " " + (promoter.last_name or ""))).strip() or "Beneficiario"
-        bucket = ensure_benef("PROMOTER", str(promoter.id), display_name, getattr(promoter, "logo_url", None), "Beneficiario")
+        bucket = ensure_benef("PROMOTER", str(promoter.id), display_name, promoter.logo_url, "Beneficiario")
         append_item(
             bucket,
             {
                 "item_kind": "SONG",
                 "item_type_label": "Canción",
-                "detail_url": url_for("discografica_song_detail", song_id=str(song.id), tab="royalties"),
+                "detail_url": url_for("discografica_song_detail", song_id=song_sid, tab="royalties"),
                 "cover_url": song.cover_url,
-                "item_id": str(song.id),
+                "item_id": song_sid,
                 "title": song.title,
-                "subtitle": (interpreters_str.get(song.id) or "").strip() or ", ".join([a.name for a in getattr(song, "artists", [])]) or "",
+                "subtitle": _song_interpreters_display(song, interp_map),
                 "code": _norm_isrc(isrc_map.get(song.id) or song.isrc) or "—",
                 "code_label": "ISRC",
-                "release_date": song.release_date.strftime("%d/%m/%Y") if song.release_date else "",
+                "release_date": _dmy(song.release_date),
                 "income": float(income or 0),
                 "pct": pct,
                 "amount": amount,
@@ -9349,9 +9582,9 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         )
 
     for album in albums:
-        artist = getattr(album, "artist", None)
+        artist = album.artist
         if not artist:
-            artist = session_db.get(Artist, getattr(album, "artist_id", None)) if getattr(album, "artist_id", None) else None
+            artist = session_db.get(Artist, album.artist_id) if album.artist_id else None
         if not artist:
             continue
 
@@ -9362,16 +9595,16 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         n = album_net_map.get(album.id, 0.0)
         if abs(float(g)) < 1e-9 and abs(float(n)) < 1e-9:
             continue
+        album_sid = str(album.id)
 
-        commitment, _contract = _pick_artist_commitment(
-            session_db,
-            artist.id,
+        commitment, _contract = _pick_artist_commitment_from_rows(
+            commitment_rows_by_artist.get(artist.id, ()),
             _royalty_concept_variants_for_material(album),
-            material_date=getattr(album, "release_date", None),
+            material_date=album.release_date,
             as_of_date=sem_end,
         )
-        pct = float(getattr(commitment, "pct_artist", 0) or 0) if commitment else 0.0
-        base = _norm_contract_base(getattr(commitment, "base", "GROSS") or "GROSS") if commitment else "GROSS"
+        pct = float(commitment.pct_artist or 0) if commitment else 0.0
+        base = _norm_contract_base(commitment.base or "GROSS") if commitment else "GROSS"
         income = n if base in ("NET", "PROFIT") else g
         amount = float(income) * (pct / 100.0)
 
@@ -9380,55 +9613,56 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         if ownership_label:
             badges.append(ownership_label)
 
-        code_display = album_code_map.get(str(album.id)) or ((_clean_csv_cell(getattr(album, "upc_code", None)) or "").strip()) or "—"
+        code_display = album_code_map.get(album_sid) or ((_clean_csv_cell(album.upc_code) or "").strip()) or "—"
         subtitle_bits = [artist.name]
         kind_label = _album_kind_label(album)
         if kind_label:
             subtitle_bits.append(kind_label)
 
-        bucket = ensure_benef("ARTIST", str(artist.id), artist.name, getattr(artist, "photo_url", None), "Artista")
+        bucket = ensure_benef("ARTIST", str(artist.id), artist.name, artist.photo_url, "Artista")
         item_payload = {
             "item_kind": "ALBUM",
             "item_type_label": "Disco",
-            "detail_url": url_for("discografica_album_detail", album_id=str(album.id), tab="informacion"),
+            "detail_url": url_for("discografica_album_detail", album_id=album_sid, tab="informacion"),
             "cover_url": album.cover_url,
-            "item_id": str(album.id),
+            "item_id": album_sid,
             "title": album.title,
             "subtitle": " · ".join([bit for bit in subtitle_bits if bit]),
             "code": code_display,
             "code_label": "Código",
-            "release_date": album.release_date.strftime("%d/%m/%Y") if album.release_date else "",
+            "release_date": _dmy(album.release_date),
             "income": float(income or 0),
             "pct": pct,
             "amount": amount,
             "badges": badges,
             "sort_title": (album.title or "").lower(),
         }
-        if bool(getattr(album, 'is_distribution', False)):
-            item_payload = _apply_distribution_deductions(item_payload, album_deduction_map.get(str(album.id)) or [])
+        if bool(album.is_distribution):
+            item_payload = _apply_distribution_deductions(item_payload, album_deduction_map.get(album_sid) or [])
         append_item(bucket, item_payload)
 
     for row in extra_album_rows:
-        album = album_lookup.get(getattr(row, "album_id", None))
-        promoter = getattr(row, "promoter", None)
+        album = album_lookup.get(row.album_id)
+        promoter = row.promoter
         if not album or not promoter:
             continue
 
-        album_artist = getattr(album, "artist", None)
-        if not album_artist and getattr(album, "artist_id", None):
+        album_artist = album.artist
+        if not album_artist and album.artist_id:
             album_artist = session_db.get(Artist, album.artist_id)
-        if selected_artist_id_str and str(getattr(album, "artist_id", "")) != selected_artist_id_str:
+        if selected_artist_id_str and str(album.artist_id or "") != selected_artist_id_str:
             continue
 
         g = album_gross_map.get(album.id, 0.0)
         n = album_net_map.get(album.id, 0.0)
         if abs(float(g)) < 1e-9 and abs(float(n)) < 1e-9:
             continue
+        album_sid = str(album.id)
 
-        base = (getattr(row, "base", "GROSS") or "GROSS").strip().upper()
+        base = (row.base or "GROSS").strip().upper()
         if base not in ("GROSS", "NET", "PROFIT"):
             base = "GROSS"
-        pct = float(getattr(row, "pct", 0) or 0)
+        pct = float(row.pct or 0)
         income = n if base in ("NET", "PROFIT") else g
         amount = float(income) * (pct / 100.0)
 
@@ -9437,27 +9671,27 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
         if ownership_label:
             badges.append(ownership_label)
 
-        code_display = album_code_map.get(str(album.id)) or ((_clean_csv_cell(getattr(album, "upc_code", None)) or "").strip()) or "—"
+        code_display = album_code_map.get(album_sid) or ((_clean_csv_cell(album.upc_code) or "").strip()) or "—"
         subtitle_bits = [getattr(album_artist, "name", None) or ""]
         kind_label = _album_kind_label(album)
         if kind_label:
             subtitle_bits.append(kind_label)
 
         display_name = (promoter.nick or ((promoter.first_name or "") + " " + (promoter.last_name or ""))).strip() or "Beneficiario"
-        bucket = ensure_benef("PROMOTER", str(promoter.id), display_name, getattr(promoter, "logo_url", None), "Beneficiario")
+        bucket = ensure_benef("PROMOTER", str(promoter.id), display_name, promoter.logo_url, "Beneficiario")
         append_item(
             bucket,
             {
                 "item_kind": "ALBUM",
                 "item_type_label": "Disco",
-                "detail_url": url_for("discografica_album_detail", album_id=str(album.id), tab="informacion"),
+                "detail_url": url_for("discografica_album_detail", album_id=album_sid, tab="informacion"),
                 "cover_url": album.cover_url,
-                "item_id": str(album.id),
+                "item_id": album_sid,
                 "title": album.title,
                 "subtitle": " · ".join([bit for bit in subtitle_bits if bit]),
                 "code": code_display,
                 "code_label": "Código",
-                "release_date": album.release_date.strftime("%d/%m/%Y") if album.release_date else "",
+                "release_date": _dmy(album.release_date),
                 "income": float(income or 0),
                 "pct": pct,
                 "amount": amount,
@@ -9466,30 +9700,39 @@ def _build_royalty_beneficiaries(session_db, sem_start: date, sem_end: date, sel
             },
         )
 
+    # Una sola pasada: meta de liquidación, orden de líneas y reparto artistas / otros.
+    artist_beneficiaries = []
+    other_beneficiaries = []
     for (kind, bid), bucket in ben_map.items():
         rec = liq_map.get((kind, bid))
         _apply_royalty_liquidation_meta(bucket, rec, apply_frozen=apply_frozen)
-        bucket["items"].sort(key=lambda item: ((item.get("sort_title") or ""), item.get("release_date") or ""))
-
-    artist_beneficiaries = [
-        bucket for (kind, _bid), bucket in ben_map.items()
-        if kind == "ARTIST" and (bucket.get("items") or [])
-    ]
-    other_beneficiaries = [
-        bucket for (kind, _bid), bucket in ben_map.items()
-        if kind == "PROMOTER" and (bucket.get("items") or [])
-    ]
+        items = bucket["items"]
+        if not items:
+            continue
+        items.sort(key=lambda item: ((item.get("sort_title") or ""), item.get("release_date") or ""))
+        if kind == "ARTIST":
+            artist_beneficiaries.append(bucket)
+        elif kind == "PROMOTER":
+            other_beneficiaries.append(bucket)
     artist_beneficiaries.sort(key=lambda item: (item.get("name") or "").lower())
     other_beneficiaries.sort(key=lambda item: (item.get("name") or "").lower())
 
-    filter_artists = []
-    if filter_artist_ids:
-        filter_artists = (
-            session_db.query(Artist)
-            .filter(Artist.id.in_(list(filter_artist_ids)))
-            .order_by(Artist.name.asc())
-            .all()
+    # El desplegable de artistas sale de TODAS las canciones con ingresos anotados en el periodo,
+    # también las que suman 0 (esas no llegan a `songs`, pero el filtro las ha listado siempre).
+    period_song_ids = session_db.query(SongRevenueEntry.song_id).filter(
+        or_(
+            and_(SongRevenueEntry.period_type == "SEMESTER", SongRevenueEntry.period_start == sem_start),
+            and_(SongRevenueEntry.period_type == "MONTH", SongRevenueEntry.period_start.in_(month_starts)),
         )
+    )
+    filter_artists = (
+        session_db.query(Artist)
+        .filter(Artist.id.in_(
+            session_db.query(SongArtist.artist_id).filter(SongArtist.song_id.in_(period_song_ids))
+        ))
+        .order_by(Artist.name.asc())
+        .all()
+    )
 
     return {
         "artists": artist_beneficiaries,
@@ -9575,7 +9818,7 @@ def _build_afavor_groups(session_db, sem_start: date, selected_artist_id=None) -
     for sid, gross, net, eid in (
         session_db.query(SongRevenueEntry.song_id, SongRevenueEntry.gross, SongRevenueEntry.net, SongRevenueEntry.id)
         .filter(SongRevenueEntry.song_id.in_([s.id for s in songs]))
-        .filter(func.upper(SongRevenueEntry.period_type) == "SEMESTER")
+        .filter(SongRevenueEntry.period_type == "SEMESTER")
         .filter(SongRevenueEntry.period_start == sem_start)
         .filter(SongRevenueEntry.is_base.is_(True))
         .all()
@@ -9632,7 +9875,7 @@ def _build_afavor_groups(session_db, sem_start: date, selected_artist_id=None) -
             "cover_url": (getattr(s_row, "cover_url", None) or ""),
             "artist_name": (art.name if art else ""),
             "collaborators": ", ".join(others),
-            "release_date": (s_row.release_date.strftime("%d/%m/%Y") if getattr(s_row, "release_date", None) else ""),
+            "release_date": _dmy(getattr(s_row, "release_date", None)),
             "isrc": (getattr(s_row, "isrc", None) or ""),
             "company": (_promoter_display_name(company) or company.nick or "") if company is not None else "",
             "company_id": company_id,
@@ -9805,7 +10048,7 @@ def _build_royalty_liquidation_pdf_bytes(session_db, kind: str, beneficiary_id,
 
     def _eur(value) -> str:
         try:
-            return f"{float(value):,.2f} EUR".replace(",", "X").replace(".", ",").replace("X", ".")
+            return f"{float(value):,.2f} EUR".translate(_ES_NUMBER_TRANS)
         except Exception:
             return "0,00 EUR"
 
@@ -10481,7 +10724,7 @@ def _build_royalty_liquidation_email_body(beneficiary: dict, period_label: str,
     upload_url = (upload_url or download_url)
     def _eur(value) -> str:
         try:
-            return f"{float(value):,.2f} EUR".replace(",", "X").replace(".", ",").replace("X", ".")
+            return f"{float(value):,.2f} EUR".translate(_ES_NUMBER_TRANS)
         except Exception:
             return "0,00 EUR"
 
@@ -10834,45 +11077,68 @@ def _mark_song_sgae_registered(session_db, song_id) -> SongStatus:
     return st
 
 
+_ZERO_DEC = Decimal("0")
+_MONEY_NULLS = frozenset(("", "nan", "none", "null", "na"))
+# Todo lo que no sea dígito, separador o signo (símbolos de moneda, espacios, letras sueltas).
+_MONEY_JUNK_RE = re.compile(r"[^\d.,\-]")
+
+
 def _parse_money_decimal(val: str | None) -> Decimal:
     """Parse user/csv money-like strings to Decimal (robust for ES/EN formats)."""
-    if val is None:
-        return Decimal("0")
+    if not val:
+        return _ZERO_DEC
     s = str(val).strip()
-    if not s:
-        return Decimal("0")
+    if s.lower() in _MONEY_NULLS:
+        return _ZERO_DEC
 
-    if s.lower() in ("nan", "none", "null", "na"):
-        return Decimal("0")
-
-    # remove currency symbols/spaces
-    for ch in ("€", "$", "£"):
-        s = s.replace(ch, "")
-    s = s.replace(" ", "")
+    # Camino rápido: sin coma, lo que ya es un número ("1234.5", "-3", "1e-05") no necesita limpieza.
+    if "," not in s:
+        try:
+            dec = Decimal(s)
+            return dec if dec.is_finite() else _ZERO_DEC
+        except Exception:
+            pass
 
-    # Detect thousands/decimal separators
-    if "," in s and "." in s:
-        # If dot appears before comma => ES (1.234,56)
-        if s.find(".") < s.find(","):
-            s = s.replace(".", "")
+    # Una sola pasada para quitar moneda/espacios/basura; luego se decide el separador decimal.
+    s = _MONEY_JUNK_RE.sub("", s)
+    comma = s.find(",")
+    if comma >= 0:
+        dot = s.find(".")
+        if dot < 0:
+            # ES decimal comma
             s = s.replace(",", ".")
+        elif dot < comma:
+            # ES (1.234,56)
+            s = s.replace(".", "").replace(",", ".")
         else:
             # EN (1,234.56)
             s = s.replace(",", "")
-    elif "," in s and "." not in s:
-        # ES decimal comma
-        s = s.replace(",", ".")
+    dec = Decimal(s or "0")
+    return dec if dec.is_finite() else _ZERO_DEC
 
-    # Any remaining thousands separators
-    # (keep last dot as decimal)
-    try:
-        dec = Decimal(s)
-        return dec if dec.is_finite() else Decimal("0")
-    except Exception:
-        # fallback: strip anything weird
-        cleaned = "".join(ch for ch in s if ch.isdigit() or ch == "." or ch == "-")
-        dec = Decimal(cleaned or "0")
-        return dec if dec.is_finite() else Decimal("0")
+
+def _split_base_entries(entries) -> tuple:
+    """(primera entrada base o None, entradas no base) en una sola pasada."""
+    base = None
+    extras = []
+    for x in entries:
+        if not x.is_base:
+            extras.append(x)
+        elif base is None:
+            base = x
+    return base, extras
+
+
+def _revenue_entries_totals(entries) -> tuple[Decimal, Decimal]:
+    """(bruto, neto) de varias entradas de ingresos en una sola pasada.
+
+    `gross`/`net` son Numeric: ya llegan como Decimal, no hace falta reconstruirlos.
+    """
+    total_gross = total_net = _ZERO_DEC
+    for x in entries:
+        total_gross += x.gross or _ZERO_DEC
+        total_net += x.net or _ZERO_DEC
+    return total_gross, total_net
 
 
 def _money_norm(val) -> Decimal:
@@ -11131,7 +11397,13 @@ def _serialize_income_album_meta(session_db, album_ids: list[str]) -> dict[str,
     return meta
 
 
-def _apply_album_income_import_items(session_db, items: list[dict], period_type: str, period_start: date, period_end: date, amount_kind: str, strategy: str = "replace") -> dict:
+def _apply_revenue_import_items(session_db, model, key_field: str, items: list[dict], period_type: str, period_start: date, period_end: date, amount_kind: str, strategy: str = "replace") -> dict:
+    """Aplica importes importados a las filas BASE de `model` (SongRevenueEntry / AlbumRevenueEntry).
+
+    `key_field` es la columna del item y del modelo que identifica la canción/álbum. Las altas van en
+    un INSERT multi-fila y las modificaciones en un UPDATE por lotes (antes, una sentencia por fila
+    vía unit-of-work: en un extracto de miles de canciones era lo que más tardaba).
+    """
     result = {
         "created": 0,
         "updated": 0,
@@ -11143,58 +11415,63 @@ def _apply_album_income_import_items(session_db, items: list[dict], period_type:
     if not items:
         return result
 
-    album_ids = []
+    key_ids = []
     for item in items:
         try:
-            album_ids.append(uuid.UUID(str(item.get("album_id") or "")))
+            key_ids.append(uuid.UUID(str(item.get(key_field) or "")))
         except Exception:
             continue
 
-    if not album_ids:
+    if not key_ids:
         return result
 
+    key_col = getattr(model, key_field)
+    field_name = "gross" if amount_kind == "gross" else "net"
     existing_rows = (
-        session_db.query(AlbumRevenueEntry)
-        .filter(AlbumRevenueEntry.album_id.in_(album_ids))
-        .filter(AlbumRevenueEntry.period_type == period_type)
-        .filter(AlbumRevenueEntry.period_start == period_start)
-        .filter(AlbumRevenueEntry.is_base.is_(True))
+        session_db.query(model.id, key_col, getattr(model, field_name))
+        .filter(key_col.in_(key_ids))
+        .filter(model.period_type == period_type)
+        .filter(model.period_start == period_start)
+        .filter(model.is_base.is_(True))
         .all()
     )
-    existing_by_album = {str(row.album_id): row for row in existing_rows}
+    # clave -> [id de la fila o None si es nueva, valor actual]; se va actualizando por si la misma
+    # canción/álbum llega dos veces en `items`.
+    current_by_key = {str(k): [row_id, v] for row_id, k, v in existing_rows}
+    to_insert: dict[str, dict] = {}
+    to_update: dict[str, dict] = {}
+    now = session_db.query(func.now()).scalar() if current_by_key else None
 
     for item in items:
-        aid = str(item.get("album_id") or "")
+        key = str(item.get(key_field) or "")
         amount = _money_norm(item.get("new_value") or item.get("amount") or 0)
-        if not aid:
+        if not key:
             continue
 
-        entry = existing_by_album.get(aid)
-        field_name = "gross" if amount_kind == "gross" else "net"
-        existing_value = _money_norm(getattr(entry, field_name, 0) if entry else 0)
+        current = current_by_key.get(key)
+        existing_value = _money_norm(current[1] if current else 0)
         action = None
 
-        if entry and strategy == "keep" and not _money_equal(existing_value, amount):
+        if current and strategy == "keep" and not _money_equal(existing_value, amount):
             result["kept"] += 1
             action = "kept"
         else:
-            if not entry:
+            if not current:
                 try:
-                    album_uuid = uuid.UUID(aid)
+                    key_uuid = uuid.UUID(key)
                 except Exception:
                     continue
-                entry = AlbumRevenueEntry(
-                    album_id=album_uuid,
-                    period_type=period_type,
-                    period_start=period_start,
-                    period_end=period_end,
-                    is_base=True,
-                    name=None,
-                    gross=Decimal("0"),
-                    net=Decimal("0"),
-                )
-                session_db.add(entry)
-                existing_by_album[aid] = entry
+                current = current_by_key[key] = [None, Decimal("0")]
+                to_insert[key] = {
+                    key_field: key_uuid,
+                    "period_type": period_type,
+                    "period_start": period_start,
+                    "period_end": period_end,
+                    "is_base": True,
+                    "name": None,
+                    "gross": Decimal("0"),
+                    "net": Decimal("0"),
+                }
                 result["created"] += 1
                 action = "created"
             else:
@@ -11209,9 +11486,11 @@ def _apply_album_income_import_items(session_db, items: list[dict], period_type:
                     action = "updated"
 
             if strategy != "keep" or not _money_equal(existing_value, amount):
-                setattr(entry, field_name, amount)
-                entry.period_end = period_end
-                entry.updated_at = func.now()
+                current[1] = amount
+                if current[0] is None:
+                    to_insert[key][field_name] = amount
+                else:
+                    to_update[key] = {"id": current[0], field_name: amount, "period_end": period_end, "updated_at": now}
                 if action not in ("created", "replaced", "unchanged"):
                     action = "updated"
 
@@ -11224,103 +11503,19 @@ def _apply_album_income_import_items(session_db, items: list[dict], period_type:
             }
         )
 
+    if to_insert:
+        session_db.execute(insert(model), list(to_insert.values()))
+    if to_update:
+        session_db.bulk_update_mappings(model, list(to_update.values()))
     return result
 
 
-def _apply_income_import_items(session_db, items: list[dict], period_type: str, period_start: date, period_end: date, amount_kind: str, strategy: str = "replace") -> dict:
-    result = {
-        "created": 0,
-        "updated": 0,
-        "unchanged": 0,
-        "kept": 0,
-        "replaced": 0,
-        "actions": [],
-    }
-    if not items:
-        return result
-
-    song_ids = []
-    for item in items:
-        try:
-            song_ids.append(uuid.UUID(str(item.get("song_id") or "")))
-        except Exception:
-            continue
-
-    if not song_ids:
-        return result
-
-    existing_rows = (
-        session_db.query(SongRevenueEntry)
-        .filter(SongRevenueEntry.song_id.in_(song_ids))
-        .filter(SongRevenueEntry.period_type == period_type)
-        .filter(SongRevenueEntry.period_start == period_start)
-        .filter(SongRevenueEntry.is_base.is_(True))
-        .all()
-    )
-    existing_by_song = {str(row.song_id): row for row in existing_rows}
-
-    for item in items:
-        sid = str(item.get("song_id") or "")
-        amount = _money_norm(item.get("new_value") or item.get("amount") or 0)
-        if not sid:
-            continue
-
-        entry = existing_by_song.get(sid)
-        field_name = "gross" if amount_kind == "gross" else "net"
-        existing_value = _money_norm(getattr(entry, field_name, 0) if entry else 0)
-        action = None
-
-        if entry and strategy == "keep" and not _money_equal(existing_value, amount):
-            result["kept"] += 1
-            action = "kept"
-        else:
-            if not entry:
-                try:
-                    song_uuid = uuid.UUID(sid)
-                except Exception:
-                    continue
-                entry = SongRevenueEntry(
-                    song_id=song_uuid,
-                    period_type=period_type,
-                    period_start=period_start,
-                    period_end=period_end,
-                    is_base=True,
-                    name=None,
-                    gross=Decimal("0"),
-                    net=Decimal("0"),
-                )
-                session_db.add(entry)
-                existing_by_song[sid] = entry
-                result["created"] += 1
-                action = "created"
-            else:
-                if strategy == "replace" and not _money_equal(existing_value, amount):
-                    result["replaced"] += 1
-                    action = "replaced"
-                elif _money_equal(existing_value, amount):
-                    result["unchanged"] += 1
-                    action = "unchanged"
-                else:
-                    result["updated"] += 1
-                    action = "updated"
+def _apply_album_income_import_items(session_db, items: list[dict], period_type: str, period_start: date, period_end: date, amount_kind: str, strategy: str = "replace") -> dict:
+    return _apply_revenue_import_items(session_db, AlbumRevenueEntry, "album_id", items, period_type, period_start, period_end, amount_kind, strategy)
 
-            if strategy != "keep" or not _money_equal(existing_value, amount):
-                setattr(entry, field_name, amount)
-                entry.period_end = period_end
-                entry.updated_at = func.now()
-                if action not in ("created", "replaced", "unchanged"):
-                    action = "updated"
 
-        result["actions"].append(
-            {
-                **item,
-                "existing_value": str(existing_value),
-                "new_value": str(amount),
-                "action": action or "updated",
-            }
-        )
-
-    return result
+def _apply_income_import_items(session_db, items: list[dict], period_type: str, period_start: date, period_end: date, amount_kind: str, strategy: str = "replace") -> dict:
+    return _apply_revenue_import_items(session_db, SongRevenueEntry, "song_id", items, period_type, period_start, period_end, amount_kind, strategy)
 
 @app.get("/discografica")
 @admin_required
@@ -11455,44 +11650,38 @@ def discografica_view():
     product_code_series_rows = []
 
     if section == "canciones":
+        artist_ids = [a.id for a in artists]
         if repertorio_tab == "canciones":
-            for a in artists:
-                songs = (
-                    session_db.query(Song)
-                    .join(SongArtist, Song.id == SongArtist.song_id)
-                    .filter(SongArtist.artist_id == a.id)
+            # Una sola consulta para todos los artistas (+ los intérpretes de cada canción en otra),
+            # repartida luego por artista; antes eran dos consultas por artista.
+            songs_by_artist = defaultdict(list)
+            if artist_ids:
+                for aid, song in (
+                    session_db.query(SongArtist.artist_id, Song)
+                    .join(Song, Song.id == SongArtist.song_id)
+                    .filter(SongArtist.artist_id.in_(artist_ids))
+                    .options(selectinload(Song.artists), *_n1_guard())
                     .order_by(Song.release_date.desc())
                     .all()
-                )
-                for s in songs:
-                    _ = s.artists
-                if songs:
-                    artist_blocks.append((a, songs))
+                ):
+                    songs_by_artist[aid].append(song)
+            artist_blocks.extend((a, songs_by_artist[a.id]) for a in artists if songs_by_artist.get(a.id))
 
             # Prefetch ISRC AUDIO principal por canción (song_isrc_codes),
             # para mostrarlo en el repertorio.
             all_song_ids = [s.id for _, ss in artist_blocks for s in (ss or [])]
-            if all_song_ids:
-                rows = (
-                    session_db.query(SongISRCCode.song_id, SongISRCCode.code)
-                    .filter(SongISRCCode.song_id.in_(all_song_ids))
-                    .filter(func.upper(SongISRCCode.kind) == "AUDIO")
-                    .filter(SongISRCCode.is_primary == True)  # noqa: E712
-                    .all()
-                )
-                for sid, code in rows:
-                    if sid and code:
-                        song_audio_isrc_map[sid] = code
+            song_audio_isrc_map.update(_primary_audio_isrc_map(session_db, all_song_ids, normalize=False))
         else:
-            for a in artists:
-                albums = (
+            albums_by_artist = defaultdict(list)
+            if artist_ids:
+                for album in (
                     session_db.query(Album)
-                    .filter(Album.artist_id == a.id)
+                    .filter(Album.artist_id.in_(artist_ids))
                     .order_by(Album.release_date.desc(), Album.title.asc())
                     .all()
-                )
-                if albums:
-                    album_blocks.append((a, albums))
+                ):
+                    albums_by_artist[album.artist_id].append(album)
+            album_blocks.extend((a, albums_by_artist[a.id]) for a in artists if albums_by_artist.get(a.id))
 
 
 
@@ -11799,6 +11988,13 @@ def discografica_view():
         sem_start, sem_end = _semester_range(sem_year, sem_half)
 
         # 2) Construcción de pestañas
+        # ~26 enlaces que solo cambian en la query: el prefijo se resuelve UNA vez con url_for y el
+        # resto se concatena (mismos parámetros y en el mismo orden que generaba url_for).
+        ingresos_base_url = url_for("discografica_view", section="ingresos")
+
+        def ingresos_url(**params) -> str:
+            return ingresos_base_url + "&" + urlencode(params)
+
         # Meses (12 últimos meses, empezando desde el cursor)
         income_month_tabs = []
         for i in range(12):
@@ -11809,9 +12005,7 @@ def discografica_view():
                     "key": key,
                     "label": _month_label(d),
                     "is_active": key == sel_month_key,
-                    "url": url_for(
-                        "discografica_view",
-                        section="ingresos",
+                    "url": ingresos_url(
                         view="month",
                         m=key,
                         mc=cursor_key,
@@ -11822,9 +12016,7 @@ def discografica_view():
 
         # Flechas meses
         left_cursor = _add_months(cursor_start, -1)
-        income_month_prev_url = url_for(
-            "discografica_view",
-            section="ingresos",
+        income_month_prev_url = ingresos_url(
             view="month",
             m=_month_key(left_cursor),
             mc=_month_key(left_cursor),
@@ -11832,9 +12024,7 @@ def discografica_view():
         )
         if cursor_start < prev_month_start:
             right_cursor = _add_months(cursor_start, 1)
-            income_month_next_url = url_for(
-                "discografica_view",
-                section="ingresos",
+            income_month_next_url = ingresos_url(
                 view="month",
                 m=_month_key(right_cursor),
                 mc=_month_key(right_cursor),
@@ -11853,9 +12043,7 @@ def discografica_view():
                     "key": k,
                     "label": _semester_label(y, h),
                     "is_active": k == sem_key,
-                    "url": url_for(
-                        "discografica_view",
-                        section="ingresos",
+                    "url": ingresos_url(
                         view="semester",
                         s=k,
                         m=sel_month_key,
@@ -11883,40 +12071,39 @@ def discografica_view():
             income_report_months_selected = [sel_month_key]
 
         # 4) Opciones para informe (últimos 24 meses / 12 semestres)
-        income_report_months = [
-            {"key": _month_key(_add_months(prev_month_start, -i)), "label": _month_label(_add_months(prev_month_start, -i))}
-            for i in range(24)
-        ]
+        report_months = [_add_months(prev_month_start, -i) for i in range(24)]
+        income_report_months = [{"key": _month_key(d), "label": _month_label(d)} for d in report_months]
 
         base_sem_year, base_sem_half = (today.year - 1, 2) if today.month <= 6 else (today.year, 1)
+        report_semesters = [_add_semesters(base_sem_year, base_sem_half, -i) for i in range(12)]
         income_report_semesters = [
-            {
-                "key": _semester_key(*_add_semesters(base_sem_year, base_sem_half, -i)),
-                "label": _semester_label(*_add_semesters(base_sem_year, base_sem_half, -i)),
-            }
-            for i in range(12)
+            {"key": _semester_key(y, h), "label": _semester_label(y, h)} for y, h in report_semesters
         ]
 
         # 5) Canciones publicadas hasta el fin del periodo (ordenadas por artista)
-        tmp_blocks: list[tuple[Artist, list[Song]]] = []
-        for a in artists:
-            songs = (
-                session_db.query(Song)
-                .join(SongArtist, Song.id == SongArtist.song_id)
-                .filter(SongArtist.artist_id == a.id)
+        # Una sola consulta para todos los artistas (antes, una por artista), repartida luego por artista;
+        # los artistas de cada canción llegan con selectinload en vez de tocarlos uno a uno.
+        songs_by_artist = defaultdict(list)
+        income_artist_ids = [a.id for a in artists]
+        if income_artist_ids:
+            for aid, song in (
+                session_db.query(SongArtist.artist_id, Song)
+                .join(Song, Song.id == SongArtist.song_id)
+                .filter(SongArtist.artist_id.in_(income_artist_ids))
                 .filter(Song.release_date <= period_end)
+                .options(selectinload(Song.artists), *_n1_guard())
                 .order_by(Song.release_date.desc())
                 .all()
-            )
-            for s in songs:
-                _ = s.artists
-            if songs:
-                tmp_blocks.append((a, songs))
+            ):
+                songs_by_artist[aid].append(song)
+        tmp_blocks: list[tuple[Artist, list[Song]]] = [
+            (a, songs_by_artist[a.id]) for a in artists if songs_by_artist.get(a.id)
+        ]
 
         all_song_ids = [s.id for _, ss in tmp_blocks for s in (ss or [])]
 
         # Prefetch intérpretes (si no hay, usamos artistas del tema)
-        interpreters_by_song: dict[str, list[str]] = {}
+        interpreters_by_song: dict[str, list[str]] = defaultdict(list)
         if all_song_ids:
             irows = (
                 session_db.query(SongInterpreter.song_id, SongInterpreter.name)
@@ -11926,26 +12113,27 @@ def discografica_view():
             )
             for sid, name in irows:
                 if sid and name:
-                    interpreters_by_song.setdefault(str(sid), []).append(name)
+                    interpreters_by_song[str(sid)].append(name)
 
         # Prefetch ISRC principal (AUDIO) o fallback a Song.isrc
         isrc_by_song: dict[str, str] = {}
         if all_song_ids:
+            # DISTINCT ON (song_id): la BD devuelve ya una fila por canción (la principal, si la hay).
             r_isrc = (
-                session_db.query(SongISRCCode.song_id, SongISRCCode.code, SongISRCCode.is_primary)
+                session_db.query(SongISRCCode.song_id, SongISRCCode.code)
                 .filter(SongISRCCode.song_id.in_(all_song_ids))
-                .filter(func.upper(SongISRCCode.kind) == "AUDIO")
-                .order_by(SongISRCCode.is_primary.desc(), SongISRCCode.code.desc())
+                .filter(SongISRCCode.kind == "AUDIO")
+                .filter(SongISRCCode.code.isnot(None), SongISRCCode.code != "")
+                .distinct(SongISRCCode.song_id)
+                .order_by(SongISRCCode.song_id, SongISRCCode.is_primary.desc(), SongISRCCode.code.desc())
                 .all()
             )
-            for sid, code, _prim in r_isrc:
-                sid_s = str(sid)
-                if sid_s not in isrc_by_song and code:
-                    isrc_by_song[sid_s] = code
+            isrc_by_song = {str(sid): code for sid, code in r_isrc}
 
         # Prefetch ingresos
-        entries_by_song_period: dict[tuple[str, str, date], list[SongRevenueEntry]] = {}
+        entries_by_song_period: dict[tuple[str, str, date], list[SongRevenueEntry]] = defaultdict(list)
         sem_month_starts: list[date] = []
+        month_sums_by_song: dict[str, tuple[int, Decimal, Decimal]] = {}  # sid -> (meses con datos, bruto, neto)
         if income_view == "semester":
             sem_month_starts = [_add_months(date(sem_start.year, sem_start.month, 1), i) for i in range(6)]
 
@@ -11958,20 +12146,33 @@ def discografica_view():
                     .filter(SongRevenueEntry.period_start == period_start)
                 )
             else:
+                # Del semestre hacen falta las filas (base/extras editables); de sus meses, solo
+                # cuántos tienen datos y la suma: eso lo agrega la BD (GROUP BY) sin traer cada fila.
                 q = (
                     session_db.query(SongRevenueEntry)
                     .filter(SongRevenueEntry.song_id.in_(all_song_ids))
-                    .filter(
-                        or_(
-                            and_(SongRevenueEntry.period_type == "SEMESTER", SongRevenueEntry.period_start == sem_start),
-                            and_(SongRevenueEntry.period_type == "MONTH", SongRevenueEntry.period_start.in_(sem_month_starts)),
-                        )
-                    )
+                    .filter(SongRevenueEntry.period_type == "SEMESTER")
+                    .filter(SongRevenueEntry.period_start == sem_start)
                 )
+                for sid, _ms, g_sum, n_sum in (
+                    session_db.query(
+                        SongRevenueEntry.song_id,
+                        SongRevenueEntry.period_start,
+                        func.sum(SongRevenueEntry.gross),
+                        func.sum(SongRevenueEntry.net),
+                    )
+                    .filter(SongRevenueEntry.song_id.in_(all_song_ids))
+                    .filter(SongRevenueEntry.period_type == "MONTH")
+                    .filter(SongRevenueEntry.period_start.in_(sem_month_starts))
+                    .group_by(SongRevenueEntry.song_id, SongRevenueEntry.period_start)
+                    .all()
+                ):
+                    months, acc_g, acc_n = month_sums_by_song.get(str(sid), (0, _ZERO_DEC, _ZERO_DEC))
+                    month_sums_by_song[str(sid)] = (months + 1, acc_g + (g_sum or _ZERO_DEC), acc_n + (n_sum or _ZERO_DEC))
 
             erows = q.order_by(SongRevenueEntry.is_base.desc(), SongRevenueEntry.created_at.asc()).all()
             for e in erows:
-                entries_by_song_period.setdefault((str(e.song_id), e.period_type, e.period_start), []).append(e)
+                entries_by_song_period[(str(e.song_id), e.period_type, e.period_start)].append(e)
 
         def _money_input(v: Decimal | None) -> str:
             if v is None:
@@ -12000,11 +12201,9 @@ def discografica_view():
                 # entradas del periodo
                 if income_view == "month":
                     entries = entries_by_song_period.get((sid, "MONTH", period_start), [])
-                    base = next((x for x in entries if x.is_base), None)
-                    extras = [x for x in entries if not x.is_base]
+                    base, extras = _split_base_entries(entries)
 
-                    total_gross = sum((Decimal(x.gross or 0) for x in entries), Decimal("0"))
-                    total_net = sum((Decimal(x.net or 0) for x in entries), Decimal("0"))
+                    total_gross, total_net = _revenue_entries_totals(entries)
 
                     status = {"label": "Completo" if entries else "Sin datos", "class": "text-bg-success" if entries else "text-bg-danger"}
 
@@ -12033,20 +12232,12 @@ def discografica_view():
                     )
 
                 else:
-                    sem_entries = entries_by_song_period.get((sid, "SEMESTER", sem_start), [])
-                    base = next((x for x in sem_entries if x.is_base), None)
-                    extras = [x for x in sem_entries if not x.is_base]
-
-                    # suma de meses
-                    months_with_data = 0
-                    sum_gross = Decimal("0")
-                    sum_net = Decimal("0")
-                    for ms in sem_month_starts:
-                        mentries = entries_by_song_period.get((sid, "MONTH", ms), [])
-                        if mentries:
-                            months_with_data += 1
-                        sum_gross += sum((Decimal(x.gross or 0) for x in mentries), Decimal("0"))
-                        sum_net += sum((Decimal(x.net or 0) for x in mentries), Decimal("0"))
+                    # La cola larga del catálogo no tiene filas del semestre: ni se recorren ni se suman.
+                    sem_entries = entries_by_song_period.get((sid, "SEMESTER", sem_start))
+                    base, extras = _split_base_entries(sem_entries) if sem_entries else (None, [])
+
+                    # suma de meses (ya agregada en SQL)
+                    months_with_data, sum_gross, sum_net = month_sums_by_song.get(sid, (0, _ZERO_DEC, _ZERO_DEC))
 
                     missing = 6 - months_with_data
 
@@ -12061,8 +12252,7 @@ def discografica_view():
                     display_gross = base.gross if base else sum_gross
                     display_net = base.net if base else sum_net
 
-                    extras_gross = sum((Decimal(x.gross or 0) for x in extras), Decimal("0"))
-                    extras_net = sum((Decimal(x.net or 0) for x in extras), Decimal("0"))
+                    extras_gross, extras_net = _revenue_entries_totals(extras) if extras else (_ZERO_DEC, _ZERO_DEC)
 
                     # Total mostrado (base manual o auto + extras) solo cuando hay más de un ingreso (extras).
                     total_gross = Decimal(display_gross or 0) + extras_gross
@@ -12110,27 +12300,21 @@ def discografica_view():
             | (func.coalesce(Song.is_distribution, False) == True)  # noqa: E712
         )
 
-        # años disponibles (release_date) SOLO de canciones con ISRC y filtro de propiedad
-        years_rows = (
-            session_db.query(func.extract("year", Song.release_date).label("y"))
+        # Años disponibles (release_date) y artistas, SOLO de canciones con ISRC y filtro de propiedad:
+        # una sola pasada por Song + ISRC que devuelve los pares (año, artista) distintos. El OUTER JOIN
+        # a SongArtist mantiene los años de canciones sin artista, como antes.
+        year_expr = func.extract("year", Song.release_date)
+        year_artist_rows = (
+            session_db.query(year_expr.label("y"), SongArtist.artist_id)
+            .select_from(Song)
             .join(SongISRCCode, SongISRCCode.song_id == Song.id)
+            .outerjoin(SongArtist, SongArtist.song_id == Song.id)
             .filter(ownership_cond)
             .distinct()
-            .order_by(func.extract("year", Song.release_date).desc())
             .all()
         )
-        isrc_years = [int(r.y) for r in years_rows if r and r.y]
-
-        # Artistas con canciones con ISRC (y filtro de propiedad)
-        arows = (
-            session_db.query(SongArtist.artist_id)
-            .join(Song, Song.id == SongArtist.song_id)
-            .join(SongISRCCode, SongISRCCode.song_id == Song.id)
-            .filter(ownership_cond)
-            .distinct()
-            .all()
-        )
-        a_set = {r.artist_id for r in arows if r and r.artist_id}
+        isrc_years = sorted({int(y) for y, _aid in year_artist_rows if y}, reverse=True)
+        a_set = {aid for _y, aid in year_artist_rows if aid}
         isrc_filter_artists = [a for a in artists if a.id in a_set]
         isrc_current_filter_artists = list(isrc_filter_artists)
 
@@ -12152,25 +12336,29 @@ def discografica_view():
                 .subquery()
             )
 
-            songs_by_artist: dict = {}
+            # Una consulta para todos los artistas (antes, una por artista); el orden por código se
+            # conserva dentro de cada artista al repartir.
+            songs_by_artist: dict = defaultdict(list)
             all_song_ids: list = []
-            for a in artists_iter:
+            if artists_iter:
                 q = (
-                    session_db.query(Song)
-                    .join(SongArtist, Song.id == SongArtist.song_id)
+                    session_db.query(SongArtist.artist_id, Song)
+                    .join(Song, Song.id == SongArtist.song_id)
                     .join(max_code_sq, max_code_sq.c.song_id == Song.id)
-                    .filter(SongArtist.artist_id == a.id)
+                    .filter(SongArtist.artist_id.in_([a.id for a in artists_iter]))
                     .filter(ownership_cond)
+                    # La plantilla y las columnas de colaborador leen `s.artists` de cada canción.
+                    .options(selectinload(Song.artists), *_n1_guard())
                 )
                 if f_year:
-                    q = q.filter(func.extract("year", Song.release_date) == f_year)
+                    q = q.filter(year_expr == f_year)
 
-                songs = q.order_by(max_code_sq.c.max_code.desc()).all()
-                songs_by_artist[a.id] = songs
-                all_song_ids.extend([s.id for s in songs])
+                for aid, song in q.order_by(max_code_sq.c.max_code.desc()).all():
+                    songs_by_artist[aid].append(song)
+                    all_song_ids.append(song.id)
 
             # Prefetch TODOS los ISRCs (incl. subproductos), ordenados por código desc
-            codes_by_song = {}
+            codes_by_song = defaultdict(list)
             if all_song_ids:
                 rows = (
                     session_db.query(SongISRCCode)
@@ -12179,7 +12367,7 @@ def discografica_view():
                     .all()
                 )
                 for r in rows:
-                    codes_by_song.setdefault(r.song_id, []).append(r)
+                    codes_by_song[r.song_id].append(r)
 
             for a in artists_iter:
                 songs = songs_by_artist.get(a.id) or []
@@ -12227,7 +12415,7 @@ def discografica_view():
                 .join(SongISRCCode, SongISRCCode.song_id == Song.id)
                 .filter(ownership_cond)
                 .distinct()
-                .options(selectinload(Song.artists))
+                .options(selectinload(Song.artists), *_n1_guard())
                 .order_by(Song.release_date.desc(), Song.title.asc())
                 .all()
             )
@@ -13826,13 +14014,25 @@ def discografica_advance_pdf(aid):
             data_pills.insert(0, "Adelanto: " + adv.label)
         cond_pills = [_advance_rule_pdf_text(r, artist_by_id) for r in (adv.rules or [])] or ["Sin condiciones configuradas"]
         exc_pills = []
+        # Títulos de las canciones exceptuadas: diccionario por id (no un recorrido de la lista por
+        # excepción) y las que no están en el bloque, en una sola consulta.
+        song_title_by_id = {str(s.id): s.title for s in blk_songs}
+        missing_song_ids = {
+            to_uuid(str(e.target_id)) for e in (adv.exceptions or [])
+            if (e.kind or "").upper() != "ARTIST" and str(e.target_id) not in song_title_by_id
+        } - {None}
+        if missing_song_ids:
+            song_title_by_id.update(
+                (str(sid), title)
+                for sid, title in session_db.query(Song.id, Song.title).filter(Song.id.in_(missing_song_ids)).all()
+            )
         for e in (adv.exceptions or []):
             if (e.kind or "").upper() == "ARTIST":
                 a = artist_by_id.get(str(e.target_id))
                 exc_pills.append("Artista: " + (a.name if a else "eliminado"))
             else:
-                sng = next((s for s in blk_songs if str(s.id) == str(e.target_id)), None)
-                exc_pills.append("Canción: " + (sng.title if sng else "eliminada"))
+                title = song_title_by_id.get(str(e.target_id))
+                exc_pills.append("Canción: " + (title if title is not None else "eliminada"))
 
         groups = [
             ("DATOS DEL ADELANTO", data_pills, colors.HexColor("#f6f8fa"), colors.HexColor("#c9d2dc"), colors.HexColor("#212529")),
@@ -14601,12 +14801,6 @@ def discografica_income_upload_csv():
         pe = date(ps.year, 6, 30) if ps.month <= 6 else date(ps.year, 12, 31)
         period_label = _semester_label(ps.year, 1 if ps.month <= 6 else 2)
 
-    try:
-        import pandas as pd
-    except Exception:
-        flash("Falta la dependencia pandas para importar CSV.", "danger")
-        return redirect(next_url)
-
     parsed_rows = []
     rows_total = 0
     files_processed = 0
@@ -14629,15 +14823,14 @@ def discografica_income_upload_csv():
             # extensión .csv; antes esas filas no casaban con ninguna columna y el import quedaba a 0).
             _sep_counts = {",": first_line.count(","), ";": first_line.count(";"), "\t": first_line.count("\t")}
             sep = max(_sep_counts, key=lambda k: _sep_counts[k]) if any(_sep_counts.values()) else ","
-            from io import StringIO
-            # dtype=str: TODO como texto — si no, pandas convierte los Product Code numéricos a
-            # float («286022.0») y luego no casan con los códigos configurados en la app.
-            df = pd.read_csv(StringIO(decoded), sep=sep, dtype=str)
+            # csv de la stdlib en una sola pasada (antes pandas solo para leer y sumar). Todo llega
+            # como texto: los Product Code numéricos no se convierten a float («286022.0»).
+            reader = csv.DictReader(io.StringIO(decoded), delimiter=sep)
+            cols = list(reader.fieldnames or [])
         except Exception as e:
             flash(f"Error leyendo CSV '{getattr(uploaded, 'filename', 'archivo')}': {e}", "danger")
             return redirect(next_url)
 
-        cols = list(df.columns)
         file_isrc_col = _pick_existing(cols, [isrc_col, "ISRC"])
         file_product_code_col = _pick_existing(cols, ["Product Code", "PRODUCT CODE", "Product code"])
         file_track_col = _pick_existing(cols, [track_col, "Track", "TITLE", "Title", "Song Title", "Name", "Album Title"])
@@ -14671,36 +14864,37 @@ def discografica_income_upload_csv():
             )
             return redirect(next_url)
 
-        df["__row_number"] = range(2, len(df) + 2)
-        df["__isrc"] = df[file_isrc_col].map(_clean_csv_cell).map(_norm_isrc) if file_isrc_col else ""
-        df["__product_code"] = df[file_product_code_col].map(_clean_csv_cell).map(_norm_product_code) if file_product_code_col else ""
-        df["__amount"] = df[file_amount_col].apply(_parse_money_decimal).map(_money_norm)
-        rows_total += int(len(df.index))
         files_processed += 1
 
-        # to_dict('records') en vez de iterrows(): iterrows crea una Series por fila (muy lento en
-        # extractos de decenas/cientos de miles de filas y podía agotar el timeout del proxy →
-        # «No se pudo completar la subida»). Mismo resultado, mucho más rápido.
         _file_name = getattr(uploaded, "filename", "archivo.csv")
-        for rec in df.to_dict("records"):
-            raw_row = {col: _clean_csv_cell(rec.get(col)) for col in cols}
-            _track_val = _clean_csv_cell(rec.get(file_track_col)) if file_track_col else ""
-            # Fila-RESUMEN del extracto («Total» al final, sin ISRC ni Product Code): fuera en
-            # silencio — no es una canción y solo metía ruido en «filas sin match».
-            if _track_val.strip().lower() in ("total", "totales") and not str(rec.get("__isrc") or "") and not str(rec.get("__product_code") or ""):
-                continue
-            parsed_rows.append(
-                {
-                    "file_name": _file_name,
-                    "row_number": int(rec.get("__row_number") or 0),
-                    "raw_row": raw_row,
-                    "isrc": str(rec.get("__isrc") or ""),
-                    "product_code": str(rec.get("__product_code") or ""),
-                    "amount": _money_norm(rec.get("__amount") or 0),
-                    "track": _track_val,
-                    "primary_artist": _clean_csv_cell(rec.get("Primary Artist") or rec.get("ARTIST") or rec.get("Artist")),
-                }
-            )
+        row_number = 1
+        try:
+            for rec in reader:
+                # Número de fila como en el archivo (cabecera = 1); las líneas vacías no cuentan.
+                row_number += 1
+                rows_total += 1
+                norm_isrc = _norm_isrc(_clean_csv_cell(rec.get(file_isrc_col))) if file_isrc_col else ""
+                norm_product_code = _norm_product_code(rec.get(file_product_code_col)) if file_product_code_col else ""
+                _track_val = _clean_csv_cell(rec.get(file_track_col)) if file_track_col else ""
+                # Fila-RESUMEN del extracto («Total» al final, sin ISRC ni Product Code): fuera en
+                # silencio — no es una canción y solo metía ruido en «filas sin match».
+                if _track_val.strip().lower() in ("total", "totales") and not norm_isrc and not norm_product_code:
+                    continue
+                parsed_rows.append(
+                    {
+                        "file_name": _file_name,
+                        "row_number": row_number,
+                        "raw_row": {col: _clean_csv_cell(rec.get(col)) for col in cols},
+                        "isrc": norm_isrc or "",
+                        "product_code": norm_product_code or "",
+                        "amount": _money_norm(_parse_money_decimal(rec.get(file_amount_col))),
+                        "track": _track_val,
+                        "primary_artist": _clean_csv_cell(rec.get("Primary Artist") or rec.get("ARTIST") or rec.get("Artist")),
+                    }
+                )
+        except csv.Error as e:
+            flash(f"Error leyendo CSV '{_file_name}' (fila {row_number}): {e}", "danger")
+            return redirect(next_url)
 
     with get_db() as session_db:
         song_rows = session_db.query(Song.id, Song.title, Song.release_date, Song.isrc).all()
@@ -15248,7 +15442,7 @@ def discografica_income_report_pdf():
             code_rows = (
                 session_db.query(SongISRCCode.song_id, SongISRCCode.code, SongISRCCode.is_primary)
                 .filter(SongISRCCode.song_id.in_(song_ids))
-                .filter(func.upper(SongISRCCode.kind) == "AUDIO")
+                .filter(SongISRCCode.kind == "AUDIO")
                 .order_by(SongISRCCode.song_id.asc(), SongISRCCode.is_primary.desc(), SongISRCCode.code.asc())
                 .all()
             )
@@ -17593,7 +17787,7 @@ def _song_primary_audio_isrc_sequence(session_db, song_id) -> int | None:
     row = (
         session_db.query(SongISRCCode)
         .filter(SongISRCCode.song_id == song_id)
-        .filter(func.upper(SongISRCCode.kind) == 'AUDIO')
+        .filter(SongISRCCode.kind == 'AUDIO')
         .filter(SongISRCCode.is_primary == True)  # noqa: E712
         .order_by(SongISRCCode.created_at.asc())
         .first()
@@ -17631,7 +17825,7 @@ def _generate_isrc(session_db, *, kind: str, artist_id, country: str, matrix: st
         session_db.query(SongISRCCode.code, SongISRCCode.sequence_num)
         .filter(SongISRCCode.artist_id == artist_id)
         .filter(SongISRCCode.year == cfg_year)
-        .filter(func.upper(SongISRCCode.kind) == kind)
+        .filter(SongISRCCode.kind == kind)
         .all()
     )
     used_sequences = set()
@@ -17789,7 +17983,7 @@ def discografica_song_isrc_delete(song_id, code_id):
                     other = (
                         session_db.query(SongISRCCode)
                         .filter(SongISRCCode.song_id == sid)
-                        .filter(func.upper(SongISRCCode.kind) == "AUDIO")
+                        .filter(SongISRCCode.kind == "AUDIO")
                         .filter(SongISRCCode.is_primary == True)  # noqa: E712
                         .first()
                     )
@@ -20868,26 +21062,17 @@ def discografica_album_detail(album_id):
     primary_audio_isrc = {}
     interpreter_map = defaultdict(list)
     if song_ids:
-        isrc_rows = (
-            session_db.query(SongISRCCode.song_id, SongISRCCode.code)
-            .filter(SongISRCCode.song_id.in_(song_ids))
-            .filter(func.upper(SongISRCCode.kind) == "AUDIO")
-            .filter(SongISRCCode.is_primary == True)  # noqa: E712
-            .all()
-        )
-        for sid, code in isrc_rows:
-            if sid and code and sid not in primary_audio_isrc:
-                primary_audio_isrc[sid] = _norm_isrc(code)
+        primary_audio_isrc.update(_primary_audio_isrc_map(session_db, song_ids))
 
         interp_rows = (
-            session_db.query(SongInterpreter)
+            session_db.query(SongInterpreter.song_id, SongInterpreter.name)
             .filter(SongInterpreter.song_id.in_(song_ids))
             .order_by(SongInterpreter.song_id.asc(), SongInterpreter.is_main.desc(), SongInterpreter.created_at.asc())
             .all()
         )
-        for row in interp_rows:
-            if row.song_id:
-                interpreter_map[row.song_id].append((row.name or "").strip())
+        for sid, name in interp_rows:
+            if sid:
+                interpreter_map[sid].append((name or "").strip())
 
     track_rows = []
     for row in track_links:
@@ -21840,19 +22025,6 @@ def songs_view():
 
 
 
-    # filtros (solo para vista)
-    f_artist_ids = request.args.getlist("artist") or []
-    f_sale_types = request.args.getlist("type") or []
-    f_statuses = request.args.getlist("status") or []
-
-    f_artist_ids = [to_uuid(x) for x in f_artist_ids if (x or "").strip()]
-    f_sale_types = [(x or "").strip().upper() for x in f_sale_types if (x or "").strip()]
-    f_statuses = [(x or "").strip().upper() for x in f_statuses if (x or "").strip()]
-
-    # sanitizar
-    f_sale_types = [x for x in f_sale_types if x in CONCERT_SALE_TYPES_ALL_SET]
-    f_statuses = [x for x in f_statuses if x in ("BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO")]
-
     if request.method == "POST":
         title = request.form.get("title", "").strip()
         release_date = parse_date(request.form.get("release_date"))
@@ -24040,9 +24212,16 @@ def _parse_optional_int(value: str | None, *, min_v: int | None = None, max_v: i
     s = (value or "").strip()
     if not s:
         return None
-    try:
+    # Se valida ANTES de convertir: lanzar y capturar la excepción de int() es lo caro con filas de
+    # basura. Lo único más que acepta int() es el «1_000», que sigue por el camino con try.
+    if s.isdecimal() or (s[0] in "+-" and s[1:].isdecimal()):
         n = int(s)
-    except Exception:
+    elif "_" in s:
+        try:
+            n = int(s)
+        except Exception:
+            return None
+    else:
         return None
     if min_v is not None:
         n = max(min_v, n)
@@ -24106,36 +24285,37 @@ def _parse_share_rows(ids, pct_list, pct_base_list, amount_list, amount_base_lis
 def _replace_concert_promoter_shares(session, concert_id, rows):
     session.query(ConcertPromoterShare).filter_by(concert_id=concert_id).delete(synchronize_session=False)
     session.flush()
-    for r in rows:
-        promoter_id = to_uuid(r["id"])
-        promoter_company_id = to_uuid(r.get("company_id") or None)
-        session.add(
-            ConcertPromoterShare(
-                concert_id=concert_id,
-                promoter_id=promoter_id,
-                promoter_company_id=promoter_company_id,
-                pct=r["pct"],
-                pct_base=r["pct_base"],
-                amount=r["amount"],
-                amount_base=r["amount_base"],
-            )
-        )
+    # Un único INSERT multifila (inserción masiva del ORM) en vez de un objeto por participación.
+    if rows:
+        session.execute(insert(ConcertPromoterShare), [
+            {
+                "concert_id": concert_id,
+                "promoter_id": to_uuid(r["id"]),
+                "promoter_company_id": to_uuid(r.get("company_id") or None),
+                "pct": r["pct"],
+                "pct_base": r["pct_base"],
+                "amount": r["amount"],
+                "amount_base": r["amount_base"],
+            }
+            for r in rows
+        ])
 
 
 def _replace_concert_company_shares(session, concert_id, rows):
     session.query(ConcertCompanyShare).filter_by(concert_id=concert_id).delete(synchronize_session=False)
     session.flush()
-    for r in rows:
-        session.add(
-            ConcertCompanyShare(
-                concert_id=concert_id,
-                company_id=to_uuid(r["id"]),
-                pct=r["pct"],
-                pct_base=r["pct_base"],
-                amount=r["amount"],
-                amount_base=r["amount_base"],
-            )
-        )
+    if rows:
+        session.execute(insert(ConcertCompanyShare), [
+            {
+                "concert_id": concert_id,
+                "company_id": to_uuid(r["id"]),
+                "pct": r["pct"],
+                "pct_base": r["pct_base"],
+                "amount": r["amount"],
+                "amount_base": r["amount_base"],
+            }
+            for r in rows
+        ])
 
 
 def _parse_zone_rows(ids, mode_list, pct_list, base_list, amount_list, exempt_list, concept_list):
@@ -30228,8 +30408,6 @@ def concerts_page():
             active_tab = "vista"
 
         f_artist_ids_raw = request.args.getlist("artist") or []
-        f_sale_types_raw = request.args.getlist("type") or []
-        f_statuses_raw = request.args.getlist("status") or []
         f_when_raw = request.args.getlist("when") or []
         f_announcements_raw = request.args.getlist('announcement') or []
         f_concert_tags = _dedupe_concert_tags(request.args.getlist("concert_tag") or request.args.getlist("hashtag") or [])
@@ -30244,28 +30422,24 @@ def concerts_page():
             except Exception:
                 pass
 
-        f_sale_types = [(x or "").strip().upper() for x in f_sale_types_raw if (x or "").strip()]
-        f_statuses = [(x or "").strip().upper() for x in f_statuses_raw if (x or "").strip()]
+        # Una pasada: normalizar e intersecar con los valores válidos (lo que no esté, fuera).
+        f_sale_types = {(x or "").strip().upper() for x in request.args.getlist("type")} & CONCERT_SALE_TYPES_ALL_SET
+        f_statuses = {(x or "").strip().upper() for x in request.args.getlist("status")} & CONCERT_STATUSES_SET
         f_announcements = [(x or '').strip().upper() for x in f_announcements_raw if (x or '').strip()]
 
         f_when = {(x or "").strip().upper() for x in f_when_raw if (x or "").strip()}
-        allowed_when = {"PAST", "FUTURE"}
-        f_when = {x for x in f_when if x in allowed_when}
+        f_when = {x for x in f_when if x in CONCERT_WHEN_SET}
         if not f_when:
             f_when = {"PAST", "FUTURE"} if active_tab == 'facturacion' else {"FUTURE"}
 
-        allowed_sale_types = CONCERT_SALE_TYPES_ALL_SET
-        allowed_statuses = {"BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO"}
         allowed_announcements = {'NO_ANNOUNCE', 'UPCOMING', 'ANNOUNCED', 'NONE'}
 
-        f_sale_types = [x for x in f_sale_types if x in allowed_sale_types]
-        f_statuses = [x for x in f_statuses if x in allowed_statuses]
         f_announcements = [x for x in f_announcements if x in allowed_announcements]
 
         if request.method == "POST":
             try:
                 sale_type = (request.form.get("sale_type") or "EMPRESA").strip().upper()
-                if sale_type not in allowed_sale_types:
+                if sale_type not in CONCERT_SALE_TYPES_ALL_SET:
                     sale_type = "EMPRESA"
 
                 venue_raw = (request.form.get("venue_id") or "").strip()
@@ -33329,19 +33503,6 @@ def concert_contract_delete(cid, ctid):
 def companies_view():
     session = db()
 
-    # filtros (solo para vista)
-    f_artist_ids = request.args.getlist("artist") or []
-    f_sale_types = request.args.getlist("type") or []
-    f_statuses = request.args.getlist("status") or []
-
-    f_artist_ids = [to_uuid(x) for x in f_artist_ids if (x or "").strip()]
-    f_sale_types = [(x or "").strip().upper() for x in f_sale_types if (x or "").strip()]
-    f_statuses = [(x or "").strip().upper() for x in f_statuses if (x or "").strip()]
-
-    # sanitizar
-    f_sale_types = [x for x in f_sale_types if x in CONCERT_SALE_TYPES_ALL_SET]
-    f_statuses = [x for x in f_statuses if x in ("BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO")]
-
     if request.method == "POST":
         name = request.form.get("name","").strip()
         tax_info = request.form.get("tax_info","").strip()
@@ -33943,6 +34104,14 @@ def sales_maps_unified(session, day: date, concert_ids=None):
     return totals, today_map, last_map, gross_map, gross_today_map
 
 
+def _sales_config_pcts(c) -> tuple:
+    """(IVA %, SGAE %) de la configuración de ventas del concierto; (0.0, 0.0) si no tiene."""
+    sc = getattr(c, "sales_config", None)
+    if sc is None:
+        return 0.0, 0.0
+    return float(sc.vat_pct or 0), float(sc.sgae_pct or 0)
+
+
 def _sales_net_breakdown(gross: float, vat_pct: float, sgae_pct: float) -> dict:
     """Calcula neto a partir de bruto aplicando:
 
@@ -34107,6 +34276,25 @@ def _concert_capacity_from_ticket_types(concert: Concert) -> int:
         return 0
 
 
+def _concert_capacity_for_sale(session_db, concert: Concert) -> int:
+    """Igual que `_concert_capacity_from_ticket_types`, pero sumando los aforos por tipo en SQL: para
+    cuando los tipos de entrada no están cargados y solo hace falta el total."""
+    try:
+        s = (
+            session_db.query(func.coalesce(func.sum(ConcertTicketType.qty_for_sale), 0))
+            .filter(ConcertTicketType.concert_id == concert.id)
+            .scalar()
+        )
+        if int(s or 0) > 0:
+            return int(s)
+    except Exception:
+        pass
+    try:
+        return int(getattr(concert, "capacity", 0) or 0)
+    except Exception:
+        return 0
+
+
 def _sync_concert_capacity_from_ticket_types(session_db, concert_id) -> None:
     """Actualiza concerts.capacity como suma de concert_ticket_types.qty_for_sale.
 
@@ -34239,10 +34427,10 @@ def sales_update_view():
         vat_amount_map = {}
         sgae_amount_map = {}
         base_no_vat_map = {}
+        pcts_map = {}
         for c in concerts:
             gross = float(gross_map.get(c.id, 0.0) or 0.0)
-            vat = float(getattr(c.sales_config, "vat_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
-            sgae = float(getattr(c.sales_config, "sgae_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
+            vat, sgae = pcts_map[c.id] = _sales_config_pcts(c)
             br = _sales_net_breakdown(gross, vat, sgae)
             net_map[c.id] = float(br.get("net") or 0.0)
             vat_amount_map[c.id] = float(br.get("vat_amount") or 0.0)
@@ -34363,7 +34551,7 @@ def sales_update_view():
         rebate_net_map = {}
         rebate_net_by_ticketer_map = {}
         for c in concerts:
-            vat_pct = float(getattr(c.sales_config, "vat_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
+            vat_pct = pcts_map[c.id][0]
             cid2 = c.id
             total_rebate_net = 0.0
 
@@ -35260,10 +35448,10 @@ def build_sales_report_context(day: date, *, past=False, promoter_id=None, artis
 
         # Neto (IVA primero, luego SGAE sobre base sin IVA)
         net_map = {}
+        pcts_map = {}
         for c in concerts:
             gross = float(gross_map.get(c.id, 0.0) or 0.0)
-            vat = float(getattr(c.sales_config, "vat_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
-            sgae = float(getattr(c.sales_config, "sgae_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
+            vat, sgae = pcts_map[c.id] = _sales_config_pcts(c)
             net_map[c.id] = float(_sales_net_breakdown(gross, vat, sgae).get("net") or 0.0)
 
         # Rebate neto (por ticketera) — ingreso separado de ventas
@@ -35286,7 +35474,7 @@ def build_sales_report_context(day: date, *, past=False, promoter_id=None, artis
                 ticketer_totals_map.setdefault(cid2, {})[tid2] = {"sold": int(sold or 0), "gross": float(gross or 0.0)}
 
         for c in concerts:
-            vat_pct = float(getattr(c.sales_config, "vat_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
+            vat_pct = pcts_map[c.id][0]
             cid2 = c.id
             total_rebate_net = 0.0
             for ct in (c.ticketers or []):
@@ -35332,6 +35520,21 @@ def build_sales_report_context(day: date, *, past=False, promoter_id=None, artis
             reverse=bool(past),
         )
 
+        # Sujeto y texto de búsqueda de cada tarjeta resueltos aquí una sola vez (la plantilla los
+        # montaba con cadenas de atributos c.venue.* por fila). La cabecera de la tarjeta sigue
+        # pintando recinto/municipio con su propia rama (recinto o datos manuales).
+        card_labels = {}
+        for c in concerts:
+            v = c.venue
+            subject = _subject_name(c) or "—"
+            venue_name = (v.name if v else None) or c.manual_venue_name or ""
+            muni = (v.municipality if v else None) or c.manual_municipality or ""
+            province = (v.province if v else c.manual_province) or ""
+            card_labels[c.id] = {
+                "subject": subject,
+                "search": f"{subject} {venue_name} {muni} {province}".lower(),
+            }
+
         # ¿Actualizado hoy? (por conexión Enterticket hoy, o actualización manual con fecha de hoy).
         updated_map = {}
         for c in concerts:
@@ -35405,6 +35608,7 @@ def build_sales_report_context(day: date, *, past=False, promoter_id=None, artis
             et_stamp=et_stamp,
             kpis=kpis,
             rows=rows,
+            card_labels=card_labels,
             updated_map=updated_map,
             filter_entities=filter_entities,
             entity_key_map=entity_key_map,
@@ -35562,7 +35766,7 @@ def _sales_report_email_html(ctx: dict, *, include_econ: bool, note: str = "") -
 
     def eur(v):
         try:
-            return f"{float(v or 0):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") + " €"
+            return f"{float(v or 0):,.2f}".translate(_ES_NUMBER_TRANS) + " €"
         except Exception:
             return "0,00 €"
 
@@ -36126,10 +36330,10 @@ def sales_update_report_pdf():
         capacity_map = {c.id: _concert_capacity_from_ticket_types(c) for c in concerts}
 
         net_map = {}
+        pcts_map = {}
         for c in concerts:
             gross = float(gross_map.get(c.id, 0.0) or 0.0)
-            vat = float(getattr(c.sales_config, "vat_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
-            sgae = float(getattr(c.sales_config, "sgae_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
+            vat, sgae = pcts_map[c.id] = _sales_config_pcts(c)
             net_map[c.id] = float(_sales_net_breakdown(gross, vat, sgae).get("net") or 0.0)
 
         ticketer_totals_map = {}
@@ -36151,7 +36355,7 @@ def sales_update_report_pdf():
                 ticketer_totals_map.setdefault(cid2, {})[tid2] = {"sold": int(sold or 0), "gross": float(gross or 0.0)}
 
         for c in concerts:
-            vat_pct = float(getattr(c.sales_config, "vat_pct", 0) or 0) if getattr(c, "sales_config", None) else 0.0
+            vat_pct = pcts_map[c.id][0]
             cid2 = c.id
             total_rebate_net = 0.0
             for ct in (c.ticketers or []):
@@ -36398,10 +36602,15 @@ def sales_update_report_pdf():
 
         doc._sales_logo_source = logo_source
         doc.build(story, onFirstPage=_draw_sales_pdf_logo, onLaterPages=_draw_sales_pdf_logo)
-        buf.seek(0)
+        pdf_value = buf.getvalue()
+        buf.close()
 
         filename = f"reporte_ventas_{day.isoformat()}.pdf"
-        return send_file(buf, mimetype="application/pdf", as_attachment=False, download_name=filename)
+        return Response(
+            pdf_value,
+            mimetype="application/pdf",
+            headers={"Content-Disposition": f"inline; filename={filename}", "Cache-Control": "no-store"},
+        )
     finally:
         session_db.close()
 
@@ -36409,177 +36618,157 @@ def sales_update_report_pdf():
 # ------------- INFORME DE VENTAS POR EVENTO (ADMIN) -----------
 
 
+def _concert_has_sales_details(session_db, concert_id) -> bool:
+    """¿Tiene el concierto ventas V2 (por ticketera/tipo)? EXISTS se para en la primera fila, en vez de
+    contar todo el detalle solo para decidir de qué tabla tirar."""
+    probe = session_db.query(TicketSaleDetail.id).filter(TicketSaleDetail.concert_id == concert_id)
+    return bool(session_db.query(probe.exists()).scalar())
+
+
 def _fmt_money_eur(n: float) -> str:
     try:
-        return f"{n:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
+        return f"{n:,.2f} €".translate(_ES_NUMBER_TRANS)
     except Exception:
         return "0,00 €"
 
 
-@app.get("/ventas/informe/<cid>", endpoint="sales_event_report_view")
-@admin_required
-def sales_event_report_view(cid):
-    # El informe por concierto ES la recaudación de ese concierto: mismo permiso que el reporte.
-    if not can_view_sales_revenue():
-        return forbid("Tu usuario no tiene permiso para ver la recaudación del reporte de ventas.")
-
-    day = get_day("d")
-    session_db = db()
-    try:
-        concert_id = to_uuid(cid)
-        c = (
-            session_db.query(Concert)
-            .options(
-                joinedload(Concert.artist),
-                joinedload(Concert.venue),
-                joinedload(Concert.promoter),
-                joinedload(Concert.group_company),
-                joinedload(Concert.billing_company),
-                joinedload(Concert.sales_config),
-                selectinload(Concert.ticket_types),
-                selectinload(Concert.ticketers).joinedload(ConcertTicketer.ticketer),
-            )
-            .get(concert_id)
-        )
-        if not c:
-            flash("Concierto no encontrado.", "warning")
-            return redirect(url_for("sales_update_view", d=day.isoformat()))
+def _sales_event_report_data(session_db, c, day: date, *, include_ticketers: bool = True) -> dict:
+    """Serie diaria, detalle y desgloses (por tipo y por ticketera) de las ventas del concierto
+    hasta `day`, para la vista y el PDF. Devuelve un dict plano (sin objetos ORM).
 
-        vat = float(getattr(c.sales_config, "vat_pct", 0) or 0) if c.sales_config else 0.0
-        sgae = float(getattr(c.sales_config, "sgae_pct", 0) or 0) if c.sales_config else 0.0
+    El PDF no pinta el desglose por ticketera: con `include_ticketers=False` se saltan sus dos
+    consultas y `by_ticketer` sale vacío (el desglose por tipo sí hace falta: da el bruto potencial).
 
-        # ¿Hay datos V2?
-        has_v2 = (
-            session_db.query(func.count(TicketSaleDetail.id))
-            .filter(TicketSaleDetail.concert_id == concert_id)
-            .scalar()
-            or 0
-        ) > 0
-
-        chart_labels, chart_values = [], []
-        total_sold = 0
-        gross_total = 0.0
+    Sin caché: el PDF se exporta a menudo justo después de actualizar ventas y tiene que salir con
+    las cifras recién guardadas (una caché por proceso no se puede invalidar en los demás workers).
+    """
+    concert_id = c.id
 
-        daily_rows = []  # para tabla detallada
-        daily_totals = []  # (day, qty, gross)
+    # ¿Hay datos V2?
+    has_v2 = _concert_has_sales_details(session_db, concert_id)
 
-        by_type = []  # {name, sold, qty_for_sale, price, gross}
-        by_ticketer = []  # {name, sold, gross}
+    chart_labels, chart_values = [], []
+    total_sold = 0
+    gross_total = 0.0
 
-        if has_v2:
-            # Detalle completo hasta el día elegido
-            details = (
-                session_db.query(TicketSaleDetail)
-                .options(joinedload(TicketSaleDetail.ticketer), joinedload(TicketSaleDetail.ticket_type))
-                .filter(TicketSaleDetail.concert_id == concert_id)
-                .filter(TicketSaleDetail.day <= day)
-                .order_by(TicketSaleDetail.day.asc())
-                .all()
-            )
+    daily_rows = []  # para tabla detallada
+    daily_totals = []  # (day, qty, gross)
 
-            # Construir detalle diario
-            for r in details:
-                price = float(getattr(r, "unit_price_gross", 0) or 0)
-                qty = int(r.qty or 0)
-                g = qty * price
-                daily_rows.append({
-                    "day": r.day,
-                    "ticketer": r.ticketer.name if r.ticketer else "—",
-                    "ticket_type": r.ticket_type.name if r.ticket_type else "—",
-                    "qty": qty,
-                    "price": price,
-                    "gross": g,
-                })
+    by_type = []  # {name, sold, qty_for_sale, price, gross}
+    by_ticketer = []  # {name, sold, gross}
 
-            # Totales por día (qty y gross)
-            day_aggs = (
-                session_db.query(
-                    TicketSaleDetail.day,
-                    func.sum(TicketSaleDetail.qty),
-                    func.sum(TicketSaleDetail.qty * TicketSaleDetail.unit_price_gross),
-                )
-                                .filter(TicketSaleDetail.concert_id == concert_id)
-                .filter(TicketSaleDetail.day <= day)
-                .group_by(TicketSaleDetail.day)
-                .order_by(TicketSaleDetail.day.asc())
-                .all()
+    if has_v2:
+        # Detalle completo hasta el día elegido
+        # (tuplas con los nombres ya resueltos en SQL: la fila es única por día/ticketera/tipo)
+        # Importes ya como double precision desde Postgres (qty y precio son NOT NULL): el bucle de
+        # abajo solo suma, sin convertir Decimal -> float fila a fila.
+        details = (
+            session_db.query(
+                TicketSaleDetail.day,
+                Ticketer.name,
+                ConcertTicketType.name,
+                TicketSaleDetail.qty,
+                cast(TicketSaleDetail.unit_price_gross, Float),
+                cast(TicketSaleDetail.qty * TicketSaleDetail.unit_price_gross, Float),
             )
-            running = 0
-            for d, qty, gross in day_aggs:
-                qv = int(qty or 0)
-                gv = float(gross or 0)
-                running += qv
-                chart_labels.append(d.strftime("%Y-%m-%d"))
-                chart_values.append(running)
-                daily_totals.append((d, qv, gv))
-                total_sold += qv
-                gross_total += gv
+            .outerjoin(Ticketer, Ticketer.id == TicketSaleDetail.ticketer_id)
+            .outerjoin(ConcertTicketType, ConcertTicketType.id == TicketSaleDetail.ticket_type_id)
+            .filter(TicketSaleDetail.concert_id == concert_id)
+            .filter(TicketSaleDetail.day <= day)
+            .order_by(TicketSaleDetail.day.asc(), Ticketer.name.asc(), ConcertTicketType.name.asc())
+            .all()
+        )
 
-            # Por tipo
-            type_aggs = (
-                session_db.query(
-                    ConcertTicketType.id,
-                    ConcertTicketType.name,
-                    ConcertTicketType.qty_for_sale,
-                    func.sum(TicketSaleDetail.qty),
-                    func.sum(TicketSaleDetail.qty * TicketSaleDetail.unit_price_gross),
-                )
-                .join(TicketSaleDetail, TicketSaleDetail.ticket_type_id == ConcertTicketType.id)
-                .filter(ConcertTicketType.concert_id == concert_id)
-                .filter(TicketSaleDetail.day <= day)
-                .group_by(ConcertTicketType.id)
-                .order_by(ConcertTicketType.created_at.asc())
-                .all()
+        # Detalle diario y, en la misma pasada (viene ordenado por día), los totales por día y la
+        # serie acumulada: sin una segunda consulta GROUP BY day sobre la misma tabla.
+        for d, rows_of_day in groupby(details, key=itemgetter(0)):
+            day_rows = [
+                {"day": d, "ticketer": tk_name or "—", "ticket_type": tt_name or "—",
+                 "qty": qty, "price": price, "gross": gross}
+                for _d, tk_name, tt_name, qty, price, gross in rows_of_day
+            ]
+            daily_rows.extend(day_rows)
+            qv = sum(map(itemgetter("qty"), day_rows))
+            gv = sum(map(itemgetter("gross"), day_rows))
+            total_sold += qv
+            gross_total += gv
+            chart_labels.append(d.strftime("%Y-%m-%d"))
+            chart_values.append(total_sold)
+            daily_totals.append((d, qv, gv))
+
+        # Por tipo
+        type_aggs = (
+            session_db.query(
+                ConcertTicketType.id,
+                ConcertTicketType.name,
+                ConcertTicketType.qty_for_sale,
+                func.sum(TicketSaleDetail.qty),
+                func.sum(TicketSaleDetail.qty * TicketSaleDetail.unit_price_gross),
             )
-            by_type = []
-            for _id, n, qfs, sold, g in type_aggs:
-                qfs_i = int(qfs or 0)
-                sold_i = int(sold or 0)
-                gross_f = float(g or 0)
-                price_f = (gross_f / float(sold_i)) if sold_i else 0.0
-                pending_qty = max(0, qfs_i - sold_i) if qfs_i else 0
-                pct_sold = (sold_i / qfs_i * 100.0) if qfs_i else 0.0
-                potential_gross = float(qfs_i) * float(price_f)
-                remaining_gross = max(0.0, potential_gross - gross_f)
-                by_type.append({
-                    "name": n,
-                    "qty_for_sale": qfs_i,
-                    "pending_qty": pending_qty,
-                    "pct_sold": pct_sold,
-                    "price": price_f,
-                    "sold": sold_i,
-                    "gross": gross_f,
-                    "potential_gross": potential_gross,
-                    "remaining_gross": remaining_gross,
-                })
+            .join(TicketSaleDetail, TicketSaleDetail.ticket_type_id == ConcertTicketType.id)
+            .filter(ConcertTicketType.concert_id == concert_id)
+            .filter(TicketSaleDetail.day <= day)
+            .group_by(ConcertTicketType.id)
+            .order_by(ConcertTicketType.created_at.asc())
+            .all()
+        )
+        by_type = []
+        for _id, n, qfs, sold, g in type_aggs:
+            qfs_i = int(qfs or 0)
+            sold_i = int(sold or 0)
+            gross_f = float(g or 0)
+            price_f = (gross_f / float(sold_i)) if sold_i else 0.0
+            pending_qty = max(0, qfs_i - sold_i) if qfs_i else 0
+            pct_sold = (sold_i / qfs_i * 100.0) if qfs_i else 0.0
+            potential_gross = float(qfs_i) * float(price_f)
+            remaining_gross = max(0.0, potential_gross - gross_f)
+            by_type.append({
+                "name": n,
+                "qty_for_sale": qfs_i,
+                "pending_qty": pending_qty,
+                "pct_sold": pct_sold,
+                "price": price_f,
+                "sold": sold_i,
+                "gross": gross_f,
+                "potential_gross": potential_gross,
+                "remaining_gross": remaining_gross,
+            })
 
-            # Por ticketer (incluye capacidad configurada por ticketera)
+        if include_ticketers:
+            # Por ticketer (incluye capacidad configurada por ticketera). Nombres y aforos salen como
+            # tuplas en las propias consultas (id -> nombre): ni relaciones ORM por fila ni una consulta
+            # aparte para los nombres de ticketeras con ventas que ya no estén asignadas.
             tick_aggs = (
                 session_db.query(
                     TicketSaleDetail.ticketer_id,
+                    Ticketer.name,
                     func.sum(TicketSaleDetail.qty),
                     func.sum(TicketSaleDetail.qty * TicketSaleDetail.unit_price_gross),
                 )
-                                .filter(TicketSaleDetail.concert_id == concert_id)
+                .outerjoin(Ticketer, Ticketer.id == TicketSaleDetail.ticketer_id)
+                .filter(TicketSaleDetail.concert_id == concert_id)
                 .filter(TicketSaleDetail.day <= day)
-                .group_by(TicketSaleDetail.ticketer_id)
+                .group_by(TicketSaleDetail.ticketer_id, Ticketer.name)
+                .all()
+            )
+            tick_map = {tid: (name, int(sold or 0), float(g or 0.0)) for tid, name, sold, g in tick_aggs}
+            assigned = (
+                session_db.query(ConcertTicketer.ticketer_id, Ticketer.name, ConcertTicketer.capacity_for_sale)
+                .outerjoin(Ticketer, Ticketer.id == ConcertTicketer.ticketer_id)
+                .filter(ConcertTicketer.concert_id == concert_id)
                 .all()
             )
-            tick_map = {tid: {"sold": int(sold or 0), "gross": float(g or 0.0)} for tid, sold, g in tick_aggs}
 
             by_ticketer = []
             seen_ticketers = set()
-            for ct in (c.ticketers or []):
-                t = getattr(ct, "ticketer", None)
-                tid = getattr(ct, "ticketer_id", None)
+            for tid, name, cap in assigned:
                 seen_ticketers.add(tid)
-                sold_i = int((tick_map.get(tid, {}) or {}).get("sold", 0) or 0)
-                gross_f = float((tick_map.get(tid, {}) or {}).get("gross", 0.0) or 0.0)
-                cap_i = int(getattr(ct, "capacity_for_sale", 0) or 0)
+                _n, sold_i, gross_f = tick_map.get(tid, (None, 0, 0.0))
+                cap_i = int(cap or 0)
                 pending_qty = max(0, cap_i - sold_i) if cap_i else 0
                 pct_sold = (sold_i / cap_i * 100.0) if cap_i else 0.0
                 by_ticketer.append({
-                    "name": getattr(t, "name", None) or "—",
+                    "name": name or "—",
                     "capacity_for_sale": cap_i,
                     "pending_qty": pending_qty,
                     "pct_sold": pct_sold,
@@ -36588,51 +36777,98 @@ def sales_event_report_view(cid):
                 })
 
             # Si existen ventas de ticketers que ya no estén asignadas al evento, las añadimos.
-            missing = [tid for tid in tick_map.keys() if tid not in seen_ticketers]
-            if missing:
-                extra = session_db.query(Ticketer).filter(Ticketer.id.in_(missing)).all()
-                extra_name = {t.id: t.name for t in extra}
-                for tid in missing:
-                    sold_i = int((tick_map.get(tid, {}) or {}).get("sold", 0) or 0)
-                    gross_f = float((tick_map.get(tid, {}) or {}).get("gross", 0.0) or 0.0)
-                    by_ticketer.append({
-                        "name": extra_name.get(tid) or "—",
-                        "capacity_for_sale": 0,
-                        "pending_qty": 0,
-                        "pct_sold": 0.0,
-                        "sold": sold_i,
-                        "gross": gross_f,
-                    })
+            for tid in set(tick_map) - seen_ticketers:
+                name, sold_i, gross_f = tick_map[tid]
+                by_ticketer.append({
+                    "name": name or "—",
+                    "capacity_for_sale": 0,
+                    "pending_qty": 0,
+                    "pct_sold": 0.0,
+                    "sold": sold_i,
+                    "gross": gross_f,
+                })
 
             by_ticketer.sort(key=lambda r: (r.get("name") or ""))
 
-        else:
-            # Legacy: tabla ticket_sales (solo cantidades)
-            pts = (
-                session_db.query(TicketSale.day, func.sum(TicketSale.sold_today))
-                .filter(TicketSale.concert_id == concert_id)
-                .filter(TicketSale.day <= day)
-                .group_by(TicketSale.day)
-                .order_by(TicketSale.day.asc())
-                .all()
+    else:
+        # Legacy: tabla ticket_sales (solo cantidades); el acumulado sale de la propia consulta.
+        pts = (
+            session_db.query(
+                TicketSale.day,
+                func.sum(TicketSale.sold_today),
+                func.sum(func.sum(TicketSale.sold_today)).over(order_by=TicketSale.day),
+            )
+            .filter(TicketSale.concert_id == concert_id)
+            .filter(TicketSale.day <= day)
+            .group_by(TicketSale.day)
+            .order_by(TicketSale.day.asc())
+            .all()
+        )
+        for d, qty, running in pts:
+            chart_labels.append(d.strftime("%Y-%m-%d"))
+            chart_values.append(int(running or 0))
+            daily_totals.append((d, int(qty or 0), 0.0))
+        total_sold = chart_values[-1] if chart_values else 0
+
+    data = {
+        "has_v2": has_v2,
+        "chart_labels": chart_labels,
+        "chart_values": chart_values,
+        "total_sold": total_sold,
+        "gross_total": gross_total,
+        "daily_rows": daily_rows,
+        "daily_totals": daily_totals,
+        "by_type": by_type,
+        "by_ticketer": by_ticketer,
+        # Potencial (según categorías): el precio efectivo se deriva de las ventas (por tipo);
+        # ConcertTicketType.price quedó obsoleto y siempre vale 0.
+        "potential_gross_total": sum(float(t.get("potential_gross") or 0.0) for t in by_type),
+    }
+    return data
+
+
+@app.get("/ventas/informe/<cid>", endpoint="sales_event_report_view")
+@admin_required
+def sales_event_report_view(cid):
+    # El informe por concierto ES la recaudación de ese concierto: mismo permiso que el reporte.
+    if not can_view_sales_revenue():
+        return forbid("Tu usuario no tiene permiso para ver la recaudación del reporte de ventas.")
+
+    day = get_day("d")
+    session_db = db()
+    try:
+        concert_id = to_uuid(cid)
+        c = (
+            session_db.query(Concert)
+            .options(
+                joinedload(Concert.artist),
+                joinedload(Concert.venue),
+                joinedload(Concert.promoter),
+                joinedload(Concert.group_company),
+                joinedload(Concert.billing_company),
+                joinedload(Concert.sales_config),
             )
-            running = 0
-            for d, qty in pts:
-                qv = int(qty or 0)
-                running += qv
-                chart_labels.append(d.strftime("%Y-%m-%d"))
-                chart_values.append(running)
-                daily_totals.append((d, qv, 0.0))
-                total_sold += qv
-
-        capacity = _concert_capacity_from_ticket_types(c)
+            .get(concert_id)
+        )
+        if not c:
+            flash("Concierto no encontrado.", "warning")
+            return redirect(url_for("sales_update_view", d=day.isoformat()))
+
+        vat, sgae = _sales_config_pcts(c)
+
+        data = _sales_event_report_data(session_db, c, day)
+        has_v2 = data["has_v2"]
+        chart_labels, chart_values = data["chart_labels"], data["chart_values"]
+        total_sold, gross_total = data["total_sold"], data["gross_total"]
+        daily_rows, daily_totals = data["daily_rows"], data["daily_totals"]
+        by_type, by_ticketer = data["by_type"], data["by_ticketer"]
+
+        capacity = _concert_capacity_for_sale(session_db, c)
         pct = (total_sold / capacity * 100.0) if capacity else 0.0
         pending = max(0, capacity - total_sold) if capacity else 0
 
         # Potencial (según categorías) y desglose neto.
-        # El precio efectivo se deriva de las ventas (ya calculado por tipo en by_type);
-        # ConcertTicketType.price quedó obsoleto y siempre vale 0.
-        potential_gross_total = sum(float(t.get("potential_gross") or 0.0) for t in by_type)
+        potential_gross_total = data["potential_gross_total"]
         remaining_gross_total = max(0.0, potential_gross_total - gross_total)
 
         br = _sales_net_breakdown(gross_total, vat, sgae)
@@ -36688,6 +36924,28 @@ def sales_event_report_view(cid):
         session_db.close()
 
 
+# Estilos del PDF del informe por concierto: son siempre los mismos, así que se construyen UNA vez al
+# importar (antes, cada PDF volvía a crear la hoja de estilos y los TableStyle). Solo se leen.
+if REPORTLAB_AVAILABLE:
+    _SALES_PDF_STYLES = getSampleStyleSheet()
+    _SALES_PDF_BRAND = colors.HexColor("#00779d")
+    _SALES_PDF_HEADER_BG = colors.HexColor("#f1f3f5")
+    _SALES_PDF_HEAD_TABLE_STYLE = TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP"), ("ALIGN", (1, 0), (1, 0), "RIGHT")])
+    _SALES_PDF_SUMMARY_TABLE_STYLE = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ])
+    _SALES_PDF_DETAIL_TABLE_STYLE = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), _SALES_PDF_HEADER_BG),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ])
+
+
 @app.get("/ventas/informe/<cid>/pdf", endpoint="sales_event_report_pdf")
 @admin_required
 def sales_event_report_pdf(cid):
@@ -36706,7 +36964,6 @@ def sales_event_report_pdf(cid):
                 joinedload(Concert.artist),
                 joinedload(Concert.venue),
                 joinedload(Concert.sales_config),
-                selectinload(Concert.ticket_types),
             )
             .get(concert_id)
         )
@@ -36714,117 +36971,31 @@ def sales_event_report_pdf(cid):
             flash("Concierto no encontrado.", "warning")
             return redirect(url_for("sales_update_view", d=day.isoformat()))
 
-        vat = float(getattr(c.sales_config, "vat_pct", 0) or 0) if c.sales_config else 0.0
-        sgae = float(getattr(c.sales_config, "sgae_pct", 0) or 0) if c.sales_config else 0.0
-
-        # Datos (preferimos V2)
-        has_v2 = (
-            session_db.query(func.count(TicketSaleDetail.id))
-            .filter(TicketSaleDetail.concert_id == concert_id)
-            .scalar()
-            or 0
-        ) > 0
-
-        # Serie acumulada
-        labels = []
-        values = []
-        daily_rows = []
-
-        total_sold = 0
-        gross_total = 0.0
+        vat, sgae = _sales_config_pcts(c)
 
-        if has_v2:
-            day_aggs = (
-                session_db.query(
-                    TicketSaleDetail.day,
-                    func.sum(TicketSaleDetail.qty),
-                    func.sum(TicketSaleDetail.qty * TicketSaleDetail.unit_price_gross),
-                )
-                                .filter(TicketSaleDetail.concert_id == concert_id)
-                .filter(TicketSaleDetail.day <= day)
-                .group_by(TicketSaleDetail.day)
-                .order_by(TicketSaleDetail.day.asc())
-                .all()
-            )
-            running = 0
-            for d, qty, gross in day_aggs:
-                qv = int(qty or 0)
-                gv = float(gross or 0)
-                running += qv
-                labels.append(d.strftime("%Y-%m-%d"))
-                values.append(running)
-                total_sold += qv
-                gross_total += gv
-
-            details = (
-                session_db.query(TicketSaleDetail)
-                .options(joinedload(TicketSaleDetail.ticketer), joinedload(TicketSaleDetail.ticket_type))
-                .filter(TicketSaleDetail.concert_id == concert_id)
-                .filter(TicketSaleDetail.day <= day)
-                .order_by(TicketSaleDetail.day.asc())
-                .all()
-            )
-            for r in details:
-                price = float(getattr(r, "unit_price_gross", 0) or 0)
-                qty = int(r.qty or 0)
-                if show_econ:
-                    daily_rows.append([
-                        r.day.strftime("%d/%m/%Y"),
-                        (r.ticketer.name if r.ticketer else "—"),
-                        (r.ticket_type.name if r.ticket_type else "—"),
-                        str(qty),
-                        _fmt_money_eur(price),
-                        _fmt_money_eur(qty * price),
-                    ])
-                else:
-                    daily_rows.append([
-                        r.day.strftime("%d/%m/%Y"),
-                        (r.ticketer.name if r.ticketer else "—"),
-                        (r.ticket_type.name if r.ticket_type else "—"),
-                        str(qty),
-                    ])
+        # Datos: los mismos que la vista (misma función, siempre en fresco).
+        data = _sales_event_report_data(session_db, c, day, include_ticketers=False)
+        labels, values = data["chart_labels"], data["chart_values"]
+        total_sold, gross_total = data["total_sold"], data["gross_total"]
+        # Filas de la tabla ya formateadas, en una sola comprensión (puede haber miles).
+        fmt_money = _fmt_money_eur
+        if show_econ:
+            daily_rows = [
+                [r["day"].strftime("%d/%m/%Y"), r["ticketer"], r["ticket_type"], str(r["qty"]),
+                 fmt_money(r["price"]), fmt_money(r["gross"])]
+                for r in data["daily_rows"]
+            ]
         else:
-            pts = (
-                session_db.query(TicketSale.day, func.sum(TicketSale.sold_today))
-                .filter(TicketSale.concert_id == concert_id)
-                .filter(TicketSale.day <= day)
-                .group_by(TicketSale.day)
-                .order_by(TicketSale.day.asc())
-                .all()
-            )
-            running = 0
-            for d, qty in pts:
-                qv = int(qty or 0)
-                running += qv
-                labels.append(d.strftime("%Y-%m-%d"))
-                values.append(running)
-                total_sold += qv
-
-        capacity = _concert_capacity_from_ticket_types(c)
+            daily_rows = [
+                [r["day"].strftime("%d/%m/%Y"), r["ticketer"], r["ticket_type"], str(r["qty"])]
+                for r in data["daily_rows"]
+            ]
+
+        capacity = _concert_capacity_for_sale(session_db, c)
         pct = (total_sold / capacity * 100.0) if capacity else 0.0
         pending = max(0, capacity - total_sold) if capacity else 0
 
-        # Bruto potencial por tipo: aforo del tipo × precio efectivo (derivado de las ventas).
-        # ConcertTicketType.price quedó obsoleto (siempre 0); usamos unit_price_gross.
-        potential_gross_total = 0.0
-        if has_v2:
-            type_potentials = (
-                session_db.query(
-                    ConcertTicketType.qty_for_sale,
-                    func.sum(TicketSaleDetail.qty),
-                    func.sum(TicketSaleDetail.qty * TicketSaleDetail.unit_price_gross),
-                )
-                .join(TicketSaleDetail, TicketSaleDetail.ticket_type_id == ConcertTicketType.id)
-                .filter(ConcertTicketType.concert_id == concert_id)
-                .filter(TicketSaleDetail.day <= day)
-                .group_by(ConcertTicketType.id)
-                .all()
-            )
-            for qfs, sold, g in type_potentials:
-                sold_i = int(sold or 0)
-                gross_f = float(g or 0)
-                price_f = (gross_f / sold_i) if sold_i else 0.0
-                potential_gross_total += float(int(qfs or 0)) * price_f
+        potential_gross_total = data["potential_gross_total"]
         remaining_gross_total = max(0.0, potential_gross_total - gross_total)
 
         br = _sales_net_breakdown(gross_total, vat, sgae)
@@ -36844,7 +37015,7 @@ def sales_event_report_pdf(cid):
             bottomMargin=24,
             title="Reporte de ventas",
         )
-        styles = getSampleStyleSheet()
+        styles = _SALES_PDF_STYLES
         story = []
 
         # Cabecera: título "Reporte de ventas" + logo de la empresa arriba a la derecha.
@@ -36860,7 +37031,7 @@ def sales_event_report_pdf(cid):
         except Exception:
             logo_cell = ""
         head_tbl = Table([[title_p, logo_cell]], colWidths=[None, 140])
-        head_tbl.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP"), ("ALIGN", (1, 0), (1, 0), "RIGHT")]))
+        head_tbl.setStyle(_SALES_PDF_HEAD_TABLE_STYLE)
         story.append(head_tbl)
 
         v = c.venue
@@ -36891,13 +37062,7 @@ def sales_event_report_pdf(cid):
                     ["Bruto pendiente", _fmt_money_eur(remaining_gross_total)],
                 ]
         t = Table(summary_data, colWidths=[140, 140])
-        t.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-            ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-            ("FONTSIZE", (0, 0), (-1, -1), 9),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ]))
+        t.setStyle(_SALES_PDF_SUMMARY_TABLE_STYLE)
         story.append(t)
         story.append(Spacer(1, 12))
 
@@ -36909,15 +37074,11 @@ def sales_event_report_pdf(cid):
             d.add(Line(40, 20, 40, h - 20, strokeColor=colors.grey, strokeWidth=1))
             d.add(Line(40, 20, w - 20, 20, strokeColor=colors.grey, strokeWidth=1))
 
-            max_v = max(values) if values else 1
-            max_v = max(max_v, 1)
-            n = len(values)
-            pts = []
-            for i, val in enumerate(values):
-                x = 40 + (i / (n - 1)) * (w - 60)
-                y = 20 + (val / max_v) * (h - 40)
-                pts.append((x, y))
-            d.add(PolyLine(pts, strokeColor=colors.HexColor("#00779d"), strokeWidth=2))
+            # Escalas calculadas una vez; los puntos salen de una sola comprensión.
+            x_step = (w - 60) / (len(values) - 1)
+            y_scale = (h - 40) / max(max(values), 1)
+            pts = [(40 + i * x_step, 20 + val * y_scale) for i, val in enumerate(values)]
+            d.add(PolyLine(pts, strokeColor=_SALES_PDF_BRAND, strokeWidth=2))
             story.append(Paragraph("Evolución venta de entradas", styles["Heading2"]))
             story.append(d)
             story.append(Spacer(1, 12))
@@ -36927,59 +37088,75 @@ def sales_event_report_pdf(cid):
             story.append(Paragraph("Detalle por día / ticketera / tipo", styles["Heading2"]))
             table_data = ([["Fecha", "Ticketera", "Tipo", "Vendidas", "Precio", "Bruto"]] if show_econ else [["Fecha", "Ticketera", "Tipo", "Vendidas"]]) + daily_rows
             tbl = Table(table_data, repeatRows=1)
-            tbl.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f1f3f5")),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("FONTSIZE", (0, 0), (-1, -1), 8),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-            ]))
+            tbl.setStyle(_SALES_PDF_DETAIL_TABLE_STYLE)
             story.append(tbl)
 
         doc.build(story)
-        buf.seek(0)
+        # ReportLab escribe el PDF de una vez al final de `build`: se devuelven esos bytes tal cual
+        # (una sola escritura, con Content-Length) en vez de `send_file`, que vuelve a leer el
+        # BytesIO a trozos. Sin caché: las cifras cambian con cada actualización de ventas.
+        pdf_value = buf.getvalue()
+        buf.close()
 
         filename = f"informe_ventas_{cid}_{day.strftime('%Y%m%d')}.pdf"
-        return send_file(buf, mimetype="application/pdf", as_attachment=True, download_name=filename)
+        return Response(
+            pdf_value,
+            mimetype="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={filename}", "Cache-Control": "no-store"},
+        )
     finally:
         session_db.close()
 
 # ------------- APIS GRAFICA DE VENTAS -----------
 
+def _orjson_default(obj):
+    # Lo que orjson no sabe serializar, igual que el proveedor JSON de Flask (Decimal -> str).
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+def _fast_json(data, status: int = 200):
+    """Respuesta JSON serializada con orjson (varias veces más rápido que `jsonify` en los
+    endpoints que se llaman en cada tecla/gráfica). Si orjson no está instalado, cae a `jsonify`.
+    Las fechas/UUID se convierten a texto ANTES de llamar, para que la salida sea idéntica en
+    ambos caminos."""
+    if not ORJSON_AVAILABLE:
+        return jsonify(data), status
+    return Response(orjson.dumps(data, default=_orjson_default), status=status, mimetype="application/json")
+
+
 @app.get("/api/sales_json")
 def api_sales_json():
     cid = to_uuid(request.args.get("concert_id"))
     session = db()
-    # Preferimos V2 si existe (ticketeras)
-    has_v2 = (session.query(func.count(TicketSaleDetail.id))
-              .filter(TicketSaleDetail.concert_id == cid)
-              .scalar() or 0) > 0
-
-    if has_v2:
-        pts = (
-            session.query(TicketSaleDetail.day, func.sum(TicketSaleDetail.qty))
+    try:
+        # Preferimos V2 si existe (ticketeras); si no, serie legacy. Una sola consulta: la rama legacy
+        # solo aporta filas cuando NO EXISTS detalle V2, así que no hace falta un sondeo previo.
+        v2_exists = session.query(TicketSaleDetail.id).filter(TicketSaleDetail.concert_id == cid).exists()
+        v2_pts = (
+            session.query(TicketSaleDetail.day.label("day"), func.sum(TicketSaleDetail.qty).label("qty"))
             .filter(TicketSaleDetail.concert_id == cid)
             .group_by(TicketSaleDetail.day)
-            .order_by(TicketSaleDetail.day.asc())
-            .all()
         )
-    else:
-        # serie diaria acumulada desde el inicio de venta (legacy)
-        pts = (
-            session.query(TicketSale.day, func.sum(TicketSale.sold_today))
+        legacy_pts = (
+            session.query(TicketSale.day.label("day"), func.sum(TicketSale.sold_today).label("qty"))
             .filter(TicketSale.concert_id == cid)
+            .filter(~v2_exists)
             .group_by(TicketSale.day)
-            .order_by(TicketSale.day.asc())
+        )
+        # El acumulado lo hace Postgres (SUM ... OVER ORDER BY day), que ya ordena por día.
+        daily = v2_pts.union_all(legacy_pts).subquery()
+        pts = (
+            session.query(daily.c.day, func.sum(daily.c.qty).over(order_by=daily.c.day))
+            .order_by(daily.c.day.asc())
             .all()
         )
-    # acumular
-    labels, values = [], []
-    running = 0
-    for d, qty in pts:
-        running += int(qty or 0)
-        labels.append(d.strftime("%Y-%m-%d"))
-        values.append(running)
-    session.close()
-    return jsonify({"labels": labels, "values": values})
+    finally:
+        session.close()
+    labels = [d.isoformat() for d, _r in pts]
+    values = [int(r or 0) for _d, r in pts]
+    return _fast_json({"labels": labels, "values": values})
 
 @app.get("/api/concert_meta")
 def api_concert_meta():
@@ -36990,8 +37167,8 @@ def api_concert_meta():
             .options(joinedload(Concert.artist), joinedload(Concert.venue))\
             .get(to_uuid(cid))
         if not c:
-            return jsonify({"error": "not found"}), 404
-        return jsonify({
+            return _fast_json({"error": "not found"}, 404)
+        return _fast_json({
             "artist": {
                 "name": (c.artist.name if c.artist else None),
                 "photo_url": (c.artist.photo_url if c.artist else None),
@@ -37010,58 +37187,64 @@ def api_concert_meta():
 
 #-------------- Apis Buscador de recintos y promotores ------------
 
-@app.get("/api/search/venues", endpoint="api_search_venues")
-def api_search_venues():
-    # Select2 suele mandar "term"; tu frontend quizá manda "q"
-    q = (request.args.get("q") or request.args.get("term") or "").strip()
+def _search_api_rows(q: str, build) -> list:
+    """Resultado (lista de dicts serializables) de `build(session_db, q)` con una sesión corta.
 
-    session_db = db()
-    try:
-        query = session_db.query(Venue)
-        if q:
-            like = f"%{q}%"
-            query = query.filter(
-                (_sa_contains_text(Venue.name, q)) |
-                (_sa_contains_text(Venue.municipality, q)) |
-                (_sa_contains_text(Venue.province, q)) |
-                (_sa_contains_text(Venue.address, q))
-            )
+    Sin caché por proceso: con varios workers, lo recién guardado en uno no aparecería en los
+    buscadores de los demás. La velocidad la dan los índices trigram (`ensure_search_trgm_indexes`).
+    """
+    with get_db() as session_db:
+        return build(session_db, q)
 
-        venues = query.order_by(Venue.name.asc()).limit(20).all()
 
-        out = []
-        for v in venues:
-            name = (v.name or "").strip()
-            mun = (v.municipality or "").strip()
-            prov = (v.province or "").strip()
-
-            # texto estándar que usará Select2
-            text_label = f"{name} — {mun} ({prov})".strip()
-            # arreglos por si faltan cosas
-            if not mun and not prov:
-                text_label = name
-            elif mun and not prov:
-                text_label = f"{name} — {mun}"
-            elif not mun and prov:
-                text_label = f"{name} ({prov})"
+def _search_venues_rows(session_db, q: str) -> list:
+    query = session_db.query(Venue)
+    if q:
+        query = query.filter(
+            (_sa_contains_text(Venue.name, q)) |
+            (_sa_contains_text(Venue.municipality, q)) |
+            (_sa_contains_text(Venue.province, q)) |
+            (_sa_contains_text(Venue.address, q))
+        )
 
-            out.append({
-                "id": str(v.id),
-                "name": name,
-                "municipality": mun,
-                "province": prov,
-                "address": (getattr(v, "address", None) or "").strip(),
-                "postal_code": (getattr(v, "postal_code", None) or "").strip() if hasattr(v, "postal_code") else "",
-                "label": text_label,  # compatibilidad
-                "text": text_label,   # CLAVE para Select2
-                "photo_url": (getattr(v, "photo_url", None) or ""),
-                "logo_url": (getattr(v, "photo_url", None) or ""),
-            })
+    venues = query.order_by(Venue.name.asc()).limit(20).all()
 
-        return jsonify(out)
+    out = []
+    for v in venues:
+        name = (v.name or "").strip()
+        mun = (v.municipality or "").strip()
+        prov = (v.province or "").strip()
 
-    finally:
-        session_db.close()
+        # texto estándar que usará Select2
+        text_label = f"{name} — {mun} ({prov})".strip()
+        # arreglos por si faltan cosas
+        if not mun and not prov:
+            text_label = name
+        elif mun and not prov:
+            text_label = f"{name} — {mun}"
+        elif not mun and prov:
+            text_label = f"{name} ({prov})"
+
+        out.append({
+            "id": str(v.id),
+            "name": name,
+            "municipality": mun,
+            "province": prov,
+            "address": (getattr(v, "address", None) or "").strip(),
+            "postal_code": (getattr(v, "postal_code", None) or "").strip() if hasattr(v, "postal_code") else "",
+            "label": text_label,  # compatibilidad
+            "text": text_label,   # CLAVE para Select2
+            "photo_url": (getattr(v, "photo_url", None) or ""),
+            "logo_url": (getattr(v, "photo_url", None) or ""),
+        })
+    return out
+
+
+@app.get("/api/search/venues", endpoint="api_search_venues")
+def api_search_venues():
+    # Select2 suele mandar "term"; tu frontend quizá manda "q"
+    q = (request.args.get("q") or request.args.get("term") or "").strip()
+    return _fast_json(_search_api_rows(q, _search_venues_rows))
 
 
 
@@ -37171,47 +37354,48 @@ def api_search_commission_entities():
         session.close()
 
 
+def _search_promoters_rows(session, q: str) -> list:
+    query = session.query(Promoter).options(
+        joinedload(Promoter.publishing_company),
+        selectinload(Promoter.companies),
+    )
+    clause = _promoter_search_clause(session, q)
+    if clause is not None:
+        query = query.filter(clause)
+    promoters = query.order_by(Promoter.nick.asc()).limit(20).all()
+
+    out = []
+    for p in promoters:
+        first_name = (p.first_name or "").strip()
+        last_name = (p.last_name or "").strip()
+        full_name = " ".join([x for x in [first_name, last_name] if x]).strip()
+        nick = (p.nick or "").strip()
+        label = nick or full_name or (p.contact_email or "").strip() or (p.contact_phone or "").strip() or "Sin nombre"
+        pub = p.publishing_company
+        link_summary = _promoter_link_summary(session, p)
+        out.append({
+            "id": str(p.id),
+            "label": label,
+            "text": label,
+            "nick": nick,
+            "first_name": first_name,
+            "last_name": last_name,
+            "contact_email": (p.contact_email or "").strip(),
+            "contact_phone": (p.contact_phone or "").strip(),
+            "publishing_company_id": str(pub.id) if pub else "",
+            "publishing_company_name": (pub.name or "") if pub else "",
+            "logo_url": (p.logo_url or ""),
+            "link_summary": link_summary,
+            "link_summary_text": _promoter_link_summary_text(link_summary),
+            "companies": [_serialize_promoter_company(x) for x in (p.companies or [])],
+        })
+    return out
+
+
 @app.get("/api/search/promoters", endpoint="api_search_promoters")
 def api_search_promoters():
     q = (request.args.get("q") or request.args.get("term") or "").strip()
-    session = db()
-    try:
-        query = session.query(Promoter).options(
-            joinedload(Promoter.publishing_company),
-            selectinload(Promoter.companies),
-        )
-        clause = _promoter_search_clause(session, q)
-        if clause is not None:
-            query = query.filter(clause)
-        promoters = query.order_by(Promoter.nick.asc()).limit(20).all()
-
-        out = []
-        for p in promoters:
-            first_name = (p.first_name or "").strip()
-            last_name = (p.last_name or "").strip()
-            full_name = " ".join([x for x in [first_name, last_name] if x]).strip()
-            nick = (p.nick or "").strip()
-            label = nick or full_name or (p.contact_email or "").strip() or (p.contact_phone or "").strip() or "Sin nombre"
-            pub = p.publishing_company
-            out.append({
-                "id": str(p.id),
-                "label": label,
-                "text": label,
-                "nick": nick,
-                "first_name": first_name,
-                "last_name": last_name,
-                "contact_email": (p.contact_email or "").strip(),
-                "contact_phone": (p.contact_phone or "").strip(),
-                "publishing_company_id": str(pub.id) if pub else "",
-                "publishing_company_name": (pub.name or "") if pub else "",
-                "logo_url": (p.logo_url or ""),
-                "link_summary": _promoter_link_summary(session, p),
-                "link_summary_text": _promoter_link_summary_text(_promoter_link_summary(session, p)),
-                "companies": [_serialize_promoter_company(x) for x in (p.companies or [])],
-            })
-        return jsonify(out)
-    finally:
-        session.close()
+    return _fast_json(_search_api_rows(q, _search_promoters_rows))
 
 
 
@@ -40151,84 +40335,82 @@ MONTHS_ES = [
 DOW_ES = ["L", "M", "X", "J", "V", "S", "D"]  # lunes..domingo
 
 
+@lru_cache(maxsize=64)
 def _build_year_calendar(year: int):
-    """Estructura de 12 meses con semanas (monthdayscalendar)."""
+    """Estructura de 12 meses con semanas (monthdayscalendar).
+
+    Solo depende del año, así que se cachea. Semanas en tuplas: el resultado es compartido entre
+    peticiones y no debe modificarse.
+    """
     cal = _cal.Calendar(firstweekday=0)  # 0 = lunes
-    months = []
-    for m in range(1, 13):
-        months.append({
+    return tuple(
+        {
             "num": m,
             "name": MONTHS_ES[m - 1],
-            "weeks": cal.monthdayscalendar(year, m),  # list[list[int]] con 0 para padding
-        })
-    return months
+            "weeks": tuple(tuple(w) for w in cal.monthdayscalendar(year, m)),  # 0 = relleno
+        }
+        for m in range(1, 13)
+    )
+
+
+# Tablas que ya se han visto existir. Solo se cachean los positivos: tras un deploy el esquema se
+# crea en 2º plano y una tabla que aún no estaba puede aparecer a mitad de vida del proceso (nunca
+# desaparece), así que un «no» se vuelve a consultar y un «sí» ya no cuesta ida y vuelta a la BD.
+_EXISTING_TABLES: set = set()
 
 
 def _table_exists(session_db, full_name: str) -> bool:
     """
     full_name ejemplo: 'public.concert_caches'
     """
+    if full_name in _EXISTING_TABLES:
+        return True
     try:
         r = session_db.execute(text("select to_regclass(:t)"), {"t": full_name}).scalar()
-        return r is not None
     except Exception:
         return False
+    if r is not None:
+        _EXISTING_TABLES.add(full_name)
+        return True
+    return False
 
 
-def _cache_summary(cache_rows: list) -> str:
-    """
-    Devuelve un resumen cortito de cachés para el cuadrante.
-    Si no hay tabla cachés o no hay datos: '—'
-    """
-    if not cache_rows:
-        return "—"
-
-    parts = []
-    for r in cache_rows:
-        # amount
-        if getattr(r, "amount", None) not in (None, ""):
-            try:
-                parts.append(f"{float(r.amount):g}€")
-            except Exception:
-                parts.append(f"{r.amount}€")
-            continue
+def _cache_parts_by_concert(session_db, concert_ids) -> dict:
+    """{concert_id: (partes, importe_total)} de los cachés de esos conciertos, agregado en Postgres.
 
-        # pct
-        if getattr(r, "pct", None) not in (None, ""):
-            try:
-                parts.append(f"{float(r.pct):g}%")
-            except Exception:
-                parts.append(f"{r.pct}%")
-            continue
+    Cada parte ya viene como texto corto: «1500€» si hay importe, «10%» si hay porcentaje y, si no,
+    el concepto o el tipo. `trim_scale` quita los ceros decimales sobrantes (1500.00 -> 1500)."""
+    part = func.coalesce(
+        func.trim_scale(ConcertCache.amount).op("||")("€"),
+        func.trim_scale(ConcertCache.pct).op("||")("%"),
+        func.nullif(ConcertCache.concept, ""),
+        ConcertCache.kind,
+    )
+    rows = (
+        session_db.query(
+            ConcertCache.concert_id,
+            func.array_agg(aggregate_order_by(part, ConcertCache.created_at, ConcertCache.id)),
+            func.coalesce(func.sum(ConcertCache.amount), 0),
+        )
+        .filter(ConcertCache.concert_id.in_(concert_ids))
+        .group_by(ConcertCache.concert_id)
+        .all()
+    )
+    return {cid: (parts or [], float(total or 0)) for cid, parts, total in rows}
 
-        # concept / kind
-        if getattr(r, "concept", None):
-            parts.append(str(r.concept))
-        elif getattr(r, "kind", None):
-            parts.append(str(r.kind))
 
+def _cache_summary(parts: list) -> str:
+    """
+    Devuelve un resumen cortito de cachés para el cuadrante (partes ya montadas por
+    `_cache_parts_by_concert`). Si no hay tabla cachés o no hay datos: '—'
+    """
     if not parts:
         return "—"
-
     if len(parts) > 3:
         return " + ".join(parts[:3]) + f" (+{len(parts) - 3})"
     return " + ".join(parts)
 
 
-def _cache_amount_total(cache_rows: list) -> float:
-    """Suma de los importes fijos de caché de una actividad (para 'Caché total')."""
-    total = 0.0
-    for r in (cache_rows or []):
-        amt = getattr(r, "amount", None)
-        if amt in (None, ""):
-            continue
-        try:
-            total += float(amt)
-        except Exception:
-            pass
-    return total
-
-
 # ============ Límite de facturación por empresa del grupo y año ============
 # Aviso al crear una actividad con caché: si la empresa que factura ya tiene comprometidos
 # 3.500.000 € ese año (o se acerca), hay que verlo ANTES de cerrar la fecha, con la opción de
@@ -40300,26 +40482,59 @@ def api_company_billing_limit(company_id):
         session_db.close()
 
 
+_LOGO_AND_NICK = attrgetter("logo_url", "nick")
+_LOGO_AND_NAME = attrgetter("logo_url", "name")
+
+
 def _promoter_display(concert: Concert):
     """Promotora/empresa principal visible en cuadrantes."""
-    if getattr(concert, "promoter", None):
-        return (
-            getattr(concert.promoter, "logo_url", None),
-            getattr(concert.promoter, "nick", None),
-        )
-    if getattr(concert, "billing_company", None):
-        return (
-            getattr(concert.billing_company, "logo_url", None),
-            getattr(concert.billing_company, "name", None),
-        )
-    if getattr(concert, "group_company", None):
-        return (
-            getattr(concert.group_company, "logo_url", None),
-            getattr(concert.group_company, "name", None),
-        )
+    promoter = concert.promoter
+    if promoter:
+        return _LOGO_AND_NICK(promoter)
+    company = concert.billing_company or concert.group_company
+    if company:
+        return _LOGO_AND_NAME(company)
     return (None, None)
 
 
+# Coordenadas de municipios (mapa de cuadrantes y de simulaciones): se guardan en la misma caché
+# que el buscador de direcciones (`address_lookups`, clave con prefijo «geocode:»). Un pueblo no se
+# mueve, así que un acierto vale un año; un «no encontrado» se reintenta a la semana.
+GEOCODE_CACHE_DAYS = 365
+GEOCODE_MISS_CACHE_DAYS = 7
+
+
+def _geocode_cache_key(city: str, province: str) -> str:
+    return ("geocode:" + " ".join(f"{city}|{province}".split()).casefold())[:160]
+
+
+def _geocode_city_cached(session_db, city: str, province: str):
+    """(lat, lng) del municipio mirando primero la caché; None si no se encuentra.
+
+    Lanza geo_utils.GeoError si Nominatim falla (eso no se cachea)."""
+    clave = _geocode_cache_key(city, province)
+    fila = session_db.get(AddressLookup, clave)
+    if fila is not None and fila.updated_at:
+        payload = fila.payload if isinstance(fila.payload, dict) else {}
+        found = "lat" in payload
+        edad = (_now_madrid() - fila.updated_at).days
+        if edad < (GEOCODE_CACHE_DAYS if found else GEOCODE_MISS_CACHE_DAYS):
+            return (float(payload["lat"]), float(payload["lng"])) if found else None
+    coords = _geocode_city_polite(city, province)
+    payload = {"lat": coords[0], "lng": coords[1]} if coords else {}
+    try:
+        if fila is None:
+            session_db.add(AddressLookup(query_key=clave, payload=payload))
+        else:
+            fila.payload = payload
+            fila.hits = int(fila.hits or 0) + 1
+            fila.updated_at = _now_madrid()
+        session_db.commit()
+    except Exception:
+        session_db.rollback()
+    return coords
+
+
 @app.get("/api/geocode")
 @admin_required
 def api_geocode():
@@ -40333,25 +40548,120 @@ def api_geocode():
     if not city:
         return jsonify({"ok": False, "error": "city is required"}), 400
 
-    q = f"{city}, {province}, España" if province else f"{city}, España"
-    url = "https://nominatim.openstreetmap.org/search?format=json&limit=1&q=" + quote_plus(q)
-
+    session_db = db()
     try:
-        req = Request(url, headers={
-            "User-Agent": "radio-spins-app/1.0 (cuadrantes)"
-        })
-        with urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
+        coords = _geocode_city_cached(session_db, city, province)
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+    finally:
+        session_db.close()
+    if not coords:
+        return jsonify({"ok": False, "error": "not found"}), 404
+    return jsonify({"ok": True, "lat": coords[0], "lng": coords[1]})
 
-        if not data:
-            return jsonify({"ok": False, "error": "not found"}), 404
 
-        lat = float(data[0]["lat"])
-        lng = float(data[0]["lon"])
-        return jsonify({"ok": True, "lat": lat, "lng": lng})
+# Nominatim pide como mucho 1 petición por segundo: todas las peticiones del proceso comparten este freno.
+_NOMINATIM_LOCK = threading.Lock()
+_NOMINATIM_LAST = [0.0]
+GEOCODE_BATCH_MAX = 80
+# Lo que falta en caché se pide a Nominatim de uno en uno (1/s): como mucho estos municipios y estos
+# segundos por llamada, muy por debajo del timeout del proxy. El resto no sale en `results` y el mapa
+# lo pide después con /api/geocode, municipio a municipio.
+GEOCODE_BATCH_FETCH_MAX = 15
+GEOCODE_BATCH_FETCH_SECONDS = 20.0
 
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+
+def _geocode_city_polite(city: str, province: str):
+    """geo_utils.geocode_city respetando el ritmo de Nominatim entre TODOS los hilos del proceso."""
+    import geo_utils
+    with _NOMINATIM_LOCK:
+        espera = 1.0 - (time.monotonic() - _NOMINATIM_LAST[0])
+        if espera > 0:
+            time.sleep(espera)
+        _NOMINATIM_LAST[0] = time.monotonic()
+    return geo_utils.geocode_city(city, province)
+
+
+@app.post("/api/geocode_batch", endpoint="api_geocode_batch")
+@admin_required
+def api_geocode_batch():
+    """Coordenadas de VARIOS municipios de una vez (mapa de cuadrantes).
+
+    Entrada JSON: [{"city", "province"}, ...]. Salida: {"ok", "results": {"city|province": {lat, lng}}}
+    (los no encontrados no salen). Lo cacheado se resuelve sin salir a Internet; de lo que falta se
+    piden como mucho GEOCODE_BATCH_FETCH_MAX, en serie (1 petición/s). La conexión a la BD NO se
+    retiene durante las llamadas a Nominatim: se lee la caché, se cierra y se escribe al final con
+    otra sesión corta.
+    """
+    payload = request.get_json(silent=True) or []
+    if isinstance(payload, dict):
+        payload = payload.get("queries") or []
+    queries = {}
+    for item in payload if isinstance(payload, list) else []:
+        if not isinstance(item, dict):
+            continue
+        city = str(item.get("city") or "").strip()
+        province = str(item.get("province") or "").strip()
+        if city:
+            queries.setdefault(f"{city}|{province}", (city, province))
+    queries = dict(list(queries.items())[:GEOCODE_BATCH_MAX])
+
+    results = {}
+    misses = []
+    with get_db() as session_db:
+        rows = {
+            r.query_key: r for r in session_db.query(AddressLookup)
+            .filter(AddressLookup.query_key.in_([_geocode_cache_key(c, p) for c, p in queries.values()]))
+            .all()
+        }
+        ahora = _now_madrid()
+        for key, (city, province) in queries.items():
+            fila = rows.get(_geocode_cache_key(city, province))
+            payload_c = (fila.payload if fila is not None and isinstance(fila.payload, dict) else None)
+            if payload_c is not None and fila.updated_at:
+                found = "lat" in payload_c
+                if (ahora - fila.updated_at).days < (GEOCODE_CACHE_DAYS if found else GEOCODE_MISS_CACHE_DAYS):
+                    if found:
+                        results[key] = {"lat": float(payload_c["lat"]), "lng": float(payload_c["lng"])}
+                    continue
+            misses.append(key)
+
+    # Red SIN sesión abierta. En serie: el freno de 1/s es global, varios hilos no irían más rápido.
+    fetched = {}
+    limite = time.monotonic() + GEOCODE_BATCH_FETCH_SECONDS
+    for key in misses[:GEOCODE_BATCH_FETCH_MAX]:
+        if time.monotonic() >= limite:
+            break
+        try:
+            coords = _geocode_city_polite(*queries[key])
+        except Exception:
+            continue  # fallo del proveedor: ni resultado ni caché
+        data = {"lat": coords[0], "lng": coords[1]} if coords else {}
+        fetched[_geocode_cache_key(*queries[key])] = data
+        if coords:
+            results[key] = data
+
+    if fetched:
+        with get_db() as session_db:
+            try:
+                existing = {
+                    r.query_key: r for r in session_db.query(AddressLookup)
+                    .filter(AddressLookup.query_key.in_(list(fetched)))
+                    .all()
+                }
+                ahora = _now_madrid()
+                for clave, data in fetched.items():
+                    fila = existing.get(clave)
+                    if fila is None:
+                        session_db.add(AddressLookup(query_key=clave, payload=data))
+                    else:
+                        fila.payload = data
+                        fila.hits = int(fila.hits or 0) + 1
+                        fila.updated_at = ahora
+                session_db.commit()
+            except Exception:
+                session_db.rollback()
+    return jsonify({"ok": True, "results": results})
 
 
 def _quadrantes_effective_sale_type(concert) -> str:
@@ -40564,8 +40874,12 @@ def quadrantes_view():
                 pass
 
         concert_tags_by_artist = defaultdict(list)
+        # Son TODOS los conciertos con artista: solo las columnas que se leen, como tuplas (las
+        # fichas tienen muchas columnas de texto largo). Tuplas y no entidades: así no quedan en la
+        # sesión conciertos a medio cargar que la consulta principal de abajo reutilizaría.
+        # `_concert_participant_artist_ids` solo lee `artist_id`/`artist_ids`, que la fila trae.
         tag_rows = (
-            session_db.query(Concert)
+            session_db.query(Concert.id, Concert.artist_id, Concert.artist_ids, Concert.hashtags)
             .filter(or_(Concert.artist_id.isnot(None), Concert.artist_ids.isnot(None)))
             .all()
         )
@@ -40625,10 +40939,8 @@ def quadrantes_view():
         years_label = " · ".join(str(y) for y in years)
         period_label = years_label + {"past": " · pasadas", "future": " · próximas"}.get(when, "")
 
-        allowed_status = {"BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO"}
-        f_statuses = [s for s in request.args.getlist("status") if s in allowed_status]
-        if not f_statuses:
-            f_statuses = ["BORRADOR", "HABLADO", "RESERVADO", "CONFIRMADO"]
+        # Sin filtro marcado = todos (los frozenset de valores válidos ya sirven de «todos»).
+        f_statuses = ({(s or "").strip().upper() for s in request.args.getlist("status")} & CONCERT_STATUSES_SET) or CONCERT_STATUSES_SET
 
         allowed_activities = {k for k, _l, _i in QUAD_ACTIVITY_CHOICES}
         f_activity_types = [
@@ -40640,12 +40952,7 @@ def quadrantes_view():
         if not f_activity_types:
             f_activity_types = [k for k, _l, _i in QUAD_ACTIVITY_CHOICES]
 
-        allowed_types = CONCERT_SALE_TYPES_ALL_SET
-        f_sale_types_raw = request.args.getlist("type") or []
-        f_sale_types = [(t or "").strip().upper() for t in f_sale_types_raw if (t or "").strip()]
-        f_sale_types = [t for t in f_sale_types if t in allowed_types]
-        if not f_sale_types:
-            f_sale_types = list(CONCERT_SALE_TYPES_ALL)
+        f_sale_types = ({(t or "").strip().upper() for t in request.args.getlist("type")} & CONCERT_SALE_TYPES_ALL_SET) or CONCERT_SALE_TYPES_ALL_SET
 
         # ⚠️ «NONE» (sin fecha de anuncio) TIENE que estar: `_announcement_state` lo devuelve para
         # toda actividad a la que no se le ha puesto anuncio, que es lo normal. Al no estar en la
@@ -40713,15 +41020,19 @@ def quadrantes_view():
             )
 
             selected_id_set = {str(u) for u in selected_uuids}
+            # De las relaciones solo se leen unos pocos campos (nombre, foto/logo, ubicación y el
+            # formato del show de la ficha): el resto de columnas no viajan en el JOIN.
             concerts = (
                 session_db.query(Concert)
                 .options(
-                    joinedload(Concert.artist),
-                    joinedload(Concert.venue),
-                    joinedload(Concert.promoter),
-                    joinedload(Concert.group_company),
-                    joinedload(Concert.billing_company),
-                    joinedload(Concert.contract_sheet),
+                    joinedload(Concert.artist).load_only(Artist.name, Artist.photo_url),
+                    joinedload(Concert.venue).load_only(Venue.name, Venue.municipality, Venue.province),
+                    joinedload(Concert.promoter).load_only(Promoter.nick, Promoter.logo_url),
+                    joinedload(Concert.group_company).load_only(GroupCompany.name, GroupCompany.logo_url),
+                    joinedload(Concert.billing_company).load_only(GroupCompany.name, GroupCompany.logo_url),
+                    joinedload(Concert.contract_sheet).load_only(
+                        ConcertContractSheet.data, ConcertContractSheet.request_payload
+                    ),
                 )
                 .filter(func.extract("year", Concert.date).in_(years))
                 .order_by(Concert.date.asc())
@@ -40761,13 +41072,7 @@ def quadrantes_view():
             caches_map = {}
             if concert_ids and _table_exists(session_db, "public.concert_caches"):
                 try:
-                    cache_rows = (
-                        session_db.query(ConcertCache)
-                        .filter(ConcertCache.concert_id.in_(concert_ids))
-                        .all()
-                    )
-                    for r in cache_rows:
-                        caches_map.setdefault(r.concert_id, []).append(r)
+                    caches_map = _cache_parts_by_concert(session_db, concert_ids)
                 except Exception:
                     caches_map = {}
 
@@ -40784,28 +41089,23 @@ def quadrantes_view():
             artist_color = {str(a.id): palette[i % len(palette)] for i, a in enumerate(selected_artists)}
             artist_by_id = {str(a.id): a for a in selected_artists}
 
+            # Conciertos con equipo (equipos, documentos o notas): una sola consulta UNION en vez de
+            # tres, con solo las tablas que ya existan.
             equip_ids = set()
             try:
-                if concert_ids and _table_exists(session_db, "public.concert_equipments"):
-                    rows = (
-                        session_db.query(ConcertEquipment.concert_id)
-                        .filter(ConcertEquipment.concert_id.in_(concert_ids))
-                        .all()
-                    )
-                    equip_ids.update({r[0] for r in rows if r and r[0]})
-                if concert_ids and _table_exists(session_db, "public.concert_equipment_documents"):
-                    rows = (
-                        session_db.query(ConcertEquipmentDocument.concert_id)
-                        .filter(ConcertEquipmentDocument.concert_id.in_(concert_ids))
-                        .all()
-                    )
-                    equip_ids.update({r[0] for r in rows if r and r[0]})
-                if concert_ids and _table_exists(session_db, "public.concert_equipment_notes"):
-                    rows = (
-                        session_db.query(ConcertEquipmentNote.concert_id)
-                        .filter(ConcertEquipmentNote.concert_id.in_(concert_ids))
-                        .all()
-                    )
+                equip_queries = []
+                if concert_ids:
+                    for tbl, model in (
+                        ("public.concert_equipments", ConcertEquipment),
+                        ("public.concert_equipment_documents", ConcertEquipmentDocument),
+                        ("public.concert_equipment_notes", ConcertEquipmentNote),
+                    ):
+                        if _table_exists(session_db, tbl):
+                            equip_queries.append(
+                                session_db.query(model.concert_id).filter(model.concert_id.in_(concert_ids))
+                            )
+                if equip_queries:
+                    rows = equip_queries[0].union(*equip_queries[1:]).all()
                     equip_ids.update({r[0] for r in rows if r and r[0]})
             except Exception:
                 equip_ids = set()
@@ -40817,12 +41117,12 @@ def quadrantes_view():
                 if st not in f_statuses:
                     continue
 
-                has_cache = bool(caches_map.get(c.id))
+                cache_parts, cache_amt = caches_map.get(c.id) or ((), 0.0)
+                has_cache = bool(cache_parts)
                 has_equip = (c.id in equip_ids)
                 cap = int(c.capacity or 0)
                 dstr = c.date.isoformat()
-                cache_txt = _cache_summary(caches_map.get(c.id, []))
-                cache_amt = _cache_amount_total(caches_map.get(c.id, []))
+                cache_txt = _cache_summary(cache_parts)
                 show_format_txt = _concert_show_format(c)
                 schedule_txt = _concert_schedule_label(c)
                 activity_concept = _concert_activity_concept(c)
@@ -40832,45 +41132,51 @@ def quadrantes_view():
                 announcement_badge = _announcement_badge(c)
                 effective_sale_type = _quadrantes_effective_sale_type(c) or (c.sale_type or "")
 
+                # Campos del CONCIERTO: se montan una sola vez y cada artista participante recibe una
+                # copia (`{**base, ...}`, copia en C) con solo sus 4 campos propios encima. Siguen siendo
+                # dicts porque la plantilla los vuelca con `tojson` para el mapa.
+                base = {
+                    "concert_id": str(c.id),
+                    "date": dstr,
+                    "date_es": c.date.strftime("%d/%m/%Y"),
+                    "festival_name": (c.festival_name or ""),
+                    "activity_type": activity_concept,
+                    "activity_label": QUAD_ACTIVITY_LABELS.get(activity_concept, "Concierto"),
+                    "activity_icon": QUAD_ACTIVITY_ICONS.get(activity_concept, "fa-guitar"),
+                    "sale_type": effective_sale_type,
+                    "sale_type_label": _sale_type_label(effective_sale_type, activity_concept),
+                    # Solo un CONCIERTO tiene tipo de venta; en el resto lo que dice es si lleva
+                    # caché, y así se pinta (la columna «Concepto» ya dice qué es la actividad).
+                    "is_concert_like": activity_concept in CONCERT_LIKE_ACTIVITY_TYPES,
+                    "cache_label": _activity_cache_label(effective_sale_type, activity_concept),
+                    "status": st,
+                    "province": _concert_province_value(c),
+                    "municipality": _concert_city(c),
+                    "venue_name": _concert_venue_name(c),
+                    "venue_id": str(c.venue_id) if getattr(c, "venue_id", None) else "",
+                    "capacity": cap,
+                    "capacity_label": "Sin aforo" if getattr(c, "no_capacity", False) else cap,
+                    "cache": cache_txt,
+                    "cache_amount": cache_amt,
+                    "has_cache": has_cache,
+                    "show_format": show_format_txt,
+                    "schedule_label": schedule_txt,
+                    "has_equipment": has_equip,
+                    "promoter_name": pro_name or "",
+                    "promoter_logo": pro_logo or "",
+                    "hashtags": tags_clean,
+                    "hashtags_text": " · ".join([f"#{x}" for x in tags_clean]),
+                    "announcement_state": announcement_state,
+                    "announcement_badge": announcement_badge,
+                }
                 for aid in sorted(selected_id_set.intersection(_concert_participant_artist_ids(c))):
                     artist_obj = artist_by_id.get(aid) or c.artist
                     per_artist.setdefault(aid, []).append({
-                        "concert_id": str(c.id),
-                        "date": dstr,
-                        "date_es": c.date.strftime("%d/%m/%Y"),
+                        **base,
                         "artist_id": aid,
-                        "artist_name": artist_obj.name if artist_obj else (c.artist.name if c.artist else ""),
-                        "artist_photo": artist_obj.photo_url if artist_obj else (c.artist.photo_url if c.artist else ""),
+                        "artist_name": artist_obj.name if artist_obj else "",
+                        "artist_photo": artist_obj.photo_url if artist_obj else "",
                         "artist_color": artist_color.get(aid, "#0d6efd"),
-                        "festival_name": (c.festival_name or ""),
-                        "activity_type": activity_concept,
-                        "activity_label": QUAD_ACTIVITY_LABELS.get(activity_concept, "Concierto"),
-                        "activity_icon": QUAD_ACTIVITY_ICONS.get(activity_concept, "fa-guitar"),
-                        "sale_type": effective_sale_type,
-                        "sale_type_label": _sale_type_label(effective_sale_type, activity_concept),
-                        # Solo un CONCIERTO tiene tipo de venta; en el resto lo que dice es si lleva
-                        # caché, y así se pinta (la columna «Concepto» ya dice qué es la actividad).
-                        "is_concert_like": activity_concept in CONCERT_LIKE_ACTIVITY_TYPES,
-                        "cache_label": _activity_cache_label(effective_sale_type, activity_concept),
-                        "status": st,
-                        "province": _concert_province_value(c),
-                        "municipality": _concert_city(c),
-                        "venue_name": _concert_venue_name(c),
-                        "venue_id": str(c.venue_id) if getattr(c, "venue_id", None) else "",
-                        "capacity": cap,
-                        "capacity_label": "Sin aforo" if getattr(c, "no_capacity", False) else cap,
-                        "cache": cache_txt,
-                        "cache_amount": cache_amt,
-                        "has_cache": has_cache,
-                        "show_format": show_format_txt,
-                        "schedule_label": schedule_txt,
-                        "has_equipment": has_equip,
-                        "promoter_name": pro_name or "",
-                        "promoter_logo": pro_logo or "",
-                        "hashtags": tags_clean,
-                        "hashtags_text": " · ".join([f"#{x}" for x in tags_clean]),
-                        "announcement_state": announcement_state,
-                        "announcement_badge": announcement_badge,
                     })
 
             for a in selected_artists:
@@ -41831,6 +42137,22 @@ def _schema_is_ready() -> bool:
     return (time.time() - _PROCESS_STARTED_AT) > SCHEMA_READY_MAX_WAIT
 
 
+SCHEMA_FINGERPRINT_KEY = "schema_fingerprint"
+
+
+def _schema_fingerprint(step_names) -> str:
+    """Huella del esquema que aplica el arranque: el DDL vive en models.py y la lista de pasos aquí.
+    Cambia con cualquier despliegue que toque una de las dos cosas; '' si no se puede calcular."""
+    try:
+        h = hashlib.sha256()
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "models.py"), "rb") as fh:
+            h.update(fh.read())
+        h.update("\n".join(step_names).encode("utf-8"))
+        return h.hexdigest()
+    except Exception:
+        return ""
+
+
 def _bootstrap_schema_bg():
     lock_path = os.path.join(tempfile.gettempdir(), "app33_schema_bootstrap.lock")
     try:
@@ -41841,8 +42163,10 @@ def _bootstrap_schema_bg():
         return
     except Exception:
         pass  # si el cerrojo falla, seguimos igualmente (best-effort)
-    _safe_ensure(init_db, "init_db")  # tablas base (el resto de migraciones dependen de ellas)
-    for _fn, _name in [
+    # Si este mismo esquema (misma huella de models.py + lista de migraciones) ya se aplicó entero en
+    # la BD, otro contenedor o un arranque anterior ya hizo el trabajo: se salta todo el DDL y basta
+    # una lectura. Para forzar el repaso, borrar la fila `schema_fingerprint` de `app_settings`.
+    _ddl_steps = [
         (ensure_artist_feature_schema, "ensure_artist_feature_schema"),
         (ensure_discografica_schema, "ensure_discografica_schema"),
         (ensure_isrc_and_song_detail_schema, "ensure_isrc_and_song_detail_schema"),
@@ -41890,10 +42214,25 @@ def _bootstrap_schema_bg():
         (ensure_notifications_schema, "ensure_notifications_schema"),
         (ensure_artist_notifications_schema, "ensure_artist_notifications_schema"),
         (ensure_app_settings_schema, "ensure_app_settings_schema"),
-    ]:
-        _safe_ensure(_fn, _name)
-    # Índices de rendimiento (claves foráneas sin índice): idempotente, solo crea los que falten.
-    _safe_ensure(ensure_performance_indexes, "ensure_performance_indexes")
+        # Índices de rendimiento (claves foráneas sin índice): idempotente, solo crea los que falten.
+        (ensure_performance_indexes, "ensure_performance_indexes"),
+        # Índices trigram del buscador de recintos (LIKE '%texto%' por índice).
+        (ensure_search_trgm_indexes, "ensure_search_trgm_indexes"),
+    ]
+    _fingerprint = _schema_fingerprint([_name for _fn, _name in _ddl_steps])
+    if _fingerprint and _get_app_setting(SCHEMA_FINGERPRINT_KEY) == _fingerprint:
+        app.logger.info("[arranque] esquema ya aplicado (%s): se omite el DDL", _fingerprint[:12])
+    else:
+        _failed_before = ddl_failure_count()
+        _ok = _safe_ensure(init_db, "init_db")  # tablas base (el resto de migraciones dependen de ellas)
+        for _fn, _name in _ddl_steps:
+            _ok = _safe_ensure(_fn, _name) and _ok
+        # Solo se anota la huella si TODO se aplicó: con un fallo (también una sentencia que
+        # `_exec_ddl_statements` registró y se saltó, p. ej. por lock_timeout), el siguiente arranque
+        # lo reintenta.
+        _ok = _ok and ddl_failure_count() == _failed_before
+        if _ok and _fingerprint:
+            _set_app_setting(SCHEMA_FINGERPRINT_KEY, _fingerprint)
     # Una sola vez: a quien ya tenía DNI o pasaporte subido, se le ponen en la ficha los datos
     # OFICIALES del documento (el nick no se toca). Ver `_person_docs_backfill_official_data`.
     # ⚠️ Se resuelve por `globals()` porque este hilo arranca DURANTE el import: la función se define
@@ -47785,41 +48124,46 @@ def _state_has_access(state: dict, key: str | None, *, edit: bool = False, econ:
     return False
 
 
+# Sección (recurso de accesos) por prefijo de URL, para las rutas sin recurso propio. Se evalúa en
+# CADA petición (enforcement, economía…): tupla fija a nivel de módulo y gana el primer prefijo.
+_PATH_GROUP_KEYS = (
+    ("/artistas", "artists"),
+    ("/discografica", "discografica"),
+    ("/promotores", "third_parties"),
+    ("/actividades", "actividades"),
+    ("/contratacion", "contratacion"),
+    ("/conciertos", "contratacion.conciertos"),
+    ("/cuadrantes", "contratacion.cuadrantes"),
+    ("/emisoras", "radio.emisoras"),
+    ("/tocadas", "radio.actualizar"),
+    ("/ventas", "ventas"),
+    ("/recintos", "databases.venues"),
+    ("/ticketeras", "databases.ticketers"),
+    ("/editoriales", "databases.publishing_companies"),
+    ("/empresas", "databases.group_companies"),
+    ("/medios", "databases.media"),
+    ("/eventos", "databases.events"),
+    ("/distribuidoras", "databases.distributors"),
+    ("/bancos", "databases.banks"),
+    ("/compradores", "databases.buyers"),
+    ("/bolsas", "databases.bags"),
+    ("/facturas", "databases.invoices"),
+    ("/personal", "personal"),
+    ("/promocion", "promocion"),
+    ("/marketing", "promocion"),
+    ("/acciones", "acciones"),
+    ("/produccion", "produccion"),
+    ("/administracion", "administracion"),
+    ("/contabilidad", "contabilidad"),
+    ("/invitaciones", "invitaciones"),
+)
+
+
 def _infer_group_key_from_path(path: str) -> str | None:
     path = (path or "").strip()
     if not path or path == "/":
         return "home"
-    for prefix, key in [
-        ("/artistas", "artists"),
-        ("/discografica", "discografica"),
-        ("/promotores", "third_parties"),
-        ("/actividades", "actividades"),
-        ("/contratacion", "contratacion"),
-        ("/conciertos", "contratacion.conciertos"),
-        ("/cuadrantes", "contratacion.cuadrantes"),
-        ("/emisoras", "radio.emisoras"),
-        ("/tocadas", "radio.actualizar"),
-        ("/ventas", "ventas"),
-        ("/recintos", "databases.venues"),
-        ("/ticketeras", "databases.ticketers"),
-        ("/editoriales", "databases.publishing_companies"),
-        ("/empresas", "databases.group_companies"),
-        ("/medios", "databases.media"),
-        ("/eventos", "databases.events"),
-        ("/distribuidoras", "databases.distributors"),
-        ("/bancos", "databases.banks"),
-        ("/compradores", "databases.buyers"),
-        ("/bolsas", "databases.bags"),
-        ("/facturas", "databases.invoices"),
-        ("/personal", "personal"),
-        ("/promocion", "promocion"),
-        ("/marketing", "promocion"),
-        ("/acciones", "acciones"),
-        ("/produccion", "produccion"),
-        ("/administracion", "administracion"),
-        ("/contabilidad", "contabilidad"),
-        ("/invitaciones", "invitaciones"),
-    ]:
+    for prefix, key in _PATH_GROUP_KEYS:
         if path.startswith(prefix):
             return key
     return None
@@ -48195,7 +48539,18 @@ def _current_user_state() -> dict:
 
 def has_access_key(key: str | None, *, edit: bool = False, econ: bool = False, include_descendants: bool = False) -> bool:
     state = _current_user_state()
-    return _state_has_access(state, key, edit=edit, econ=econ, include_descendants=include_descendants)
+    # Memo POR PETICIÓN: las plantillas y los `can_*` preguntan lo mismo decenas de veces por página
+    # y con `include_descendants` cada pregunta recorre el árbol de recursos. Va ligado al `state`
+    # concreto: si este se recalcula (otro usuario en la misma petición), el memo empieza de cero.
+    memo = getattr(g, "_has_access_memo", None)
+    if memo is None or memo[0] is not state:
+        memo = (state, {})
+        g._has_access_memo = memo
+    ck = (key, edit, econ, include_descendants)
+    hit = memo[1].get(ck)
+    if hit is None:
+        hit = memo[1][ck] = _state_has_access(state, key, edit=edit, econ=econ, include_descendants=include_descendants)
+    return hit
 
 
 def can_view_economics() -> bool:
@@ -49440,7 +49795,7 @@ SUPPORT_READ_ENDPOINTS = {
     # Aviso del límite de facturación anual por empresa del grupo (asistente de actividad).
     "api_company_billing_limit",
     "api_concert_meta", "api_song_meta", "api_album_song_search",
-    "api_concert_artist_conflicts", "api_embargo_check_third_party", "api_geocode",
+    "api_concert_artist_conflicts", "api_embargo_check_third_party", "api_geocode", "api_geocode_batch",
     "api_song_editorial_share_detail", "api_plays_json",
     "fotos_list_json", "foto_detail_json", "fotos_approval_options",
     "foto_download", "api_fotos_owner_emails",
@@ -49573,6 +49928,11 @@ def _enforce_role_permissions_v2():
     # entera se veía EN BLANCO (el navegador bloquea el render esperando la hoja de estilos).
     if request.endpoint == "static":
         return
+    # OPTIONS lo contesta Flask solo (cabecera Allow, sin ejecutar la vista ni devolver datos): no hay
+    # nada que proteger y no merece cargar el estado del usuario. HEAD NO entra aquí: Flask ejecuta la
+    # vista GET para responderlo y necesita la misma comprobación de lectura.
+    if request.method == "OPTIONS":
+        return
     if not session.get("user_id"):
         return
     # Salir del modo «Ver como» debe estar siempre disponible, aunque el usuario impersonado
@@ -49832,7 +50192,7 @@ def _marketing_budget_label(mode, amount, notes=None) -> str:
         return "Pedir presupuesto" + ((f" · {notes}" if notes else ""))
     try:
         if amount is not None:
-            return f"Máx. {float(amount):,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
+            return "Máx. " + f"{float(amount):,.2f} €".translate(_ES_NUMBER_TRANS)
     except Exception:
         pass
     return (notes or "Sin presupuesto indicado")
@@ -51691,7 +52051,7 @@ def _promo_booking_request_sync(session_db, promotion, activity):
     row.artist_ids = artist_ids
     row.requested_date = getattr(activity, "activity_date", None)
     row.subject = subject
-    row.fee_text = (f"{fee:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")) if fee else None
+    row.fee_text = (f"{fee:,.2f} €".translate(_ES_NUMBER_TRANS)) if fee else None
     row.notes = notes
     # ⚠️ El reparto por departamentos vive en payload['departments'] (lista) y se lee con
     # `_booking_in_department`: sin esto la petición se iría a Contratación por descarte, pero sin
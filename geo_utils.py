@@ -22,6 +22,7 @@ import urllib.parse
 import urllib.request
 
 PHOTON_URL = "https://photon.komoot.io/api/"
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 _TIMEOUT = 8
 # Encuadre de España (incluye Canarias): sesga los resultados sin excluir a un proveedor extranjero.
 SPAIN_BBOX = "-18.5,27.4,4.6,44.0"
@@ -137,3 +138,25 @@ def search_addresses(query: str, *, limit: int = 6, timeout: int = _TIMEOUT) ->
         filas.append(fila)
     filas.sort(key=lambda f: 0 if f["country_code"] == "ES" else 1)
     return filas
+
+
+def geocode_city(city: str, province: str = "", *, timeout: int = 10) -> tuple[float, float] | None:
+    """Coordenadas aproximadas (lat, lng) de un municipio español, o None si no se encuentra.
+
+    Usa Nominatim: UNA consulta por ciudad (permitido por su política), nunca letra a letra.
+    """
+    city = (city or "").strip()
+    province = (province or "").strip()
+    if not city:
+        return None
+    q = f"{city}, {province}, España" if province else f"{city}, España"
+    url = NOMINATIM_URL + "?" + urllib.parse.urlencode({"format": "json", "limit": 1, "q": q})
+    try:
+        req = urllib.request.Request(url, headers={"User-Agent": "radio-spins-app/1.0 (cuadrantes)"})
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            datos = json.loads(resp.read().decode("utf-8"))
+    except Exception as exc:
+        raise GeoError("No se ha podido geolocalizar %s: %s" % (q, exc)) from exc
+    if not datos:
+        return None
+    return float(datos[0]["lat"]), float(datos[0]["lon"])
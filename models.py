@@ -19,6 +19,7 @@ from sqlalchemy import (
     Index,
 )
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.pool import NullPool
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
 
 from config import settings
@@ -31,20 +32,33 @@ if not settings.DATABASE_URL:
         "DATABASE_URL=postgresql+psycopg2://... ?sslmode=require"
     )
 
+# Con el pooler de Supabase en modo transacción (pgBouncer/Supavisor, puerto 6543) el pool ya lo
+# hace el pooler: mantener otro pool local solo duplica conexiones ociosas. DB_NULLPOOL=1 abre y
+# cierra una conexión (barata, contra el pooler) por sesión. Por defecto, pool local como siempre.
+if os.getenv("DB_NULLPOOL", "").strip().lower() in ("1", "true", "yes", "si", "sí"):
+    _POOL_KWARGS = {"poolclass": NullPool}
+else:
+    _POOL_KWARGS = {
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "280")),  # antes de que Supabase corte (~300s)
+        # DIMENSIONADO GLOBAL, no por worker suelto: Supabase admite ~90 conexiones directas y durante
+        # un deploy conviven DOS instancias (vieja + nueva), o sea el doble de conexiones. Con 4 workers,
+        # el antiguo 10+20 permitía hasta 120 por instancia (240 en deploy) -> Supabase se quedaba sin
+        # conexiones, cada petición esperaba su conexión 30 s, los threads del servidor se agotaban y la
+        # web «se caía» a ratas. 6+6 × 4 workers = 48 por instancia (96 en el pico breve de un deploy),
+        # suficiente para 8 hilos/worker + hilos de fondo. pool_timeout corto: mejor un error puntual y
+        # reintentar que colgar el thread medio minuto (eso es lo que tumbaba la web entera).
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "6")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "6")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        # LIFO: se reutiliza siempre la conexión devuelta más recientemente (la más «caliente»); las
+        # que sobran tras un pico quedan quietas al fondo y el recycle/pre_ping las retira antes.
+        "pool_use_lifo": True,
+    }
+
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,        # descarta conexiones muertas antes de reutilizarlas
-    pool_recycle=280,          # recicla antes de que el pooler/Supabase corte por inactividad (~300s)
-    # DIMENSIONADO GLOBAL, no por worker suelto: Supabase admite ~90 conexiones directas y durante
-    # un deploy conviven DOS instancias (vieja + nueva), o sea el doble de conexiones. Con 4 workers,
-    # el antiguo 10+20 permitía hasta 120 por instancia (240 en deploy) -> Supabase se quedaba sin
-    # conexiones, cada petición esperaba su conexión 30 s, los threads del servidor se agotaban y la
-    # web «se caía» a ratas. 6+6 × 4 workers = 48 por instancia (96 en el pico breve de un deploy),
-    # suficiente para 8 hilos/worker + hilos de fondo. pool_timeout corto: mejor un error puntual y
-    # reintentar que colgar el thread medio minuto (eso es lo que tumbaba la web entera).
-    pool_size=int(os.getenv("DB_POOL_SIZE", "6")),
-    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "6")),
-    pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "10")),
+    **_POOL_KWARGS,
     connect_args={
         "connect_timeout": 10,
         "application_name": "radio_spins_app",
@@ -5730,7 +5744,17 @@ def _snapshot_add(snap, stmt: str) -> None:
                 have.add(_norm_ident(c))
 
 
-def _exec_ddl_statements(stmts, label: str = "schema"):
+# Sentencias DDL que han fallado en este proceso (ver `ddl_failure_count`): el arranque solo anota la
+# huella del esquema si no ha fallado ninguna, para reintentarlas en el siguiente.
+_DDL_FAILURES = [0]
+
+
+def ddl_failure_count() -> int:
+    """Total de sentencias DDL fallidas desde que arrancó el proceso."""
+    return _DDL_FAILURES[0]
+
+
+def _exec_ddl_statements(stmts, label: str = "schema") -> int:
     """Ejecuta DDL idempotente sentencia a sentencia, SIN bloquear la web en cada deploy.
 
     - Salta lo que ya está aplicado (ver `_ddl_already_applied`): en un deploy sin cambios de esquema
@@ -5738,8 +5762,11 @@ def _exec_ddl_statements(stmts, label: str = "schema"):
     - Cada sentencia va en su propia transacción con `lock_timeout` acotado: si no consigue el lock
       rápido, aborta y se reintenta unas veces; si aun así no, se aplica en el próximo arranque.
     - Cada sentencia aislada evita que un fallo tardío tire cambios previos ya válidos.
+
+    Devuelve cuántas sentencias han fallado (0 = todo aplicado).
     """
 
+    failures = 0
     snap = _load_schema_snapshot()
     for idx, stmt in enumerate(stmts, start=1):
         s = (stmt or "").strip()
@@ -5770,6 +5797,10 @@ def _exec_ddl_statements(stmts, label: str = "schema"):
                 break
         if applied:
             _snapshot_add(snap, s)
+        else:
+            failures += 1
+    _DDL_FAILURES[0] += failures
+    return failures
 
 
 def ensure_simulations_schema():
@@ -9024,9 +9055,46 @@ def ensure_performance_indexes():
             stmts.append('CREATE INDEX IF NOT EXISTS "%s" ON "%s" ("%s");' % (ix_name, table.name, col.name))
     # Índice compuesto para el ranking de uso del menú (consulta por usuario + fecha).
     stmts.append('CREATE INDEX IF NOT EXISTS "ix_user_activity_logs_user_created" ON "user_activity_logs" ("user_id", "created_at");')
+    # Login y alta de usuarios buscan por `lower(email)` (el email se guarda tal como se escribió):
+    # sin índice de expresión, cada login recorría la tabla de usuarios entera.
+    stmts.append('CREATE INDEX IF NOT EXISTS "ix_users_lower_email" ON "users" (lower("email"));')
+    # Conciertos de UN artista por rango de fechas (ficha del artista, agenda, cuadrantes): el índice
+    # compuesto resuelve `artist_id = … AND date >= / < hoy` con un rango y devuelve ya por fecha.
+    stmts.append('CREATE INDEX IF NOT EXISTS "ix_concerts_artist_date" ON "concerts" ("artist_id", "date");')
     _exec_ddl_statements(stmts, "performance_indexes")
 
 
+# Plegado de texto de los buscadores (minúsculas, sin acentos ni símbolos).
+# ⚠️ ESPEJO EXACTO de `_sa_folded_text` en app.py (`_AI_SEARCH_FROM`/`_AI_SEARCH_TO`): Postgres solo
+# usa un índice de expresión si la consulta repite LA MISMA expresión. Si se toca una, se toca la otra.
+_SEARCH_FOLD_SQL = (
+    "regexp_replace(translate(lower(coalesce(%s, '')), "
+    "'áàäâãåéèëêíìïîóòöôõúùüûñç', 'aaaaaaeeeeiiiiooooouuuunc'), '[^a-z0-9]+', ' ', 'g')"
+)
+
+
+def ensure_search_trgm_indexes():
+    """Índices trigram (pg_trgm, GIN) para el buscador de recintos (Select2).
+
+    Esas búsquedas son `LIKE '%texto%'` sobre el texto plegado: un B-tree no sirve con el comodín
+    delante y cada tecla recorría la tabla entera. Con GIN + gin_trgm_ops sobre LA MISMA expresión
+    plegada, Postgres resuelve el LIKE por índice sin cambiar la consulta. Idempotente; si la
+    extensión no se puede crear, los CREATE INDEX fallan con aviso y todo sigue funcionando igual.
+
+    Terceros (promoters) NO: su buscador hace OR con email, teléfono, CIF y una subconsulta sobre
+    sus sociedades, y ese OR no se puede resolver por índice; solo añadirían coste al escribir.
+    """
+    cols = {
+        "venues": ("name", "municipality", "province", "address"),
+    }
+    stmts = ["CREATE EXTENSION IF NOT EXISTS pg_trgm;"]
+    for table, names in cols.items():
+        for col in names:
+            stmts.append('CREATE INDEX IF NOT EXISTS "ix_%s_%s_trgm" ON "%s" USING gin ((%s) gin_trgm_ops);'
+                         % (table, col, table, _SEARCH_FOLD_SQL % ('"%s"' % col)))
+    _exec_ddl_statements(stmts, "search_trgm_indexes")
+
+
 # =========================================================
 # Integración Chartmetric (métricas) — caché en BD
 # Patrón: NO llamar a la API en cada carga (plan por uso, $0.01/llamada). Resolvemos una vez el